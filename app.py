@@ -1,45 +1,262 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context, g
+from werkzeug.utils import safe_join
 from flask_cors import CORS
 import openai
 import os
 import logging
 import json
 import requests
-import re
+import atexit
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from urllib.parse import quote
 from dotenv import load_dotenv
+import export
+import metrics
+import prompts
+from log_utils import setup_logging, LazyJSON, Truncated
+from session_store import SessionStore
+from structured_output import StructuredOutputError, parse_structured, repair_messages
+from llm_metrics import LLMUsageRecorder, estimate_prompt_tokens
+from context_manager import ContextManager
+from backends import create_chat_backend, create_speech_backend
+from cassette import CASSETTE_MODES, CassetteChatBackend, CassetteMissError, CassetteSpeechBackend, CassetteStore
+from http_clients import UpstreamClient, CircuitBreaker, NonRetryableError, UpstreamHTTPError
+from jobs import JobQueue, JobQueueFull
+from scheduler import PriorityClass, SchedulerSaturated, UpstreamScheduler
+from quest_engine import QuestEngine
+from eval_cache import EvaluationCache, make_evaluation_key
+from artifacts import new_artifact_filename, atomic_write_bytes
+from audio_index import AudioIndex
+from artifact_catalog import ArtifactCatalog
+from storage import create_storage
+from tts_cache import TTSCache, make_cache_key
+from tts_pipeline import SpeechPipeline, create_tts_executor
+from conversation_log import JSONL_EXTENSION, conversation_log_writer, parse_jsonl
 
 # .env 파일 로드
 load_dotenv()
 
-# 로깅 설정
-logging.basicConfig(level=logging.INFO)
+# 로깅 설정 (포맷팅/출력은 백그라운드 리스너 스레드에서 처리)
+setup_logging(
+    level=os.getenv('LOG_LEVEL', 'INFO'),
+    log_format=os.getenv('LOG_FORMAT', 'text'),
+    log_file=os.getenv('LOG_FILE'),
+    max_message_chars=int(os.getenv('LOG_MAX_MESSAGE_CHARS', 4000))
+)
 logger = logging.getLogger(__name__)
+# 대화 본문 등 반복 로그의 샘플링 비율 (0~1)
+LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))
 
 app = Flask(__name__)
 CORS(app, origins="*", supports_credentials=True)  # 모든 도메인 허용
 
-# API 키 설정
+# API 키 설정 (없어도 서버는 시작하고, 해당 외부 API 호출만 실패)
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY 환경변수가 설정되지 않았습니다.")
-openai.api_key = OPENAI_API_KEY
-
-# ElevenLabs API 키 (환경변수에서 가져오거나 직접 설정)
 ELEVENLABS_API_KEY = os.getenv('ELEVENLABS_API_KEY')
-if not ELEVENLABS_API_KEY:
-    raise ValueError("ELEVENLABS_API_KEY 환경변수가 설정되지 않았습니다.")
 ELEVENLABS_VOICE_ID = "BNr4zvrC1bGIdIstzjFQ" # Harry Kim
+ELEVENLABS_MODEL_ID = "eleven_multilingual_v2"
+ELEVENLABS_VOICE_SETTINGS = {
+    "speed": 1.2,
+    "stability": 0.5,
+    "similarity_boost": 0.5,
+    "style": 0.0,
+    "use_speaker_boost": True
+}
+
+# 외부 API 클라이언트 (연결 풀 재사용 + 타임아웃 + 재시도 + 서킷 브레이커)
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 5))
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', 2))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('CIRCUIT_FAILURE_THRESHOLD', 5))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv('CIRCUIT_RESET_TIMEOUT', 30))
+
+openai_client = UpstreamClient(
+    'OpenAI',
+    connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+    read_timeout=float(os.getenv('OPENAI_READ_TIMEOUT', 60)),
+    max_retries=UPSTREAM_MAX_RETRIES,
+    breaker=CircuitBreaker('OpenAI', CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+)
+# 스레드마다 세션을 새로 만들지 않고 공용 연결 풀 사용 (SharedSession은 openai의 주기적 close()를 무시)
+openai.requestssession = openai_client.session
+atexit.register(openai_client.close)
+
+elevenlabs_client = UpstreamClient(
+    'ElevenLabs',
+    connect_timeout=UPSTREAM_CONNECT_TIMEOUT,
+    read_timeout=float(os.getenv('ELEVENLABS_READ_TIMEOUT', 30)),
+    max_retries=UPSTREAM_MAX_RETRIES,
+    breaker=CircuitBreaker('ElevenLabs', CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_TIMEOUT)
+)
+atexit.register(elevenlabs_client.close)
+
+# LLM/TTS 백엔드 (API 주소를 바꾸면 OpenAI/ElevenLabs 호환 서버로 보낼 수 있음)
+chat_backend = create_chat_backend(
+    os.getenv('LLM_BACKEND', 'openai'),
+    api_key=OPENAI_API_KEY,
+    api_base=os.getenv('OPENAI_API_BASE')
+)
+speech_backend = create_speech_backend(
+    os.getenv('TTS_BACKEND', 'elevenlabs'),
+    elevenlabs_client,
+    api_key=ELEVENLABS_API_KEY,
+    api_base=os.getenv('ELEVENLABS_API_BASE'),
+    voice_id=ELEVENLABS_VOICE_ID,
+    model_id=ELEVENLABS_MODEL_ID,
+    voice_settings=ELEVENLABS_VOICE_SETTINGS
+)
+
+# 외부 API 호출 우선순위 스케줄러 (채팅/TTS > 퀘스트 분석/대화 요약 > 평가/치트시트/음성 분석)
+# 평가/치트시트/음성 분석은 몰리면 503으로 차단해 채팅 지연 시간을 지킴
+upstream_scheduler = UpstreamScheduler(
+    [
+        PriorityClass('interactive', 0, int(os.getenv('SCHEDULER_INTERACTIVE_CONCURRENCY', 32)),
+                      max_wait=float(os.getenv('SCHEDULER_INTERACTIVE_MAX_WAIT', 30))),
+        PriorityClass('analysis', 1, int(os.getenv('SCHEDULER_ANALYSIS_CONCURRENCY', 8)),
+                      max_wait=float(os.getenv('SCHEDULER_ANALYSIS_MAX_WAIT', 30)), reserve=0.1),
+        PriorityClass('batch', 2, int(os.getenv('SCHEDULER_BATCH_CONCURRENCY', 4)),
+                      max_queue=int(os.getenv('SCHEDULER_BATCH_MAX_QUEUE', 8)),
+                      max_wait=float(os.getenv('SCHEDULER_BATCH_MAX_WAIT', 10)), reserve=0.3, shed=True),
+    ],
+    {
+        'chat': 'interactive',
+        'chat_stream': 'interactive',
+        'tts': 'interactive',
+        'analyze_quest': 'analysis',
+        'context_summary': 'analysis',
+        'evaluate': 'batch',
+        'generate_cheatsheet': 'batch',
+        'analyze_voice': 'batch'
+    },
+    default_class='batch'
+)
+# API 키별 분당 한도 (0이면 제한 없음, 사용 중인 요금제 한도보다 조금 낮게 설정)
+# 업스트림 전체 동시 실행 수는 분당 한도가 없어도 적용되어 평가 등이 몰릴 때 채팅 자리를 남김
+upstream_scheduler.add_limit('OpenAI', OPENAI_API_KEY,
+                             requests_per_minute=int(os.getenv('OPENAI_RPM', 0)),
+                             tokens_per_minute=int(os.getenv('OPENAI_TPM', 0)),
+                             max_in_flight=int(os.getenv('OPENAI_MAX_IN_FLIGHT', 32)))
+upstream_scheduler.add_limit('ElevenLabs', ELEVENLABS_API_KEY,
+                             requests_per_minute=int(os.getenv('ELEVENLABS_RPM', 0)),
+                             max_in_flight=int(os.getenv('ELEVENLABS_MAX_IN_FLIGHT', 0)))
+
+# JSON 응답 모드 (json_object: response_format으로 JSON 객체만 받음, text: 응답 텍스트에서 추출)
+STRUCTURED_OUTPUT_MODE = os.getenv('STRUCTURED_OUTPUT_MODE', 'json_object')
+# 형식이 잘못된 JSON 응답을 교정할 모델
+STRUCTURED_REPAIR_MODEL = os.getenv('STRUCTURED_REPAIR_MODEL', 'gpt-3.5-turbo')
+
+# 재시도할 OpenAI 오류 (요청 형식 오류 등은 재시도하지 않음)
+OPENAI_RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.Timeout,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+    openai.error.TryAgain
+)
+
+# 참여자/페이지별 대화 기록 저장소
+session_store = SessionStore(
+    max_sessions=int(os.getenv('SESSION_MAX_COUNT', 1000)),
+    max_messages=int(os.getenv('SESSION_MAX_MESSAGES', 20)),
+    idle_ttl=int(os.getenv('SESSION_IDLE_TTL', 3600))
+)
+
+# 오디오 파일은 생성 후 변경되지 않으므로 브라우저 캐시 허용 (초)
+AUDIO_CACHE_MAX_AGE = int(os.getenv('AUDIO_CACHE_MAX_AGE', 86400))
+
+# LLM 호출별 토큰 사용량/지연 시간 집계
+llm_usage = LLMUsageRecorder(window=int(os.getenv('LLM_METRICS_WINDOW', 1000)))
+# 스트리밍 응답 마지막 청크로 usage(캐시된 토큰 포함)를 요청 (지원하지 않는 호환 서버면 false)
+LLM_STREAM_USAGE = os.getenv('LLM_STREAM_USAGE', 'true').lower() == 'true'
 
-# 대화 기록을 저장할 리스트
-conversation_history = []
+# 대화 문맥 관리: 토큰 예산을 넘는 오래된 대화는 백그라운드에서 요약
+CONTEXT_SUMMARY_MODEL = os.getenv('CONTEXT_SUMMARY_MODEL', 'gpt-3.5-turbo')
+context_manager = ContextManager(
+    lambda previous_summary, messages: summarize_conversation(previous_summary, messages),
+    ThreadPoolExecutor(max_workers=int(os.getenv('CONTEXT_SUMMARY_WORKERS', 2)), thread_name_prefix="context-summary"),
+    history_token_budget=int(os.getenv('CONTEXT_HISTORY_TOKEN_BUDGET', 1200)),
+    min_recent_messages=int(os.getenv('CONTEXT_MIN_RECENT_MESSAGES', 4)),
+    max_pending_tokens=int(os.getenv('CONTEXT_MAX_PENDING_TOKENS', 0)) or None
+)
+
+# 문장 단위 음성 합성 워커
+tts_executor = create_tts_executor(int(os.getenv('TTS_PIPELINE_WORKERS', 4)))
 
 # 로그 파일 경로
 LOG_DIR = "logs"
 if not os.path.exists(LOG_DIR):
     os.makedirs(LOG_DIR)
 
+# 외부 API 응답 녹화/재생 (record: 실제 호출 결과 기록, replay: 기록된 응답으로 대체)
+CASSETTE_MODE = os.getenv('CASSETTE_MODE', 'off')
+if CASSETTE_MODE not in CASSETTE_MODES:
+    raise ValueError(f"알 수 없는 CASSETTE_MODE: {CASSETTE_MODE} ({', '.join(CASSETTE_MODES)})")
+if CASSETTE_MODE != 'off':
+    cassette_store = CassetteStore(
+        os.getenv('CASSETTE_PATH', os.path.join(LOG_DIR, 'cassette.db')),
+        strict=os.getenv('CASSETTE_STRICT', 'false').lower() == 'true'
+    )
+    cassette_latency_scale = float(os.getenv('CASSETTE_LATENCY_SCALE', 1.0))
+    chat_backend = CassetteChatBackend(chat_backend, cassette_store, CASSETTE_MODE, cassette_latency_scale)
+    speech_backend = CassetteSpeechBackend(speech_backend, cassette_store, CASSETTE_MODE, cassette_latency_scale)
+    logger.info(f"카세트 {CASSETTE_MODE} 모드: {cassette_store.db_path} (재생 지연 배율: {cassette_latency_scale})")
+
+# 오디오 파일명 -> 경로 인덱스 (처음 실행 시 기존 파일로 구성)
+audio_index = AudioIndex(os.path.join(LOG_DIR, 'audio_index.json'), root_dir=LOG_DIR)
+if not audio_index.exists():
+    audio_index.rebuild(LOG_DIR)
+atexit.register(audio_index.save)
+
+# 참여자 산출물 카탈로그 (저장 시점에 기록, 처음 실행 시 기존 파일로 구성)
+artifact_catalog = ArtifactCatalog(LOG_DIR, os.path.join(LOG_DIR, 'artifacts.db'))
+if artifact_catalog.is_new():
+    artifact_catalog.rebuild()
+conversation_log_writer.on_written = artifact_catalog.register
+
+# 참여자 데이터 저장소 (file: 기존 파일 구조, sqlite: WAL 모드 SQLite)
+storage = create_storage(
+    os.getenv('STORAGE_BACKEND', 'file'),
+    LOG_DIR,
+    db_path=os.getenv('STORAGE_DB_PATH'),
+    catalog=artifact_catalog,
+    log_writer=conversation_log_writer
+)
+atexit.register(storage.close)
+
+# TTS 음성 캐시 (동일 문장은 ElevenLabs 재호출 없이 재사용)
+tts_cache = TTSCache(
+    os.getenv('TTS_CACHE_DIR', os.path.join(LOG_DIR, '.tts_cache')),
+    max_bytes=int(os.getenv('TTS_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+)
+
+# 평가/치트시트 생성 백그라운드 작업 큐
+job_queue = JobQueue(
+    os.path.join(LOG_DIR, '.jobs'),
+    max_workers=int(os.getenv('JOB_WORKERS', 2)),
+    max_pending=int(os.getenv('JOB_MAX_PENDING', 100))
+)
+job_queue_recovered = False
+job_queue_recover_lock = threading.Lock()
+JOB_EVENTS_POLL_INTERVAL = 0.5  # 작업 상태 SSE 확인 주기 (초)
+JOB_EVENTS_TIMEOUT = 300
+
+# 대화 평가 결과 캐시 (같은 대화 로그는 재평가하지 않음)
+evaluation_cache = EvaluationCache(
+    os.path.join(LOG_DIR, '.eval_cache'),
+    max_entries=int(os.getenv('EVAL_CACHE_MAX_ENTRIES', 1000)),
+    max_disk_entries=int(os.getenv('EVAL_CACHE_MAX_DISK_ENTRIES', 10000))
+)
+
+# 퀘스트 분석: 로컬 키워드 판정 후 남은 퀘스트만 여러 턴을 모아 저렴한 모델로 확인
+QUEST_ANALYSIS_MODEL = os.getenv('QUEST_ANALYSIS_MODEL', 'gpt-3.5-turbo')
+quest_engine = QuestEngine(
+    lambda turns, quests: escalate_quest_analysis(turns, quests),
+    batch_turns=int(os.getenv('QUEST_LLM_BATCH_TURNS', 3))
+)
+
 def add_cors_headers(response):
     """CORS 헤더 추가"""
     response.headers.add('Access-Control-Allow-Origin', '*')
@@ -54,114 +271,196 @@ def create_user_directory(participant_id):
         os.makedirs(user_dir)
     return user_dir
 
-def clean_json_response(response_text):
-    """LLM 응답에서 JSON 부분만 추출"""
-    # 코드 블록 제거
-    cleaned = response_text.strip()
+def create_chat_completion(endpoint, participant_id=None, prompt=None, **kwargs):
+    """LLM 백엔드 호출 (타임아웃/재시도/서킷 브레이커 적용, 사용량 기록)
     
-    # ```json ... ``` 패턴 찾기
-    json_match = re.search(r'```json\s*(.*?)\s*```', cleaned, re.DOTALL)
-    if json_match:
-        return json_match.group(1).strip()
+    prompt(PromptTemplate)를 넘기면 사용량이 프롬프트 버전별로도 집계된다.
+    호출 전에 스케줄러에서 실행 슬롯을 받으며, 받지 못하면 SchedulerSaturated.
+    """
+    kwargs.setdefault('request_timeout', openai_client.timeout)
     
-    # ``` ... ``` 패턴 찾기
-    code_match = re.search(r'```\s*(.*?)\s*```', cleaned, re.DOTALL)
-    if code_match:
-        return code_match.group(1).strip()
+    def send():
+        try:
+            return chat_backend.create(**kwargs)
+        except (openai.error.InvalidRequestError, openai.error.AuthenticationError, CassetteMissError) as e:
+            raise NonRetryableError(e)
     
-    # JSON 객체 패턴 찾기
-    json_obj_match = re.search(r'\{.*\}', cleaned, re.DOTALL)
-    if json_obj_match:
-        return json_obj_match.group(0).strip()
+    def call():
+        return openai_client.call(send, retryable=OPENAI_RETRYABLE_ERRORS)
     
-    return cleaned
+    # 분당 토큰 한도는 프롬프트 추정치 + 최대 생성 토큰으로 미리 차감
+    cost = estimate_prompt_tokens(kwargs.get('messages', [])) + (kwargs.get('max_tokens') or 0)
+    ticket = upstream_scheduler.acquire(endpoint, 'OpenAI', cost)
+    track = llm_usage.track_stream if kwargs.get('stream') else llm_usage.track
+    try:
+        response = track(endpoint, kwargs.get('model'), participant_id, kwargs.get('messages', []), call,
+                         prompt=prompt.tag if prompt else None)
+    except Exception:
+        ticket.release()
+        raise
+    if kwargs.get('stream'):
+        return ticket.wrap_stream(response)
+    ticket.release()
+    return response
+
+def create_structured_completion(endpoint, schema_name, participant_id=None, prompt=None, **kwargs):
+    """JSON 응답을 요구하는 LLM 호출. 스키마 검증까지 마친 데이터 반환
+    
+    파싱/검증에 실패하면 전체를 다시 생성하지 않고, 저렴한 모델에 형식 교정만 한 번 요청한다.
+    그래도 실패하면 StructuredOutputError.
+    """
+    if STRUCTURED_OUTPUT_MODE == 'json_object':
+        kwargs.setdefault('response_format', {'type': 'json_object'})
+    response = create_chat_completion(endpoint, participant_id=participant_id, prompt=prompt, **kwargs)
+    content = response.choices[0].message.content or ''
+    try:
+        return parse_structured(content, schema_name)
+    except StructuredOutputError as e:
+        logger.warning("%s 응답 형식 오류, 교정 요청: %s", endpoint, e)
+        logger.debug("원본 응답: %s", Truncated(content, 1000))
+        error = e
+    
+    repair_kwargs = {'response_format': kwargs['response_format']} if 'response_format' in kwargs else {}
+    repaired = create_chat_completion(
+        f'{endpoint}_repair',
+        participant_id=participant_id,
+        model=STRUCTURED_REPAIR_MODEL,
+        messages=repair_messages(content, schema_name, error),
+        max_tokens=kwargs.get('max_tokens'),
+        temperature=0,
+        **repair_kwargs
+    )
+    return parse_structured(repaired.choices[0].message.content or '', schema_name)
+
+def synthesize_speech(text):
+    """TTS 백엔드로 음성을 합성하여 MP3 바이트 반환 (실패 시 None)"""
+    cache_key = make_cache_key(text, *speech_backend.cache_params())
+    cached = tts_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"TTS 캐시 적중: {cache_key[:12]}")
+        return cached
+    
+    try:
+        with upstream_scheduler.slot('tts', 'ElevenLabs'):
+            audio_content = speech_backend.synthesize(text)
+    except UpstreamHTTPError as e:
+        logger.error(f"ElevenLabs API 오류: {str(e)}")
+        return None
+    except SchedulerSaturated as e:
+        logger.error(f"음성 합성 대기 시간 초과: {str(e)}")
+        return None
+    
+    tts_cache.put(cache_key, audio_content)
+    return audio_content
 
-def generate_elevenlabs_audio(text):
+def save_audio_file(audio_content, participant_id=None):
+    """음성 파일 저장 (참여자 ID가 있으면 사용자별 폴더에 저장)"""
+    target_dir = create_user_directory(participant_id) if participant_id else LOG_DIR
+    audio_filename = new_artifact_filename('audio', 'mp3')
+    audio_filepath = os.path.join(target_dir, audio_filename)
+    
+    atomic_write_bytes(audio_filepath, audio_content)
+    
+    audio_index.register(audio_filepath)
+    artifact_catalog.register(audio_filepath)
+    logger.info(f"음성 파일 생성됨: {audio_filepath}")
+    return audio_filepath
+
+def audio_url_for(audio_filepath, participant_id=None):
+    """음성 파일 URL 생성 (참여자 ID가 있으면 참여자 경로 포함)"""
+    # 참여자 ID에 '#', '?', '%', 공백 등이 있어도 경로가 깨지지 않도록 세그먼트마다 인코딩
+    filename = quote(os.path.basename(audio_filepath), safe='')
+    if participant_id:
+        return f'/api/audio/{quote(participant_id, safe="")}/{filename}'
+    return f'/api/audio/{filename}'
+
+def generate_elevenlabs_audio(text, participant_id=None):
     """ElevenLabs API를 사용하여 음성 생성"""
     try:
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
-        
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ELEVENLABS_API_KEY
-        }
-        
-        data = {
-            "text": text,
-            "model_id": "eleven_multilingual_v2",
-            "voice_settings": {
-                "speed": 1.2,
-                "stability": 0.5,
-                "similarity_boost": 0.5,
-                "style": 0.0,
-                "use_speaker_boost": True
-            }
-        }
-        
-        response = requests.post(url, json=data, headers=headers)
-        
-        if response.status_code == 200:
-            # 오디오 파일로 저장 (사용자별 폴더에 저장)
-            audio_filename = f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
-            audio_filepath = os.path.join(LOG_DIR, audio_filename)
-            
-            with open(audio_filepath, 'wb') as f:
-                f.write(response.content)
-            
-            logger.info(f"음성 파일 생성됨: {audio_filepath}")
-            return audio_filepath
-        else:
-            logger.error(f"ElevenLabs API 오류: {response.status_code} - {response.text}")
+        audio_content = synthesize_speech(text)
+        if audio_content is None:
             return None
+        return save_audio_file(audio_content, participant_id)
             
     except Exception as e:
         logger.error(f"음성 생성 오류: {str(e)}")
         return None
 
 def save_conversation_log(user_message, bot_response, participant_id=None, page_type="chat"):
-    """대화 로그를 파일에 저장"""
+    """대화 로그를 저장소에 추가"""
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     
-    # 참여자 ID가 있으면 사용자별 폴더에 저장
-    if participant_id:
-        user_dir = create_user_directory(participant_id)
-        log_filename = f"medical_conversation_{page_type}_{datetime.now().strftime('%Y%m%d')}.json"
-        log_filepath = os.path.join(user_dir, log_filename)
-    else:
-        log_filename = f"medical_conversation_{page_type}_unknown_{datetime.now().strftime('%Y%m%d')}.json"
-        log_filepath = os.path.join(LOG_DIR, log_filename)
-    
     log_entry = {
         "timestamp": datetime.now().isoformat(),
         "user_message": user_message,
         "bot_response": bot_response,
         "session_id": timestamp,
         "participant_id": participant_id,
-        "page_type": page_type
+        "page_type": page_type,
+        "prompt_version": prompts.DOCTOR.tag
     }
     
-    try:
-        # 기존 로그 파일이 있으면 읽어서 추가
-        if os.path.exists(log_filepath):
-            with open(log_filepath, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        else:
-            logs = []
-        
-        logs.append(log_entry)
-        
-        # 로그 파일에 저장
-        with open(log_filepath, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, ensure_ascii=False, indent=2)
-            
-        logger.info(f"대화 로그 저장됨: {log_filepath}")
-        
-    except Exception as e:
-        logger.error(f"로그 저장 오류: {str(e)}")
+    storage.append_conversation(participant_id, page_type, log_entry)
+
+CHAT_ERROR_MESSAGE = '죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요.'
+
+def build_chat_messages(session):
+    """세션 대화 기록(요약 + 최근 대화)으로 LLM 요청 메시지 구성"""
+    return context_manager.build_messages(prompts.DOCTOR.system, session)
+
+def summarize_conversation(previous_summary, messages):
+    """오래된 대화를 기존 요약과 합쳐 새 요약 생성"""
+    transcript = "\n".join(
+        f"{'환자' if message['role'] == 'user' else '의사'}: {message['content']}" for message in messages
+    )
+    response = create_chat_completion(
+        'context_summary',
+        prompt=prompts.CONTEXT_SUMMARY,
+        model=CONTEXT_SUMMARY_MODEL,
+        messages=prompts.CONTEXT_SUMMARY.messages(previous_summary=previous_summary or '(없음)', transcript=transcript),
+        max_tokens=300,
+        temperature=0.2
+    )
+    return response.choices[0].message.content.strip()
+
+def stream_chat_tokens(session):
+    """LLM 응답을 토큰 단위로 생성"""
+    options = {'stream_options': {'include_usage': True}} if LLM_STREAM_USAGE else {}
+    response = create_chat_completion(
+        'chat_stream',
+        participant_id=session.key[0],
+        prompt=prompts.DOCTOR,
+        model="gpt-4o",
+        messages=build_chat_messages(session),
+        max_tokens=300,
+        temperature=0.7,
+        stream=True,
+        **options
+    )
+    for chunk in response:
+        if not chunk.choices:
+            continue
+        token = chunk.choices[0].delta.get('content')
+        if token:
+            yield token
+
+def format_sse(payload):
+    """Server-Sent Events 형식으로 변환"""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def sse_response(generator):
+    """SSE 스트리밍 응답 생성"""
+    response = Response(stream_with_context(generator), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 프록시 버퍼링 방지
+    return response
 
 @app.route('/api/chat', methods=['POST'])
 def chat():
+    # Accept: text/event-stream 요청은 스트리밍 모드로 처리
+    if request.accept_mimetypes.best == 'text/event-stream':
+        return chat_stream()
+    
     try:
         data = request.get_json()
         user_message = data.get('message', '')
@@ -171,54 +470,33 @@ def chat():
         if not user_message:
             return jsonify({'error': '메시지가 없습니다.'}), 400
         
-        logger.info(f"사용자 메시지: {user_message} (참여자: {participant_id}, 페이지: {page_type})")
+        logger.info("사용자 메시지 (참여자: %s, 페이지: %s, 길이: %d)", participant_id, page_type, len(user_message))
+        logger.debug("사용자 메시지 내용: %s", Truncated(user_message), extra={'sample_rate': LOG_SAMPLE_RATE})
         
-        # 대화 기록에 사용자 메시지 추가
-        conversation_history.append({"role": "user", "content": user_message})
+        # 참여자별 세션에 사용자 메시지 추가
+        session = session_store.get(participant_id, page_type)
+        context_manager.append(session, "user", user_message)
         
         # OpenAI API 호출
         try:
-            response = openai.ChatCompletion.create(
+            response = create_chat_completion(
+                'chat',
+                participant_id=participant_id,
+                prompt=prompts.DOCTOR,
                 model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": """당신은 50대 후반의 경험 많은 내과 의사입니다. 
-
-성격 특징:
-- 다소 까칠하고 직설적인 성격
-- 불필요한 공손함보다는 솔직한 소통 선호
-- "그래", "음", "흠" 같은 짧은 반응을 자주 사용
-
-진료 스타일:
-- 핵심적인 진료 질문과 답변
-- 불필요한 자세한 설명보다는 핵심만 전달
-- 때로는 짧은 한마디로 끝내기도 함
-- 의료 전문 용어 및 존대말을 적절히 사용
-- 진료 상황에 맞는 적절한 톤과 어조
-
-진료 시나리오:
-- 증상 문진, 진찰, 진단, 처방 등 의료 과정 진행
-- 환자의 증상을 정확히 파악하고 적절한 진료 제공
-- 필요시 추가 검사나 상담을 권유
-- 한국어로 진료하되 간결하게 진행"""},
-                    *conversation_history
-                ],
+                messages=build_chat_messages(session),
                 max_tokens=300,
                 temperature=0.7
             )
             
             bot_response = response.choices[0].message.content
-            logger.info(f"봇 응답: {bot_response}")
+            logger.debug("봇 응답: %s", Truncated(bot_response), extra={'sample_rate': LOG_SAMPLE_RATE})
             
             # 대화 로그 저장 (페이지 타입 포함)
             save_conversation_log(user_message, bot_response, participant_id, page_type)
             
-            # 대화 기록에 봇 응답 추가
-            conversation_history.append({"role": "assistant", "content": bot_response})
-            
-            # 대화 기록이 너무 길어지면 오래된 메시지 제거
-            if len(conversation_history) > 10:
-                conversation_history.pop(0)
-                conversation_history.pop(0)
+            # 대화 기록에 봇 응답 추가 (오래된 메시지는 링 버퍼에서 자동 제거)
+            context_manager.append(session, "assistant", bot_response)
             
             return jsonify({
                 'response': bot_response,
@@ -228,7 +506,7 @@ def chat():
         except Exception as e:
             logger.error(f"OpenAI API 오류: {str(e)}")
             return jsonify({
-                'response': '죄송합니다. 일시적인 오류가 발생했습니다. 잠시 후 다시 시도해주세요.',
+                'response': CHAT_ERROR_MESSAGE,
                 'status': 'error'
             }), 500
             
@@ -236,11 +514,59 @@ def chat():
         logger.error(f"서버 오류: {str(e)}")
         return jsonify({'error': '서버 오류가 발생했습니다.'}), 500
 
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """LLM 응답을 SSE로 토큰 단위 스트리밍"""
+    try:
+        data = request.get_json()
+        user_message = data.get('message', '')
+        participant_id = data.get('participant_id', None)
+        page_type = data.get('page_type', 'chat')
+        
+        if not user_message:
+            return jsonify({'error': '메시지가 없습니다.'}), 400
+        
+        logger.info("사용자 메시지(스트리밍) (참여자: %s, 페이지: %s, 길이: %d)", participant_id, page_type, len(user_message))
+        logger.debug("사용자 메시지 내용: %s", Truncated(user_message), extra={'sample_rate': LOG_SAMPLE_RATE})
+        
+        session = session_store.get(participant_id, page_type)
+        context_manager.append(session, "user", user_message)
+        
+        def generate():
+            tokens = []
+            try:
+                for token in stream_chat_tokens(session):
+                    tokens.append(token)
+                    yield format_sse({'type': 'token', 'content': token})
+            except Exception as e:
+                logger.error(f"OpenAI API 스트리밍 오류: {str(e)}")
+                yield format_sse({'type': 'error', 'response': CHAT_ERROR_MESSAGE, 'status': 'error'})
+                return
+            
+            bot_response = ''.join(tokens)
+            logger.debug("봇 응답(스트리밍): %s", Truncated(bot_response), extra={'sample_rate': LOG_SAMPLE_RATE})
+            
+            # 스트림 완료 후 로그 저장 및 세션 갱신
+            save_conversation_log(user_message, bot_response, participant_id, page_type)
+            context_manager.append(session, "assistant", bot_response)
+            
+            yield format_sse({'type': 'done', 'response': bot_response, 'status': 'success'})
+        
+        return sse_response(generate())
+        
+    except Exception as e:
+        logger.error(f"서버 오류: {str(e)}")
+        return jsonify({'error': '서버 오류가 발생했습니다.'}), 500
+
 @app.route('/api/clear', methods=['POST'])
 def clear_conversation():
-    """대화 기록 초기화"""
-    global conversation_history
-    conversation_history = []
+    """대화 기록 초기화 (요청한 참여자의 세션만)"""
+    data = request.get_json(silent=True) or {}
+    participant_id = data.get('participant_id', None)
+    page_type = data.get('page_type', None)
+    session_store.clear(participant_id, page_type)
+    if page_type in (None, 'retry'):
+        quest_engine.reset(participant_id)
     return jsonify({'status': 'success', 'message': '대화 기록이 초기화되었습니다.'})
 
 @app.route('/api/health', methods=['GET'])
@@ -248,6 +574,65 @@ def health_check():
     """서버 상태 확인"""
     return add_cors_headers(jsonify({'status': 'healthy', 'message': '서버가 정상적으로 작동 중입니다.'}))
 
+@app.before_request
+def start_request_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule else 'unmatched'
+    g.metrics_started = time.perf_counter()
+    metrics.HTTP_REQUESTS_IN_FLIGHT.inc(g.metrics_route)
+
+@app.after_request
+def record_response_status(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    # 스트리밍 응답은 전송이 끝난 뒤 호출되므로 전체 전송 시간이 기록됨
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    route = g.metrics_route
+    status = g.get('metrics_status', 500)
+    metrics.HTTP_REQUESTS_IN_FLIGHT.dec(route)
+    metrics.HTTP_REQUESTS.inc(request.method, route, status)
+    metrics.HTTP_REQUEST_DURATION.observe(time.perf_counter() - started, request.method, route)
+
+@app.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus 텍스트 형식 메트릭"""
+    return Response(metrics.registry.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/metrics/llm', methods=['GET'])
+def llm_metrics():
+    """엔드포인트별/참여자별 LLM 토큰 사용량과 지연 시간 백분위수"""
+    participant_id = request.args.get('participant_id')
+    return jsonify(llm_usage.summary(participant_id))
+
+@app.route('/api/prompts', methods=['GET'])
+def prompt_versions():
+    """등록된 프롬프트 버전/지문 목록"""
+    return jsonify({'status': 'success', 'prompts': prompts.registry.describe()})
+
+@app.route('/api/scheduler/stats', methods=['GET'])
+def scheduler_stats():
+    """우선순위 클래스별 실행/대기/차단 수와 API 키별 남은 한도"""
+    return jsonify({'status': 'success', 'scheduler': upstream_scheduler.stats()})
+
+def overloaded_result(error):
+    """부하 차단된 요청의 (응답 데이터, 상태 코드)"""
+    logger.warning("부하 차단: %s", error)
+    return {
+        'error': '요청이 많아 지금은 처리할 수 없습니다. 잠시 후 다시 시도해주세요.',
+        'retry_after': error.retry_after
+    }, 503
+
+def result_response(result, status_code):
+    """(응답 데이터, 상태 코드)를 JSON 응답으로 변환 (부하 차단이면 Retry-After 포함)"""
+    response = jsonify(result)
+    if 'retry_after' in result:
+        response.headers['Retry-After'] = str(result['retry_after'])
+    return response, status_code
+
 @app.route('/api/ngrok-url', methods=['GET'])
 def get_ngrok_url():
     """ngrok URL 제공"""
@@ -303,9 +688,6 @@ def save_user_data():
         if not participant_id or not symptoms or not consent:
             return jsonify({"status": "error", "message": "필수 정보가 누락되었습니다."}), 400
         
-        # 사용자별 디렉토리 생성
-        user_dir = create_user_directory(participant_id)
-        
         # 사용자 정보 저장
         user_data = {
             "participant_id": participant_id,
@@ -315,11 +697,9 @@ def save_user_data():
             "created_at": datetime.now().isoformat()
         }
         
-        user_info_file = os.path.join(user_dir, "user_info.json")
-        with open(user_info_file, 'w', encoding='utf-8') as f:
-            json.dump(user_data, f, ensure_ascii=False, indent=2)
+        storage.save_user_info(participant_id, user_data)
         
-        logger.info(f"사용자 정보 저장됨: {user_info_file}")
+        logger.info(f"사용자 정보 저장됨: {participant_id}")
         
         return jsonify({"status": "success", "message": "사용자 정보가 저장되었습니다."})
         
@@ -335,17 +715,8 @@ def get_logs():
         participant_id = request.args.get('participant_id', None)
         page_type = request.args.get('page_type', 'chat')  # 기본값은 'chat'
         
-        if participant_id:
-            user_dir = create_user_directory(participant_id)
-            log_filename = f"medical_conversation_{page_type}_{date}.json"
-            log_filepath = os.path.join(user_dir, log_filename)
-        else:
-            log_filename = f"medical_conversation_{page_type}_unknown_{date}.json"
-            log_filepath = os.path.join(LOG_DIR, log_filename)
-        
-        if os.path.exists(log_filepath):
-            with open(log_filepath, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
+        logs = storage.get_conversation(participant_id, page_type, date)
+        if logs is not None:
             return jsonify({
                 'status': 'success',
                 'logs': logs,
@@ -404,20 +775,63 @@ def calculate_overall_score_from_grades(grades):
     total_score = (grade_counts['상'] * 100) + (grade_counts['중'] * 60) + (grade_counts['하'] * 30)
     return round(total_score / total_items)
 
-@app.route('/api/evaluate', methods=['POST'])
-def evaluate_conversation():
-    """LLM을 사용한 대화 평가"""
+
+def find_feedback(participant_id, evaluation_key):
+    """같은 평가 키로 이미 저장한 참여자 피드백 문서 (없으면 None)"""
+    if not participant_id:
+        return None
+    for feedback in reversed(storage.list_documents(participant_id, 'feedback')):
+        if feedback.get('evaluation_key') == evaluation_key:
+            return feedback
+    return None
+
+def save_feedback(participant_id, logs, evaluation_data, evaluation_key, cached=False):
+    """평가 결과를 참여자 피드백 문서로 저장"""
+    if not participant_id:
+        logger.warning("참여자 ID가 없어서 피드백 데이터를 저장하지 않습니다.")
+        return
+    
+    feedback_data = {
+        "participant_id": participant_id,
+        "evaluation_date": datetime.now().isoformat(),
+        "conversation_logs": logs,
+        "evaluation_result": evaluation_data,
+        "prompt_version": prompts.EVALUATION.tag,
+        "evaluation_key": evaluation_key,
+        "cached": cached
+    }
+    
+    feedback_name = storage.save_document(participant_id, 'feedback', feedback_data)
+    
+    logger.info("피드백 데이터 저장됨: %s/%s", participant_id, feedback_name)
+
+def run_evaluation(logs, participant_id=None, evaluation_type='conversation_based'):
+    """LLM을 사용한 대화 평가 실행. (응답 데이터, 상태 코드) 반환"""
     try:
-        data = request.get_json()
-        logs = data.get('logs', [])
-        participant_id = data.get('participant_id', None)
-        evaluation_type = data.get('evaluation_type', 'conversation_based')
-        
-        logger.info(f"평가 요청 받음 - 참여자: {participant_id}, 로그 개수: {len(logs)}, 평가 타입: {evaluation_type}")
+        logger.info("평가 요청 받음 - 참여자: %s, 로그 개수: %d, 평가 타입: %s", participant_id, len(logs), evaluation_type)
         
         if not logs:
             logger.warning("평가할 대화 로그가 없습니다.")
-            return jsonify({'error': '평가할 대화 로그가 없습니다.'}), 400
+            return {'error': '평가할 대화 로그가 없습니다.'}, 400
+        
+        # 같은 대화에 대한 평가가 이미 있으면 LLM 호출 없이 반환
+        # 평가 프롬프트가 바뀌면 tag가 달라져 이전 캐시 결과를 사용하지 않음
+        cache_key = make_evaluation_key(logs, evaluation_type, prompts.EVALUATION.tag)
+        cached_evaluation = evaluation_cache.get(cache_key)
+        if cached_evaluation is not None:
+            logger.info("평가 캐시 적중: %s (%s)", participant_id, cache_key[:12])
+            # 피드백 페이지를 새로고침할 때마다 같은 피드백이 쌓이지 않도록 이미 저장된 문서가 있으면 그대로 사용
+            # 같은 대화를 평가받은 다른 참여자에게는 피드백 기록을 새로 남김
+            existing = find_feedback(participant_id, cache_key)
+            if existing is not None:
+                cached_evaluation = existing['evaluation_result']
+            else:
+                save_feedback(participant_id, logs, cached_evaluation, cache_key, cached=True)
+            return {
+                'status': 'success',
+                'evaluation': cached_evaluation,
+                'cached': True
+            }, 200
         
         # 대화 내용을 하나의 텍스트로 결합
         conversation_text = ""
@@ -425,162 +839,89 @@ def evaluate_conversation():
             conversation_text += f"환자: {log['user_message']}\n"
             conversation_text += f"의사: {log['bot_response']}\n\n"
         
-        logger.info(f"대화 텍스트 생성 완료 - 길이: {len(conversation_text)} 문자")
-        logger.info(f"대화 내용 미리보기: {conversation_text[:200]}...")
-        
-        # LLM 평가 프롬프트 (구체적인 대화로그 기반 평가)
-        evaluation_prompt = f"""<Instruction> 너는 환자의 대화 내용 평가 챗봇이야. Conversation Text 중 환자가 한 말을 Evaluation Criteria를 기준으로 Evaluation Score를 매겨줘.
-
-<Conversation Text>
-{conversation_text}
-</Conversation Text>
-
-<Evaluation Criteria>
-1. 환자 입장에서 꼭 말해야 하는 것
-   - 어디가 아픈지 구체적인 위치 = "symptom_location"
-   - 언제부터 아픈지 시작 시기 = "symptom_timing"
-   - 증상이 얼마나 심한지 강도 = "symptom_severity"
-   - 현재 복용 중인 약물 = "current_medication"
-   - 알레르기 여부 = "allergy_info"
-
-2. 진료과정 중에 꼭 들어야 하는 것
-   - 의사의 진단명과 진단 근거 = "diagnosis_info"
-   - 처방약의 이름과 복용 방법 = "prescription_info"
-   - 약의 부작용과 주의사항 = "side_effects"
-   - 다음 진료 계획과 재방문 시기 = "followup_plan"
-   - 증상 악화 시 언제 다시 와야 하는지 = "emergency_plan"
-
-추가 중요한 평가 원칙:
-1. 구체적인 대화로그를 기반으로 평가하세요
-2. 해당 정보가 대화에서 실제로 언급되지 않으면 무조건 '하'로 평가하세요
-3. 각 항목의 모두 이유를 작성하세요. 이유는 반드시 대화 내용을 인용하여 구체적으로 작성하세요
-4. improvement_tips는 '하' 등급을 받은 항목에 대해서만 환자가 해야하는 역할을 생성하세요
-
-</Evaluation Criteria>
-
-<Evaluation Score>
-- 상: 가이드라인을 완벽하게 준수, 구체적이고 상세한 정보 제공
-- 중: 가이드라인을 대부분 준수, 대부분의 정보를 적절히 제공
-- 하: 가이드라인을 거의 준수하지 않음, 정보가 부족하거나 불구체적
-</Evaluation Score>
-
-<Example>
-{{
-    "grades": {{
-        "symptom_location": "상",
-        "symptom_timing": "중",
-        "symptom_severity": "하",
-        "current_medication": "상",
-        "allergy_info": "중",
-        "diagnosis_info": "상",
-        "prescription_info": "중",
-        "side_effects": "하",
-        "followup_plan": "중",
-        "emergency_plan": "중"
-    }},
-    "score_reasons": {{
-        "symptom_location": "환자가 '머리 뒤쪽이 아파요'라고 구체적인 위치를 언급했습니다.",
-        "symptom_timing": "환자가 '어제부터'라고 시작 시기를 언급했지만 더 구체적인 시간이 필요합니다.",
-        "symptom_severity": "증상의 강도에 대한 언급이 대화에서 확인되지 않습니다.",
-        "current_medication": "환자가 현재 복용 중인 약물을 구체적으로 언급했습니다.",
-        "allergy_info": "알레르기 정보가 언급되었습니다.",
-        "diagnosis_info": "의사가 진단명과 근거를 설명했습니다.",
-        "prescription_info": "처방약 정보가 부분적으로 언급되었습니다.",
-        "side_effects": "약의 부작용에 대한 언급이 대화에서 확인되지 않습니다.",
-        "followup_plan": "다음 진료 계획이 언급되었습니다.",
-        "emergency_plan": "증상 악화 시 대응 방안이 언급되었습니다."
-    }},
-    "improvement_tips": [
-        "증상의 강도를 구체적으로 설명해보세요 (예: 10점 만점에 7점 정도).",
-        "약의 부작용과 주의사항을 더 자세히 듣고 기록해보세요.",
-        "알레르기 정보를 더 구체적으로 제공해보세요."
-    ]
-}}
-</Example>
-
-"""
+        logger.debug("대화 텍스트 생성 완료 - 길이: %d 문자, 미리보기: %s", len(conversation_text), Truncated(conversation_text))
         
         # LLM 호출
-        logger.info("LLM 평가 요청 시작...")
-        response = openai.ChatCompletion.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": "당신은 의료 진료 대화 평가 전문가입니다. 환자의 진료 대화 능력을 객관적이고 정확하게 평가해주세요."},
-                {"role": "user", "content": evaluation_prompt}
-            ],
-            max_tokens=1000,
-            temperature=0.3
-        )
+        logger.debug("LLM 평가 요청 시작...")
+        try:
+            evaluation_data = create_structured_completion(
+                'evaluate',
+                'evaluation',
+                participant_id=participant_id,
+                prompt=prompts.EVALUATION,
+                model="gpt-4o",
+                messages=prompts.EVALUATION.messages(conversation_text=conversation_text),
+                max_tokens=1000,
+                temperature=0.3
+            )
+        except StructuredOutputError as e:
+            logger.error(f"평가 결과 형식 오류: {str(e)}")
+            return {'error': '평가 결과 파싱 중 오류가 발생했습니다.'}, 500
+        except SchedulerSaturated as e:
+            return overloaded_result(e)
+        logger.debug("평가 응답 검증 완료 - 평가 항목 수: %d", len(evaluation_data['grades']))
         
-        evaluation_result = response.choices[0].message.content
-        logger.info(f"LLM 평가 응답 받음 - 길이: {len(evaluation_result)} 문자")
-        logger.info(f"LLM 응답 미리보기: {evaluation_result[:300]}...")
+        # grades를 scores로 변환 (하위 호환성을 위해)
+        evaluation_data['scores'] = evaluation_data['grades']
         
-        try:
-            # JSON 파싱 - 코드 블록 제거
-            cleaned_result = clean_json_response(evaluation_result)
-            logger.info(f"JSON 정리 완료 - 길이: {len(cleaned_result)} 문자")
-            logger.info(f"정리된 JSON 미리보기: {cleaned_result[:300]}...")
-            
-            evaluation_data = json.loads(cleaned_result)
-            logger.info(f"JSON 파싱 성공 - 평가 항목 수: {len(evaluation_data.get('grades', {}))}")
-            
-            # grades를 scores로 변환 (하위 호환성을 위해)
-            if 'grades' in evaluation_data:
-                evaluation_data['scores'] = evaluation_data['grades']
-                logger.info("grades를 scores로 변환 완료")
-            
-            # 상/중/하를 점수로 변환 (하위 호환성을 위해)
-            converted_scores = {}
-            for key, grade in evaluation_data['scores'].items():
-                converted_scores[key] = convert_grade_to_score(grade)
-            
-            logger.info(f"점수 변환 완료 - 변환된 점수: {converted_scores}")
-            
-            # 전체 점수 계산 (상/중/하 개수 기반)
-            overall_score = calculate_overall_score_from_grades(evaluation_data['scores'])
-            logger.info(f"전체 점수 계산 완료: {overall_score}점")
-            
-            # 변환된 점수와 원본 등급을 모두 포함
-            evaluation_data['converted_scores'] = converted_scores
-            evaluation_data['overall_score'] = overall_score
-            
-            logger.info(f"대화 평가 완료: {participant_id}")
-            logger.info(f"최종 평가 데이터: {json.dumps(evaluation_data, ensure_ascii=False, indent=2)}")
-            
-            # 평가 결과를 사용자별 폴더에 저장
-            if participant_id:
-                user_dir = create_user_directory(participant_id)
-                feedback_filename = f"feedback_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                feedback_filepath = os.path.join(user_dir, feedback_filename)
-                
-                feedback_data = {
-                    "participant_id": participant_id,
-                    "evaluation_date": datetime.now().isoformat(),
-                    "conversation_logs": logs,
-                    "evaluation_result": evaluation_data
-                }
-                
-                with open(feedback_filepath, 'w', encoding='utf-8') as f:
-                    json.dump(feedback_data, f, ensure_ascii=False, indent=2)
-                
-                logger.info(f"피드백 데이터 저장됨: {feedback_filepath}")
-                logger.info(f"저장된 피드백 데이터 크기: {len(json.dumps(feedback_data, ensure_ascii=False))} 문자")
-            else:
-                logger.warning("참여자 ID가 없어서 피드백 데이터를 저장하지 않습니다.")
+        # 상/중/하를 점수로 변환 (하위 호환성을 위해)
+        converted_scores = {}
+        for key, grade in evaluation_data['scores'].items():
+            converted_scores[key] = convert_grade_to_score(grade)
+        
+        # 전체 점수 계산 (상/중/하 개수 기반)
+        overall_score = calculate_overall_score_from_grades(evaluation_data['scores'])
+        
+        # 변환된 점수와 원본 등급을 모두 포함
+        evaluation_data['converted_scores'] = converted_scores
+        evaluation_data['overall_score'] = overall_score
+        
+        logger.info("대화 평가 완료: %s (전체 점수: %s점)", participant_id, overall_score)
+        evaluation_cache.put(cache_key, evaluation_data)
+        logger.debug("최종 평가 데이터: %s", LazyJSON(evaluation_data, indent=2))
+        
+        save_feedback(participant_id, logs, evaluation_data, cache_key)
+        
+        return {
+            'status': 'success',
+            'evaluation': evaluation_data
+        }, 200
             
-            return jsonify({
-                'status': 'success',
-                'evaluation': evaluation_data
+    except Exception as e:
+        logger.error(f"평가 요청 오류: {str(e)}")
+        return {'error': '평가 중 오류가 발생했습니다.'}, 500
+
+@app.route('/api/evaluate', methods=['POST'])
+def evaluate_conversation():
+    """LLM을 사용한 대화 평가 (async 요청 시 작업 큐에 등록)"""
+    try:
+        data = request.get_json()
+        logs = data.get('logs', [])
+        participant_id = data.get('participant_id', None)
+        evaluation_type = data.get('evaluation_type', 'conversation_based')
+        
+        if not logs:
+            return jsonify({'error': '평가할 대화 로그가 없습니다.'}), 400
+        
+        if is_async_request(data):
+            return enqueue_job('evaluate', participant_id, {
+                'logs': logs,
+                'participant_id': participant_id,
+                'evaluation_type': evaluation_type
             })
-        except json.JSONDecodeError:
-            logger.error(f"LLM 응답 JSON 파싱 오류: {evaluation_result}")
-            return jsonify({'error': '평가 결과 파싱 중 오류가 발생했습니다.'}), 500
-            
+        
+        result, status_code = run_evaluation(logs, participant_id, evaluation_type)
+        return result_response(result, status_code)
+        
     except Exception as e:
         logger.error(f"평가 요청 오류: {str(e)}")
         return jsonify({'error': '평가 중 오류가 발생했습니다.'}), 500
 
+@app.route('/api/evaluate/cache-stats', methods=['GET'])
+def evaluation_cache_stats():
+    """평가 캐시 적중률 조회"""
+    return jsonify({'status': 'success', 'cache': evaluation_cache.stats()})
+
 @app.route('/api/feedback', methods=['GET'])
 def get_feedback():
     """피드백 데이터 조회"""
@@ -594,35 +935,8 @@ def get_feedback():
             logger.warning("참여자 ID가 없습니다.")
             return jsonify({'error': '참여자 ID가 필요합니다.'}), 400
         
-        user_dir = create_user_directory(participant_id)
-        feedback_files = []
-        
-        # 사용자 폴더에서 피드백 파일들 찾기
-        if os.path.exists(user_dir):
-            for filename in os.listdir(user_dir):
-                if filename.startswith('feedback_') and filename.endswith('.json'):
-                    feedback_files.append(filename)
-        
-        logger.info(f"찾은 피드백 파일들: {feedback_files}")
-        
-        # 날짜별로 필터링
-        filtered_files = []
-        for filename in feedback_files:
-            if date in filename:
-                filtered_files.append(filename)
-        
-        logger.info(f"날짜 필터링 후 파일들: {filtered_files}")
-        
-        feedback_data = []
-        for filename in filtered_files:
-            filepath = os.path.join(user_dir, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    feedback_data.append(data)
-                logger.info(f"피드백 파일 읽기 성공: {filename}")
-            except Exception as e:
-                logger.error(f"피드백 파일 읽기 오류: {filepath}, {str(e)}")
+        # 해당 날짜의 피드백을 저장소 인덱스로 조회
+        feedback_data = storage.list_documents(participant_id, 'feedback', date)
         
         logger.info(f"총 {len(feedback_data)}개의 피드백 데이터를 반환합니다.")
         
@@ -646,24 +960,9 @@ def debug_logs():
         logger.info(f"디버그 로그 조회 요청 - 참여자: {participant_id}")
         
         if participant_id:
-            user_dir = create_user_directory(participant_id)
-            if os.path.exists(user_dir):
-                files = os.listdir(user_dir)
-                logger.info(f"사용자 디렉토리 파일들: {files}")
-                
-                file_info = []
-                for filename in files:
-                    filepath = os.path.join(user_dir, filename)
-                    try:
-                        stat = os.stat(filepath)
-                        file_info.append({
-                            'filename': filename,
-                            'size': stat.st_size,
-                            'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                            'type': 'json' if filename.endswith('.json') else 'other'
-                        })
-                    except Exception as e:
-                        logger.error(f"파일 정보 읽기 오류: {filename}, {str(e)}")
+            file_info = storage.list_artifacts(participant_id)
+            if file_info:
+                logger.debug("사용자 디렉토리 파일들: %s", [artifact['filename'] for artifact in file_info])
                 
                 return jsonify({
                     'status': 'success',
@@ -680,8 +979,8 @@ def debug_logs():
         else:
             # 전체 로그 디렉토리 정보
             if os.path.exists(LOG_DIR):
-                users = [d for d in os.listdir(LOG_DIR) if os.path.isdir(os.path.join(LOG_DIR, d))]
-                logger.info(f"전체 사용자 디렉토리: {users}")
+                users = storage.participants()
+                logger.debug("전체 사용자 디렉토리: %s", users)
                 
                 return jsonify({
                     'status': 'success',
@@ -711,77 +1010,73 @@ def debug_log_content():
         if not participant_id or not filename:
             return jsonify({'error': '참여자 ID와 파일명이 필요합니다.'}), 400
         
-        user_dir = create_user_directory(participant_id)
-        filepath = os.path.join(user_dir, filename)
+        try:
+            content = storage.read_artifact(participant_id, filename)
+        except Exception as e:
+            logger.error(f"파일 읽기 오류: {participant_id}/{filename}, {str(e)}")
+            return jsonify({'error': f'파일 읽기 오류: {str(e)}'}), 500
         
-        if os.path.exists(filepath):
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # JSON 파일인 경우 파싱 시도
-                try:
-                    json_content = json.loads(content)
-                    return jsonify({
-                        'status': 'success',
-                        'filename': filename,
-                        'content': json_content,
-                        'is_json': True
-                    })
-                except json.JSONDecodeError:
-                    return jsonify({
-                        'status': 'success',
-                        'filename': filename,
-                        'content': content,
-                        'is_json': False
-                    })
-                    
-            except Exception as e:
-                logger.error(f"파일 읽기 오류: {filepath}, {str(e)}")
-                return jsonify({'error': f'파일 읽기 오류: {str(e)}'}), 500
-        else:
+        if content is None:
             return jsonify({'error': '파일을 찾을 수 없습니다.'}), 404
+        
+        # 대화 로그(.jsonl)는 줄 단위로, 그 외 JSON 파일은 통째로 파싱 시도
+        try:
+            if filename.endswith(JSONL_EXTENSION):
+                json_content = parse_jsonl(content, filename)
+            else:
+                json_content = json.loads(content)
+            return jsonify({
+                'status': 'success',
+                'filename': filename,
+                'content': json_content,
+                'is_json': True
+            })
+        except json.JSONDecodeError:
+            return jsonify({
+                'status': 'success',
+                'filename': filename,
+                'content': content,
+                'is_json': False
+            })
             
     except Exception as e:
         logger.error(f"로그 내용 조회 오류: {str(e)}")
         return jsonify({'error': '로그 내용 조회 중 오류가 발생했습니다.'}), 500
 
-@app.route('/api/generate-cheatsheet', methods=['POST'])
-def generate_cheatsheet():
-    """LLM을 사용한 맞춤형 치트시트 생성"""
+@app.route('/api/export', methods=['GET'])
+def export_records():
+    """전체 참여자 데이터 일괄 내보내기 (NDJSON 스트리밍 또는 Parquet)
+
+    필터: start_date/end_date(YYYYMMDD), page_type, kind(쉼표 구분), participant_id
+    """
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in export.EXPORT_FORMATS:
+        return jsonify({'error': f"지원하지 않는 형식입니다: {export_format} (ndjson 또는 parquet)"}), 400
+    if export_format == 'parquet' and not export.parquet_available():
+        return jsonify({'error': 'Parquet 내보내기를 사용하려면 pyarrow를 설치해야 합니다.'}), 501
     try:
-        data = request.get_json()
-        participant_id = data.get('participant_id', None)
-        
-        if not participant_id:
-            return jsonify({'error': '참여자 ID가 필요합니다.'}), 400
-        
-        # 사용자 정보 가져오기
-        user_dir = create_user_directory(participant_id)
-        user_info_file = os.path.join(user_dir, "user_info.json")
-        
-        user_info = {}
-        if os.path.exists(user_info_file):
-            with open(user_info_file, 'r', encoding='utf-8') as f:
-                user_info = json.load(f)
-        
-        # 대화 로그 가져오기
-        conversation_logs = []
-        log_files = [f for f in os.listdir(user_dir) if f.startswith('medical_conversation_') and f.endswith('.json')]
-        if log_files:
-            latest_log_file = sorted(log_files)[-1]
-            log_filepath = os.path.join(user_dir, latest_log_file)
-            with open(log_filepath, 'r', encoding='utf-8') as f:
-                conversation_logs = json.load(f)
-        
-        # 피드백 데이터 가져오기
-        feedback_data = {}
-        feedback_files = [f for f in os.listdir(user_dir) if f.startswith('feedback_') and f.endswith('.json')]
-        if feedback_files:
-            latest_feedback_file = sorted(feedback_files)[-1]
-            feedback_filepath = os.path.join(user_dir, latest_feedback_file)
-            with open(feedback_filepath, 'r', encoding='utf-8') as f:
-                feedback_data = json.load(f)
+        record_filter = export.parse_filter(request.args)
+    except export.ExportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    logger.info(f"데이터 내보내기 요청 - 형식: {export_format}, 조건: {dict(request.args)}")
+    records = storage.iter_records(record_filter)
+    filename = f"export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}"
+    if export_format == 'parquet':
+        body, mimetype = export.iter_parquet(records, tmp_dir=LOG_DIR), 'application/vnd.apache.parquet'
+    else:
+        body, mimetype = export.iter_ndjson(records), 'application/x-ndjson'
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def run_cheatsheet_generation(participant_id):
+    """LLM을 사용한 맞춤형 치트시트 생성 실행. (응답 데이터, 상태 코드) 반환"""
+    try:
+        # 사용자 정보, 최근 대화 로그, 최근 피드백 가져오기
+        user_info = storage.get_user_info(participant_id)
+        conversation_logs = storage.latest_conversation(participant_id)
+        feedback_data = storage.latest_document(participant_id, 'feedback') or {}
         
         # 대화 내용을 텍스트로 변환
         conversation_text = ""
@@ -789,144 +1084,98 @@ def generate_cheatsheet():
             conversation_text += f"환자: {log['user_message']}\n"
             conversation_text += f"의사: {log['bot_response']}\n\n"
         
-        # LLM 스크립트 생성 프롬프트
-        cheatsheet_prompt = f"""다음은 의료 진료 연습 대화와 피드백 데이터입니다. 
-실제 진료 중에 바로 보고 말할 수 있는 스크립트를 생성해주세요.
-
-사용자 정보:
-- 참여자 ID: {participant_id}
-- 초기 증상: {user_info.get('symptoms', '정보 없음')}
-
-대화 내용:
-{conversation_text}
-
-피드백 평가:
-{json.dumps(feedback_data.get('evaluation_result', {}), ensure_ascii=False, indent=2)}
-
-다음 JSON 형식으로 응답해주세요. title은 똑같이 가져가고, content는 최대한 유저가 말해야하는 대사로 구성해주세요:
-{{
-    "cheatsheet": {{
-        "title": "진료 스크립트",
-        "patient_info": {{
-            "participant_id": "{participant_id}",
-            "initial_symptoms": "{user_info.get('symptoms', '정보 없음')}",
-            "generated_date": "{datetime.now().strftime('%Y년 %m월 %d일')}"
-        }},
-        "script": [
-            {{
-                "title": "증상 위치",
-                "content": "어디가 아픈지 구체적으로 말할 스크립트"
-            }},
-            {{
-                "title": "증상 시작 시기",
-                "content": "언제부터 아픈지 정확히 말할 스크립트"
-            }},
-            {{
-                "title": "증상 강도",
-                "content": "증상이 얼마나 심한지 설명할 스크립트"
-            }},
-            {{
-                "title": "현재 복용 약물",
-                "content": "현재 복용 중인 약물을 설명할 스크립트"
-            }},
-            {{
-                "title": "알레르기 정보",
-                "content": "알레르기 여부를 설명할 스크립트"
-            }}
-        ],
-        "listening": [
-            {{
-                "title": "진단명과 근거",
-                "content": "의사가 말할 진단명과 그 근거"
-            }},
-            {{
-                "title": "처방약 정보",
-                "content": "의사가 말할 처방약의 이름과 복용 방법"
-            }},
-            {{
-                "title": "부작용과 주의사항",
-                "content": "의사가 말할 약의 부작용과 주의사항"
-            }},
-            {{
-                "title": "다음 진료 계획",
-                "content": "의사가 말할 다음 진료 계획과 재방문 시기"
-            }},
-            {{
-                "title": "응급 상황 대응",
-                "content": "의사가 말할 증상 악화 시 언제 다시 와야 하는지"
-            }}
-        ],
-        "precautions": [
-            {{
-                "title": "의사소통 주의사항",
-                "content": "의사의 설명이 이해되지 않으면 반드시 다시 물어보세요"
-            }},
-            {{
-                "title": "약물 복용 주의사항",
-                "content": "약을 복용하기 전에 부작용을 꼭 확인하세요"
-            }},
-            {{
-                "title": "증상 변화 주의사항",
-                "content": "증상이 예상과 다르게 변화하면 즉시 병원에 연락하세요"
-            }},
-            {{
-                "title": "진료 일정 확인",
-                "content": "다음 진료 일정을 정확히 확인하고 기록하세요"
-            }}
-        ]
-    }}
-}}
-
-스크립트 생성 시 주의사항:
-- 실제 진료 중에 바로 보고 말할 수 있는 간단하고 명확한 표현 사용
-- 피드백에서 지적된 개선점들을 반영하여 구체적인 스크립트 제공
-- 각 항목에 핵심 키워드를 포함하여 기억하기 쉽게 구성
-- 실제 말할 수 있는 자연스러운 표현 사용
-- guideline.html의 핵심 체크리스트 5개를 기준으로 script와 listening 구성"""
-        
         # LLM 호출
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "당신은 의료 진료 치트시트 생성 전문가입니다. 실제 진료에서 환자가 사용할 수 있는 실용적이고 자연스러운 치트시트를 생성해주세요."},
-                {"role": "user", "content": cheatsheet_prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.3
-        )
+        try:
+            cheatsheet_data = create_structured_completion(
+                'generate_cheatsheet',
+                'cheatsheet',
+                participant_id=participant_id,
+                prompt=prompts.CHEATSHEET,
+                model="gpt-3.5-turbo",
+                messages=prompts.CHEATSHEET.messages(
+                    symptoms=user_info.get('symptoms', '정보 없음'),
+                    conversation_text=conversation_text,
+                    feedback=json.dumps(feedback_data.get('evaluation_result', {}), ensure_ascii=False, indent=2)
+                ),
+                max_tokens=2000,
+                temperature=0.3
+            )
+        except StructuredOutputError as e:
+            logger.error(f"치트시트 결과 형식 오류: {str(e)}")
+            return {'error': '치트시트 생성 중 오류가 발생했습니다.'}, 500
+        except SchedulerSaturated as e:
+            return overloaded_result(e)
+        
+        # 참여자 정보는 프롬프트 접두부를 고정하기 위해 LLM에 맡기지 않고 직접 채움
+        cheatsheet_data['cheatsheet']['patient_info'] = {
+            'participant_id': participant_id,
+            'initial_symptoms': user_info.get('symptoms', '정보 없음'),
+            'generated_date': datetime.now().strftime('%Y년 %m월 %d일')
+        }
+        cheatsheet_data['prompt_version'] = prompts.CHEATSHEET.tag
         
-        cheatsheet_result = response.choices[0].message.content
+        # 치트시트 데이터를 저장소에 저장
+        cheatsheet_name = storage.save_document(participant_id, 'cheatsheet', cheatsheet_data)
         
-        try:
-            # JSON 파싱 - 코드 블록 제거
-            cleaned_result = clean_json_response(cheatsheet_result)
-            cheatsheet_data = json.loads(cleaned_result)
-            
-            # 치트시트 데이터를 사용자별 폴더에 저장
-            cheatsheet_filename = f"cheatsheet_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            cheatsheet_filepath = os.path.join(user_dir, cheatsheet_filename)
-            
-            with open(cheatsheet_filepath, 'w', encoding='utf-8') as f:
-                json.dump(cheatsheet_data, f, ensure_ascii=False, indent=2)
-            
-            logger.info(f"치트시트 데이터 저장됨: {cheatsheet_filepath}")
-            
-            return jsonify({
-                'status': 'success',
-                'cheatsheet': cheatsheet_data
-            })
-            
-        except json.JSONDecodeError:
-            logger.error(f"LLM 응답 JSON 파싱 오류: {cheatsheet_result}")
-            return jsonify({'error': '치트시트 생성 중 오류가 발생했습니다.'}), 500
+        logger.info(f"치트시트 데이터 저장됨: {participant_id}/{cheatsheet_name}")
+        
+        return {
+            'status': 'success',
+            'cheatsheet': cheatsheet_data
+        }, 200
             
+    except Exception as e:
+        logger.error(f"치트시트 생성 오류: {str(e)}")
+        return {'error': '치트시트 생성 중 오류가 발생했습니다.'}, 500
+
+@app.route('/api/generate-cheatsheet', methods=['POST'])
+def generate_cheatsheet():
+    """LLM을 사용한 맞춤형 치트시트 생성 (async 요청 시 작업 큐에 등록)"""
+    try:
+        data = request.get_json()
+        participant_id = data.get('participant_id', None)
+        
+        if not participant_id:
+            return jsonify({'error': '참여자 ID가 필요합니다.'}), 400
+        
+        if is_async_request(data):
+            return enqueue_job('cheatsheet', participant_id, {'participant_id': participant_id})
+        
+        result, status_code = run_cheatsheet_generation(participant_id)
+        return result_response(result, status_code)
+        
     except Exception as e:
         logger.error(f"치트시트 생성 오류: {str(e)}")
         return jsonify({'error': '치트시트 생성 중 오류가 발생했습니다.'}), 500
 
+def escalate_quest_analysis(turns, quests):
+    """로컬에서 판정하지 못한 퀘스트를 모아진 턴과 함께 LLM으로 확인"""
+    conversation_text = "\n".join(
+        f"환자: {turn['user_message']}\n의사: {turn['bot_response']}" for turn in turns
+    )
+    
+    try:
+        result_data = create_structured_completion(
+            'analyze_quest',
+            'quest_result',
+            prompt=prompts.QUEST_ANALYSIS,
+            model=QUEST_ANALYSIS_MODEL,
+            messages=prompts.QUEST_ANALYSIS.messages(
+                conversation_text=conversation_text,
+                quests=json.dumps(quests, ensure_ascii=False, indent=2)
+            ),
+            temperature=0.1,
+            max_tokens=500
+        )
+        return result_data['completed_quests']
+    except StructuredOutputError as e:
+        # 로컬 키워드 판정은 이미 끝났으므로 이번 배치는 완료 없음으로 처리
+        logger.error(f"퀘스트 분석 결과 형식 오류: {e}")
+        return []
+
 @app.route('/api/analyze-quest', methods=['POST'])
 def analyze_quest():
-    """퀘스트 완료 여부를 LLM으로 분석"""
+    """퀘스트 완료 여부 분석 (로컬 키워드 판정 후 필요할 때만 LLM 확인)"""
     try:
         data = request.get_json()
         user_message = data.get('user_message', '')
@@ -940,105 +1189,35 @@ def analyze_quest():
                 'completed_quests': []
             })
         
-        # LLM에게 퀘스트 분석 요청
-        quest_analysis_prompt = f"""
-당신은 의료 진료 대화에서 환자의 응답을 분석하여 특정 퀘스트의 완료 여부를 판단하는 전문가입니다.
-
-현재 대화:
-환자: {user_message}
-의사: {bot_response}
-
-진행 중인 퀘스트들:
-{json.dumps(active_quests, ensure_ascii=False, indent=2)}
-
-각 퀘스트에 대해 다음 기준으로 완료 여부를 판단해주세요:
-
-1. **증상 설명 퀘스트**: 환자가 증상의 위치, 시작 시기, 강도, 지속 시간을 구체적으로 언급했는지
-2. **약물 정보 퀘스트**: 환자가 현재 복용 중인 약물을 언급했는지
-3. **과거 병력 퀘스트**: 환자가 과거 병력이나 알레르기를 언급했는지
-4. **의사소통 명확성 퀘스트**: 환자가 명확하고 이해하기 쉽게 설명했는지
-5. **질문하기 퀘스트**: 환자가 의사에게 적절한 질문을 했는지
-6. **후속 조치 퀘스트**: 환자가 의사의 설명에 대한 확인이나 추가 질문을 했는지
-
-완료된 퀘스트의 ID만 JSON 배열로 응답해주세요. 완료되지 않은 퀘스트는 포함하지 마세요.
-
-응답 형식:
-```json
-{{
-    "completed_quests": ["quest_id1", "quest_id2"]
-}}
-```
-
-분석해주세요.
-"""
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "당신은 의료 진료 대화 분석 전문가입니다. 정확하고 객관적으로 퀘스트 완료 여부를 판단해주세요."},
-                {"role": "user", "content": quest_analysis_prompt}
-            ],
-            temperature=0.1,
-            max_tokens=500
-        )
-        
-        analysis_result = response.choices[0].message.content.strip()
+        result = quest_engine.analyze(participant_id, user_message, bot_response, active_quests)
+        completed_quests = result['completed_quests']
         
-        # JSON 응답 파싱
-        try:
-            # JSON 부분만 추출
-            json_response = clean_json_response(analysis_result)
-            result_data = json.loads(json_response)
-            
-            completed_quests = result_data.get('completed_quests', [])
-            
-            # 로그 저장
-            if participant_id:
-                user_dir = create_user_directory(participant_id)
-                log_entry = {
-                    'timestamp': datetime.now().isoformat(),
-                    'type': 'quest_analysis',
-                    'user_message': user_message,
-                    'bot_response': bot_response,
-                    'active_quests': active_quests,
-                    'analysis_result': analysis_result,
-                    'completed_quests': completed_quests
-                }
-                
-                log_file = os.path.join(user_dir, f"quest_analysis_{datetime.now().strftime('%Y%m%d')}.json")
-                try:
-                    with open(log_file, 'a', encoding='utf-8') as f:
-                        f.write(json.dumps(log_entry, ensure_ascii=False) + '\n')
-                except Exception as e:
-                    logger.error(f"퀘스트 분석 로그 저장 오류: {e}")
-            
-            return jsonify({
-                'status': 'success',
-                'completed_quests': completed_quests,
-                'analysis_result': analysis_result
-            })
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"퀘스트 분석 JSON 파싱 오류: {e}")
-            logger.error(f"원본 응답: {analysis_result}")
-            
-            # 키워드 기반 폴백 분석
-            completed_quests = []
-            conversation_text = f"{user_message} {bot_response}".lower()
-            
-            for quest in active_quests:
-                quest_id = quest['id']
-                keywords = quest.get('keywords', [])
-                
-                if any(keyword.lower() in conversation_text for keyword in keywords):
-                    completed_quests.append(quest_id)
-            
-            return jsonify({
-                'status': 'success',
+        # 로그 저장
+        if participant_id:
+            log_entry = {
+                'timestamp': datetime.now().isoformat(),
+                'type': 'quest_analysis',
+                'user_message': user_message,
+                'bot_response': bot_response,
+                'active_quests': active_quests,
+                'keyword_hits': result['keyword_hits'],
+                'escalated': result['escalated'],
                 'completed_quests': completed_quests,
-                'fallback': True
-            })
+                'prompt_version': prompts.QUEST_ANALYSIS.tag if result['escalated'] else None
+            }
             
+            try:
+                storage.append_quest_analysis(participant_id, log_entry)
+            except Exception as e:
+                logger.error(f"퀘스트 분석 로그 저장 오류: {e}")
+        
+        return jsonify({
+            'status': 'success',
+            'completed_quests': completed_quests,
+            'escalated': result['escalated'],
+            'elapsed_ms': result['elapsed_ms']
+        })
+        
     except Exception as e:
         logger.error(f"퀘스트 분석 오류: {e}")
         return jsonify({
@@ -1061,58 +1240,23 @@ def analyze_voice():
                 'error': '분석할 메시지가 없습니다.'
             }), 400
         
-        # 사용자별 디렉토리 생성
-        user_dir = create_user_directory(participant_id) if participant_id else LOG_DIR
-        
-        # 분석을 위한 프롬프트 생성
-        analysis_prompt = f"""
-다음은 사용자가 의료진료 연습 중에 한 대화 내용입니다. 
-이 대화를 분석하여 사용자의 언어 사용 패턴, 톤, 스타일을 평가해주세요.
-
-대화 내용:
-{chr(10).join([f"- {msg}" for msg in messages])}
-
-다음 기준으로 분석해주세요:
-1. 언어 사용의 자연스러움
-2. 대화의 편안함과 자신감
-3. 의사소통의 명확성
-4. 북한 방언이나 특별한 언어 패턴의 유무
-
-분석 결과를 다음 JSON 형식으로 응답해주세요:
-{{
-    "summary": "간단한 분석 요약 (1-2문장)",
-    "details": "상세한 분석 내용 (구체적인 예시와 함께)",
-    "confidence_score": 0.85,
-    "positive_aspects": ["자연스러운 대화", "명확한 의사전달"],
-    "suggestions": ["더 자신감 있게 말하기", "질문을 더 적극적으로 하기"]
-}}
-
-분석 시 주의사항:
-- 긍정적인 면을 강조하세요
-- 걱정하지 말라고 격려하는 톤을 유지하세요
-- 구체적인 대화 내용을 언급하면서 분석하세요
-"""
-
         # OpenAI API 호출
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "당신은 언어 분석 전문가입니다. 사용자의 대화를 분석하여 긍정적이고 격려적인 피드백을 제공합니다."},
-                {"role": "user", "content": analysis_prompt}
-            ],
-            temperature=0.7,
-            max_tokens=800
-        )
-        
-        analysis_text = response.choices[0].message.content.strip()
-        
-        # JSON 응답 정리
-        cleaned_json = clean_json_response(analysis_text)
-        
         try:
-            analysis_data = json.loads(cleaned_json)
-        except json.JSONDecodeError:
-            # JSON 파싱 실패 시 기본 응답 생성
+            analysis_data = create_structured_completion(
+                'analyze_voice',
+                'voice_analysis',
+                participant_id=participant_id,
+                prompt=prompts.VOICE_ANALYSIS,
+                model="gpt-3.5-turbo",
+                messages=prompts.VOICE_ANALYSIS.messages(messages="\n".join(f"- {msg}" for msg in messages)),
+                temperature=0.7,
+                max_tokens=800
+            )
+        except SchedulerSaturated as e:
+            return result_response(*overloaded_result(e))
+        except StructuredOutputError as e:
+            # 교정 후에도 형식이 맞지 않으면 기본 응답 생성
+            logger.error(f"음성 분석 결과 형식 오류: {e}")
             analysis_data = {
                 "summary": "자연스럽고 편안한 대화를 이어가셨습니다.",
                 "details": f"총 {len(messages)}개의 대화에서 자연스러운 언어 사용 패턴을 보여주셨습니다. 의사소통이 명확하고 편안한 톤을 유지하셨네요.",
@@ -1121,16 +1265,15 @@ def analyze_voice():
                 "suggestions": ["계속해서 자신감 있게 대화하세요"]
             }
         
-        # 분석 결과를 사용자별 파일에 저장
+        # 분석 결과를 저장소에 저장
         if participant_id:
-            analysis_file = os.path.join(user_dir, f"voice_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
-            with open(analysis_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'participant_id': participant_id,
-                    'timestamp': datetime.now().isoformat(),
-                    'messages_count': len(messages),
-                    'analysis': analysis_data
-                }, f, ensure_ascii=False, indent=2)
+            storage.save_document(participant_id, 'voice_analysis', {
+                'participant_id': participant_id,
+                'timestamp': datetime.now().isoformat(),
+                'messages_count': len(messages),
+                'analysis': analysis_data,
+                'prompt_version': prompts.VOICE_ANALYSIS.tag
+            })
         
         return jsonify({
             'status': 'success',
@@ -1155,86 +1298,219 @@ def generate_tts():
         if not text:
             return jsonify({'error': '텍스트가 없습니다.'}), 400
         
-        # 사용자별 폴더에 음성 파일 저장
-        if participant_id:
-            user_dir = create_user_directory(participant_id)
-            audio_filename = f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
-            audio_filepath = os.path.join(user_dir, audio_filename)
-        else:
-            audio_filename = f"audio_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp3"
-            audio_filepath = os.path.join(LOG_DIR, audio_filename)
-        
-        # ElevenLabs API 호출
-        url = f"https://api.elevenlabs.io/v1/text-to-speech/{ELEVENLABS_VOICE_ID}"
-        
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": ELEVENLABS_API_KEY
-        }
-        
-        data = {
-            "text": text,
-            "model_id": "eleven_multilingual_v2",
-            "voice_settings": {
-                "speed": 1.2,
-                "stability": 0.5,
-                "similarity_boost": 0.5,
-                "style": 0.0,
-                "use_speaker_boost": True
-            }
-        }
-        
-        response = requests.post(url, json=data, headers=headers)
+        audio_filepath = generate_elevenlabs_audio(text, participant_id)
         
-        if response.status_code == 200:
-            with open(audio_filepath, 'wb') as f:
-                f.write(response.content)
-            
-            logger.info(f"음성 파일 생성됨: {audio_filepath}")
+        if audio_filepath:
             return jsonify({
                 'status': 'success',
-                'audio_url': f'/api/audio/{os.path.basename(audio_filepath)}'
+                'audio_url': audio_url_for(audio_filepath, participant_id)
             })
         else:
-            logger.error(f"ElevenLabs API 오류: {response.status_code} - {response.text}")
             return jsonify({'error': '음성 생성에 실패했습니다.'}), 500
             
     except Exception as e:
         logger.error(f"TTS API 오류: {str(e)}")
         return jsonify({'error': '음성 생성 중 오류가 발생했습니다.'}), 500
 
+@app.route('/api/tts/cache-stats', methods=['GET'])
+def tts_cache_stats():
+    """TTS 캐시 적중률 조회"""
+    return jsonify({'status': 'success', 'cache': tts_cache.stats()})
+
+@app.route('/api/cassette/stats', methods=['GET'])
+def cassette_stats():
+    """녹화/재생 카세트 현황 (녹화 건수, 재생 적중/대체/누락 수)"""
+    if CASSETTE_MODE == 'off':
+        return jsonify({'status': 'success', 'mode': 'off'})
+    return jsonify({'status': 'success', 'mode': CASSETTE_MODE, 'cassette': cassette_store.stats()})
+
+@app.route('/api/chat/speech', methods=['POST'])
+def chat_speech():
+    """LLM 응답을 스트리밍하면서 문장 단위로 음성을 합성하여 SSE로 전달"""
+    try:
+        data = request.get_json()
+        user_message = data.get('message', '')
+        participant_id = data.get('participant_id', None)
+        page_type = data.get('page_type', 'chat')
+        
+        if not user_message:
+            return jsonify({'error': '메시지가 없습니다.'}), 400
+        
+        logger.info("사용자 메시지(음성 파이프라인) (참여자: %s, 페이지: %s, 길이: %d)", participant_id, page_type, len(user_message))
+        logger.debug("사용자 메시지 내용: %s", Truncated(user_message), extra={'sample_rate': LOG_SAMPLE_RATE})
+        
+        session = session_store.get(participant_id, page_type)
+        context_manager.append(session, "user", user_message)
+        
+        def synthesize_sentence(index, sentence):
+            return generate_elevenlabs_audio(sentence, participant_id)
+        
+        pipeline = SpeechPipeline(synthesize_sentence, tts_executor)
+        
+        def generate():
+            tokens = []
+            audio_count = 0
+            try:
+                for event in pipeline.run(stream_chat_tokens(session)):
+                    if event[0] == 'token':
+                        tokens.append(event[1])
+                        yield format_sse({'type': 'token', 'content': event[1]})
+                    else:
+                        _, index, sentence, audio_filepath = event
+                        audio_url = audio_url_for(audio_filepath, participant_id) if audio_filepath else None
+                        if audio_url:
+                            audio_count += 1
+                        yield format_sse({'type': 'audio', 'index': index, 'text': sentence, 'audio_url': audio_url})
+            except Exception as e:
+                logger.error(f"음성 파이프라인 오류: {str(e)}")
+                yield format_sse({'type': 'error', 'response': CHAT_ERROR_MESSAGE, 'status': 'error'})
+                return
+            
+            bot_response = ''.join(tokens)
+            logger.debug("봇 응답(음성 파이프라인): %s", Truncated(bot_response), extra={'sample_rate': LOG_SAMPLE_RATE})
+            
+            save_conversation_log(user_message, bot_response, participant_id, page_type)
+            context_manager.append(session, "assistant", bot_response)
+            
+            yield format_sse({'type': 'done', 'response': bot_response, 'audio_count': audio_count, 'status': 'success'})
+        
+        return sse_response(generate())
+        
+    except Exception as e:
+        logger.error(f"서버 오류: {str(e)}")
+        return jsonify({'error': '서버 오류가 발생했습니다.'}), 500
+
+def send_audio_file(audio_filepath):
+    """오디오 파일 전송 (Range/ETag/조건부 GET 지원)"""
+    return send_file(
+        os.path.abspath(audio_filepath),
+        mimetype='audio/mpeg',
+        conditional=True,
+        etag=True,
+        max_age=AUDIO_CACHE_MAX_AGE
+    )
+
 @app.route('/api/audio/<filename>')
 def serve_audio(filename):
     """오디오 파일 제공"""
     try:
-        # 먼저 로그 디렉토리에서 찾기
-        audio_filepath = os.path.join(LOG_DIR, filename)
-        
-        # 로그 디렉토리에 없으면 사용자별 폴더에서 찾기
-        if not os.path.exists(audio_filepath):
-            # 파일명에서 사용자 ID 추출 시도 (audio_YYYYMMDD_HHMMSS.mp3 형식)
-            for user_dir in os.listdir(LOG_DIR):
-                user_path = os.path.join(LOG_DIR, user_dir)
-                if os.path.isdir(user_path):
-                    potential_path = os.path.join(user_path, filename)
-                    if os.path.exists(potential_path):
-                        audio_filepath = potential_path
-                        break
-        
-        if os.path.exists(audio_filepath):
-            return send_file(audio_filepath, mimetype='audio/mpeg')
+        # 인덱스에서 먼저 찾고, 없으면 로그 디렉토리에서 찾기
+        audio_filepath = audio_index.lookup(filename)
+        if not audio_filepath:
+            audio_filepath = safe_join(LOG_DIR, filename)
+        
+        if audio_filepath and os.path.isfile(audio_filepath):
+            return send_audio_file(audio_filepath)
+        else:
+            return jsonify({'error': '오디오 파일을 찾을 수 없습니다.'}), 404
+    except Exception as e:
+        logger.error(f"오디오 파일 제공 오류: {str(e)}")
+        return jsonify({'error': '오디오 파일 제공 중 오류가 발생했습니다.'}), 500
+
+@app.route('/api/audio/<participant_id>/<filename>')
+def serve_participant_audio(participant_id, filename):
+    """참여자별 오디오 파일 제공"""
+    try:
+        audio_filepath = safe_join(LOG_DIR, participant_id, filename)
+        
+        if audio_filepath and os.path.isfile(audio_filepath):
+            return send_audio_file(audio_filepath)
         else:
             return jsonify({'error': '오디오 파일을 찾을 수 없습니다.'}), 404
     except Exception as e:
         logger.error(f"오디오 파일 제공 오류: {str(e)}")
         return jsonify({'error': '오디오 파일 제공 중 오류가 발생했습니다.'}), 500
 
-if __name__ == '__main__':
-    # API 키 확인
-    if OPENAI_API_KEY == 'your-api-key-here':
-        logger.warning("OpenAI API 키가 설정되지 않았습니다. 환경변수 OPENAI_API_KEY를 설정하거나 app.py에서 직접 설정하세요.")
+def run_patiently(handler):
+    """이미 접수된 백그라운드 작업은 부하 차단 없이 실행 슬롯을 기다림"""
+    def run(**payload):
+        with upstream_scheduler.patient():
+            return handler(**payload)
+    return run
+
+job_queue.register('evaluate', run_patiently(run_evaluation))
+job_queue.register('cheatsheet', run_patiently(run_cheatsheet_generation))
+
+@app.before_request
+def recover_pending_jobs():
+    """첫 요청 시 재시작 전에 끝나지 않은 작업을 다시 실행"""
+    global job_queue_recovered
+    if job_queue_recovered:
+        return
+    with job_queue_recover_lock:
+        if not job_queue_recovered:
+            job_queue_recovered = True
+            job_queue.recover()
+
+def is_async_request(data):
+    """작업 큐 사용 여부 (요청 본문 async 또는 ?async=1)"""
+    return bool(data.get('async')) or request.args.get('async') in ('1', 'true')
+
+def public_job(job):
+    """클라이언트에 보낼 작업 정보"""
+    return {
+        'job_id': job['job_id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'created_at': job['created_at'],
+        'started_at': job['started_at'],
+        'finished_at': job['finished_at'],
+        'result': job['result'],
+        'status_code': job['status_code']
+    }
+
+def enqueue_job(kind, participant_id, payload):
+    """작업 큐에 등록하고 작업 ID를 바로 반환"""
+    try:
+        job = job_queue.submit(kind, participant_id, payload)
+    except JobQueueFull:
+        logger.warning(f"작업 큐가 가득 찼습니다: {kind} (참여자: {participant_id})")
+        return jsonify({'error': '요청이 많습니다. 잠시 후 다시 시도해주세요.'}), 503
     
+    logger.info(f"작업 등록됨: {kind} {job['job_id']} (참여자: {participant_id})")
+    return jsonify({
+        'status': 'queued',
+        'job_id': job['job_id'],
+        'job_status': job['status'],
+        'status_url': f"/api/jobs/{job['job_id']}",
+        'events_url': f"/api/jobs/{job['job_id']}/events"
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """작업 상태/결과 조회"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    return jsonify({'status': 'success', 'job': public_job(job)})
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def job_events(job_id):
+    """작업 상태 변화를 SSE로 전달 (완료되면 종료)"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': '작업을 찾을 수 없습니다.'}), 404
+    
+    def generate():
+        last_status = None
+        deadline = time.monotonic() + JOB_EVENTS_TIMEOUT
+        while time.monotonic() < deadline:
+            current = job_queue.get(job_id)
+            if current is None:
+                # 완료 작업 정리나 다른 워커에 의해 작업 파일이 삭제됨
+                yield format_sse({'type': 'gone', 'job_id': job_id})
+                return
+            if current['status'] != last_status:
+                last_status = current['status']
+                yield format_sse({'type': 'status', 'job': public_job(current)})
+            if job_queue.is_finished(current):
+                return
+            time.sleep(JOB_EVENTS_POLL_INTERVAL)
+        yield format_sse({'type': 'timeout', 'job_id': job_id})
+    
+    return sse_response(generate())
+
+if __name__ == '__main__':
     # 포트 설정 (환경변수에서 가져오거나 기본값 사용)
     port = int(os.getenv('FLASK_PORT', 5001))
     logger.info(f"서버가 포트 {port}에서 시작됩니다.")
@@ -0,0 +1,168 @@
+"""참여자 산출물 카탈로그 (SQLite)
+
+피드백/치트시트/대화 로그/오디오 등 산출물을 저장 시점에 기록해 두고,
+"최신 피드백", "특정 날짜의 피드백" 같은 조회를 디렉토리 탐색 대신 인덱스 조회로 처리한다.
+"""
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from blocking import run_blocking
+
+logger = logging.getLogger(__name__)
+
+DATE_PATTERN = re.compile(r"_(\d{8})(?=[_.])")
+
+# 파일명 접두사 -> 산출물 종류 (긴 접두사부터 검사)
+KIND_PREFIXES = (
+    ("medical_conversation_", "conversation_log"),
+    ("quest_analysis_", "quest_log"),
+    ("voice_analysis_", "voice_analysis"),
+    ("cheatsheet_", "cheatsheet"),
+    ("feedback_", "feedback"),
+    ("audio_", "audio"),
+    ("user_info", "user_info"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    path TEXT PRIMARY KEY,
+    participant_id TEXT,
+    kind TEXT NOT NULL,
+    artifact_date TEXT,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_lookup
+    ON artifacts (participant_id, kind, artifact_date, filename);
+"""
+
+
+def classify(filename):
+    """파일명으로 (종류, 날짜 YYYYMMDD) 판별"""
+    kind = "other"
+    for prefix, prefix_kind in KIND_PREFIXES:
+        if filename.startswith(prefix):
+            kind = prefix_kind
+            break
+    match = DATE_PATTERN.search(filename)
+    return kind, match.group(1) if match else None
+
+
+class ArtifactCatalog:
+    """root_dir/<participant_id>/ 아래 산출물을 기록하는 SQLite 카탈로그
+
+    root_dir 바로 아래 파일은 참여자 ID 없이(None) 기록한다.
+    """
+
+    def __init__(self, root_dir, db_path):
+        self.root_dir = os.path.abspath(root_dir)
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._created = not os.path.exists(db_path)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def is_new(self):
+        """카탈로그 파일을 이번에 새로 만들었는지 (기존 파일 백필 필요 여부)"""
+        return self._created
+
+    def register(self, filepath):
+        """저장된 파일을 카탈로그에 추가/갱신 (해당 파일 하나만 stat)"""
+        filepath = os.path.abspath(filepath)
+        try:
+            stat = os.stat(filepath)
+        except OSError as e:
+            logger.error(f"산출물 등록 오류: {filepath}, {str(e)}")
+            return
+        filename = os.path.basename(filepath)
+        kind, artifact_date = classify(filename)
+        self._execute(
+            "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (filepath, self._participant_of(filepath), kind, artifact_date, filename,
+             stat.st_size, stat.st_mtime))
+
+    def latest(self, participant_id, kind):
+        """파일명 기준 가장 최근 산출물 경로 (없으면 None)"""
+        while True:
+            artifacts = self._query(participant_id, kind, order="DESC", limit=1)
+            if not artifacts:
+                return None
+            path = artifacts[0]["path"]
+            if os.path.exists(path):
+                return path
+            # 카탈로그 밖에서 삭제된 파일은 정리하고 다음 항목 확인
+            self.forget(path)
+
+    def list(self, participant_id, kind=None, artifact_date=None):
+        """산출물 목록 (파일명 순, 크기/수정 시각은 마지막 등록 시점 기준)"""
+        return self._query(participant_id, kind, artifact_date)
+
+    def participants(self):
+        rows = self._fetchall(
+            "SELECT DISTINCT participant_id FROM artifacts WHERE participant_id IS NOT NULL "
+            "ORDER BY participant_id", ())
+        return [row[0] for row in rows]
+
+    def forget(self, filepath):
+        self._execute("DELETE FROM artifacts WHERE path = ?", (os.path.abspath(filepath),))
+
+    def rebuild(self):
+        """기존 파일로 카탈로그 재구성 (카탈로그가 새로 만들어졌을 때 한 번만 실행)"""
+        started = time.monotonic()
+        count = 0
+        for dirpath, dirnames, filenames in os.walk(self.root_dir):
+            # 캐시/작업 큐 등 숨김 디렉토리와 인덱스 파일은 제외
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            if dirpath != self.root_dir:
+                dirnames[:] = []
+            for filename in filenames:
+                if filename.startswith(".") or classify(filename)[0] == "other":
+                    continue
+                self.register(os.path.join(dirpath, filename))
+                count += 1
+        logger.info(f"산출물 카탈로그 재구성 완료: {count}개 파일 ({time.monotonic() - started:.2f}초)")
+        return count
+
+    def _query(self, participant_id, kind=None, artifact_date=None, order="ASC", limit=None):
+        sql = "SELECT path, participant_id, kind, artifact_date, filename, size, modified FROM artifacts WHERE "
+        if participant_id is None:
+            sql += "participant_id IS NULL"
+            params = []
+        else:
+            sql += "participant_id = ?"
+            params = [participant_id]
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        if artifact_date is not None:
+            sql += " AND artifact_date = ?"
+            params.append(artifact_date)
+        sql += f" ORDER BY filename {order}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        rows = self._fetchall(sql, params)
+
+        columns = ("path", "participant_id", "kind", "artifact_date", "filename", "size", "modified")
+        return [dict(zip(columns, row)) for row in rows]
+
+    def _execute(self, sql, params):
+        # gevent 서버에서는 쿼리가 이벤트 루프를 막지 않도록 스레드풀에서 실행
+        with self._lock:
+            run_blocking(self._conn.execute, sql, params)
+
+    def _fetchall(self, sql, params):
+        with self._lock:
+            return run_blocking(lambda: self._conn.execute(sql, params).fetchall())
+
+    def _participant_of(self, filepath):
+        parent = os.path.dirname(filepath)
+        if parent == self.root_dir:
+            return None
+        return os.path.basename(parent)
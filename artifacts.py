@@ -0,0 +1,57 @@
+"""산출물 파일 이름 생성 및 원자적 저장"""
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from metrics import FILE_IO_DURATION
+
+_stamp_lock = threading.Lock()
+_last_stamp_us = 0
+
+
+def unique_timestamp():
+    """시간순으로 정렬되는 고유 타임스탬프 (YYYYMMDD_HHMMSS_마이크로초)
+
+    같은 마이크로초에 여러 번 호출되어도 값이 겹치지 않도록 단조 증가시킨다.
+    """
+    global _last_stamp_us
+    with _stamp_lock:
+        now_us = time.time_ns() // 1000
+        if now_us <= _last_stamp_us:
+            now_us = _last_stamp_us + 1
+        _last_stamp_us = now_us
+    seconds, micros = divmod(now_us, 1_000_000)
+    return f"{datetime.fromtimestamp(seconds).strftime('%Y%m%d_%H%M%S')}_{micros:06d}"
+
+
+def new_artifact_filename(prefix, extension):
+    """산출물 파일명 생성 (예: feedback_20250101_120000_000123_p4321.json)
+
+    프로세스 ID를 붙여 여러 워커 프로세스가 동시에 써도 충돌하지 않는다.
+    """
+    return f"{prefix}_{unique_timestamp()}_p{os.getpid()}.{extension}"
+
+
+def atomic_write_bytes(filepath, content):
+    """임시 파일에 쓴 뒤 rename하여 반쯤 쓰인 파일이 보이지 않게 저장"""
+    directory = os.path.dirname(filepath) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with FILE_IO_DURATION.time("atomic_write"):
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return filepath
+
+
+def atomic_write_json(filepath, data, indent=2):
+    """JSON 데이터를 원자적으로 저장"""
+    content = json.dumps(data, ensure_ascii=False, indent=indent).encode("utf-8")
+    return atomic_write_bytes(filepath, content)
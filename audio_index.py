@@ -0,0 +1,117 @@
+"""오디오 파일명 -> 경로 인덱스 (디렉토리 탐색 없이 조회)"""
+import json
+import logging
+import os
+import threading
+import time
+
+from artifacts import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+def is_audio_filename(filename):
+    return filename.startswith("audio_") and filename.endswith(".mp3")
+
+
+class AudioIndex:
+    """메모리 딕셔너리로 조회하고, 변경분은 JSON 파일로 주기적으로 저장하는 인덱스
+
+    인덱스는 프로세스마다 따로 유지되므로, root_dir가 주어지면 인덱스에 없는 파일은
+    다른 프로세스(워커)가 저장했을 수 있는 위치(root_dir, root_dir/<참여자>/)를 확인한 뒤 등록한다.
+    """
+
+    def __init__(self, index_path, root_dir=None, save_interval=1.0):
+        self.index_path = index_path
+        self.root_dir = root_dir
+        self.save_interval = save_interval
+        self._paths = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_save = 0.0
+        self._load()
+
+    def register(self, filepath):
+        """새로 저장된 오디오 파일 등록"""
+        filename = os.path.basename(filepath)
+        with self._lock:
+            self._paths[filename] = filepath
+            self._dirty = True
+            should_save = time.monotonic() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def lookup(self, filename):
+        """파일명으로 경로 조회 (없거나 삭제된 파일이면 None)"""
+        with self._lock:
+            filepath = self._paths.get(filename)
+        if filepath and not os.path.exists(filepath):
+            with self._lock:
+                self._paths.pop(filename, None)
+                self._dirty = True
+            filepath = None
+        if filepath is None:
+            filepath = self._find_on_disk(filename)
+            if filepath:
+                self.register(filepath)
+        return filepath
+
+    def _find_on_disk(self, filename):
+        if self.root_dir is None or not is_audio_filename(filename) or os.path.basename(filename) != filename:
+            return None
+        candidate = os.path.join(self.root_dir, filename)
+        if os.path.isfile(candidate):
+            return candidate
+        try:
+            entries = list(os.scandir(self.root_dir))
+        except OSError:
+            return None
+        for entry in entries:
+            if entry.is_dir() and not entry.name.startswith("."):
+                candidate = os.path.join(entry.path, filename)
+                if os.path.isfile(candidate):
+                    return candidate
+        return None
+
+    def rebuild(self, root_dir):
+        """기존 오디오 파일로 인덱스 재구성 (인덱스 파일이 없을 때 한 번만 실행)"""
+        paths = {}
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            # 캐시 등 숨김 디렉토리는 제외
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if is_audio_filename(filename):
+                    paths[filename] = os.path.join(dirpath, filename)
+        with self._lock:
+            self._paths.update(paths)
+            self._dirty = True
+        self.save()
+        logger.info(f"오디오 인덱스 재구성 완료: {len(paths)}개 파일")
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    def save(self):
+        """변경된 인덱스를 원자적으로 파일에 기록"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = dict(self._paths)
+            self._dirty = False
+            self._last_save = time.monotonic()
+        try:
+            atomic_write_json(self.index_path, snapshot, indent=None)
+        except OSError as e:
+            logger.error(f"오디오 인덱스 저장 오류: {str(e)}")
+            with self._lock:
+                self._dirty = True
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self._paths = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"오디오 인덱스 로드 오류: {str(e)}")
+            self._paths = {}
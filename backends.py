@@ -0,0 +1,107 @@
+"""LLM/TTS 백엔드 인터페이스
+
+- openai: OpenAI ChatCompletion (api_base로 OpenAI 호환 서버 지정 가능)
+- elevenlabs: ElevenLabs text-to-speech (api_base로 호환 서버 지정 가능)
+
+부하 테스트 시에는 bench/fake_upstream.py를 실행하고
+OPENAI_API_BASE/ELEVENLABS_API_BASE를 그 주소로 지정한다.
+"""
+import logging
+
+import openai
+
+logger = logging.getLogger(__name__)
+
+ELEVENLABS_API_BASE = "https://api.elevenlabs.io/v1"
+
+
+class ChatBackend:
+    """ChatCompletion 호출 백엔드 공통 인터페이스"""
+
+    name = None
+
+    def create(self, **kwargs):
+        """openai.ChatCompletion.create와 같은 인자/응답 형식 (stream=True면 청크 제너레이터)"""
+        raise NotImplementedError
+
+
+class OpenAIChatBackend(ChatBackend):
+    name = "openai"
+
+    def __init__(self, api_key, api_base=None):
+        self.api_key = api_key
+        self.api_base = api_base
+
+    def create(self, **kwargs):
+        # 전역 openai 설정 대신 요청마다 키/주소를 지정
+        if self.api_base:
+            kwargs.setdefault("api_base", self.api_base)
+        return openai.ChatCompletion.create(api_key=self.api_key, **kwargs)
+
+
+class SpeechBackend:
+    """음성 합성 백엔드 공통 인터페이스"""
+
+    name = None
+
+    def cache_params(self):
+        """TTS 캐시 키에 포함할 음성 설정"""
+        raise NotImplementedError
+
+    def synthesize(self, text):
+        """MP3 바이트 반환 (실패 시 예외)"""
+        raise NotImplementedError
+
+
+class ElevenLabsSpeechBackend(SpeechBackend):
+    name = "elevenlabs"
+
+    def __init__(self, client, api_key, voice_id, model_id, voice_settings, api_base=None):
+        self.client = client
+        self.api_key = api_key
+        self.voice_id = voice_id
+        self.model_id = model_id
+        self.voice_settings = voice_settings
+        self.api_base = (api_base or ELEVENLABS_API_BASE).rstrip("/")
+
+    def cache_params(self):
+        return self.voice_id, self.model_id, self.voice_settings
+
+    def synthesize(self, text):
+        url = f"{self.api_base}/text-to-speech/{self.voice_id}"
+        headers = {
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key or ""
+        }
+        data = {
+            "text": text,
+            "model_id": self.model_id,
+            "voice_settings": self.voice_settings
+        }
+        return self.client.post(url, json=data, headers=headers).content
+
+
+def create_chat_backend(backend, **options):
+    """설정 이름으로 LLM 백엔드 생성"""
+    if backend == "openai":
+        if not options.get("api_key"):
+            logger.warning("OPENAI_API_KEY 환경변수가 설정되지 않았습니다. LLM 호출은 실패합니다.")
+        return OpenAIChatBackend(options.get("api_key"), options.get("api_base"))
+    raise ValueError(f"알 수 없는 LLM 백엔드: {backend}")
+
+
+def create_speech_backend(backend, client, **options):
+    """설정 이름으로 TTS 백엔드 생성"""
+    if backend == "elevenlabs":
+        if not options.get("api_key"):
+            logger.warning("ELEVENLABS_API_KEY 환경변수가 설정되지 않았습니다. 음성 합성은 실패합니다.")
+        return ElevenLabsSpeechBackend(
+            client,
+            options.get("api_key"),
+            options["voice_id"],
+            options["model_id"],
+            options["voice_settings"],
+            api_base=options.get("api_base")
+        )
+    raise ValueError(f"알 수 없는 TTS 백엔드: {backend}")
@@ -0,0 +1,247 @@
+"""부하 테스트용 OpenAI/ElevenLabs 대역 서버
+
+실제 API 대신 지연 시간과 토큰 생성 속도를 흉내 내는 응답을 돌려준다.
+- POST /v1/chat/completions            (stream=true면 SSE 청크)
+- POST /v1/text-to-speech/<voice_id>   (텍스트 길이에 비례한 가짜 MP3 바이트)
+
+JSON 응답을 요구하는 프롬프트(평가, 퀘스트/음성 분석, 치트시트)에는
+프롬프트에 포함된 응답 형식 예시 JSON을 그대로 돌려준다
+(response_format이 json_object면 코드 블록 없이 JSON만).
+usage에는 OpenAI 프롬프트 캐시를 흉내 낸 cached_tokens를 포함한다
+(이전에 본 system 메시지가 1024토큰 이상이면 128토큰 단위로 캐시된 것으로 계산).
+stream_options.include_usage가 있으면 스트림 마지막에 usage 청크를 보낸다.
+
+실행: python bench/fake_upstream.py [--port 8900] [--profile realistic]
+앱 실행 시 환경변수:
+    OPENAI_API_BASE=http://localhost:8900/v1
+    ELEVENLABS_API_BASE=http://localhost:8900/v1
+"""
+import argparse
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger("fake_upstream")
+
+# 지연 프로파일 (ms 단위, tokens_per_sec는 생성 속도)
+PROFILES = {
+    "fast": {"ttft_ms": 30, "jitter_ms": 10, "tokens_per_sec": 1000, "tts_ms": 20, "tts_ms_per_char": 0.2},
+    "realistic": {"ttft_ms": 600, "jitter_ms": 250, "tokens_per_sec": 60, "tts_ms": 400, "tts_ms_per_char": 8},
+    "slow": {"ttft_ms": 2000, "jitter_ms": 800, "tokens_per_sec": 20, "tts_ms": 1500, "tts_ms_per_char": 20},
+}
+
+CHAT_REPLIES = (
+    "네, 말씀 잘 들었습니다. 언제부터 그런 증상이 있으셨나요? 통증이 어느 정도인지도 알려주세요.",
+    "그렇군요. 지금 복용 중인 약이나 알레르기가 있으신가요? 진찰을 위해 몇 가지 더 여쭤보겠습니다.",
+    "검사 결과를 보면 큰 이상은 없어 보입니다. 처방해 드리는 약은 하루 세 번 식후에 드세요.",
+    "증상이 심해지거나 열이 나면 바로 다시 오세요. 일주일 뒤에 경과를 보겠습니다.",
+)
+# 한국어 기준 토큰 하나를 약 2글자로 보고 스트리밍 청크를 나눔
+CHARS_PER_TOKEN = 2
+JSON_FENCE = re.compile(r"```json\s*(.*?)\s*```", re.DOTALL)
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_INCREMENT = 128
+
+
+def example_json(prompt):
+    """프롬프트의 응답 형식 예시 JSON (```json 블록 우선, 없으면 마지막 최상위 객체)"""
+    decoder = json.JSONDecoder()
+    for block in JSON_FENCE.findall(prompt):
+        try:
+            return decoder.decode(block)
+        except json.JSONDecodeError:
+            continue
+    found = None
+    index = prompt.find("{")
+    while index != -1:
+        try:
+            found, end = decoder.raw_decode(prompt, index)
+        except json.JSONDecodeError:
+            end = index + 1
+        index = prompt.find("{", end)
+    return found
+
+
+class UpstreamProfile:
+    """지연 시간/오류율 설정"""
+
+    def __init__(self, ttft_ms, jitter_ms, tokens_per_sec, tts_ms, tts_ms_per_char, error_rate=0.0):
+        self.ttft_ms = ttft_ms
+        self.jitter_ms = jitter_ms
+        self.tokens_per_sec = tokens_per_sec
+        self.tts_ms = tts_ms
+        self.tts_ms_per_char = tts_ms_per_char
+        self.error_rate = error_rate
+
+    def first_token_delay(self):
+        return max(0.0, random.gauss(self.ttft_ms, self.jitter_ms)) / 1000
+
+    def token_delay(self):
+        return 1.0 / self.tokens_per_sec
+
+    def tts_delay(self, text):
+        return max(0.0, random.gauss(self.tts_ms, self.jitter_ms) + self.tts_ms_per_char * len(text)) / 1000
+
+    def should_fail(self):
+        return random.random() < self.error_rate
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    profile = None
+    _reply_index = 0
+    _cached_prefixes = set()
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            return self._send_json(400, {"error": {"message": "invalid JSON body"}})
+
+        if self.profile.should_fail():
+            return self._send_json(503, {"error": {"message": "fake upstream overloaded", "type": "server_error"}})
+        if self.path.rstrip("/").endswith("/chat/completions"):
+            return self._chat_completion(body)
+        if "/text-to-speech/" in self.path:
+            return self._text_to_speech(body)
+        self._send_json(404, {"error": {"message": f"unknown path: {self.path}"}})
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+    def _chat_completion(self, body):
+        messages = body.get("messages") or []
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        content = self._reply_for(messages, json_mode)
+        tokens = [content[i:i + CHARS_PER_TOKEN] for i in range(0, len(content), CHARS_PER_TOKEN)]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "fake")
+        usage = self._usage(messages, len(tokens))
+        time.sleep(self.profile.first_token_delay())
+
+        if not body.get("stream"):
+            time.sleep(self.profile.token_delay() * len(tokens))
+            return self._send_json(200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for index, token in enumerate(tokens):
+            if index:
+                time.sleep(self.profile.token_delay())
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]}
+            self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+        if (body.get("stream_options") or {}).get("include_usage"):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "model": model,
+                     "choices": [], "usage": usage}
+            self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+        self._write_chunk("data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _usage(self, messages, completion_tokens):
+        prompt_tokens = sum(len(message.get("content") or "") for message in messages) // CHARS_PER_TOKEN
+        cached_tokens = 0
+        if messages and messages[0].get("role") == "system":
+            prefix = messages[0].get("content") or ""
+            prefix_tokens = len(prefix) // CHARS_PER_TOKEN
+            with self._lock:
+                seen = prefix in FakeUpstreamHandler._cached_prefixes
+                FakeUpstreamHandler._cached_prefixes.add(prefix)
+            if seen and prefix_tokens >= PROMPT_CACHE_MIN_TOKENS:
+                cached_tokens = prefix_tokens // PROMPT_CACHE_INCREMENT * PROMPT_CACHE_INCREMENT
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+
+    def _reply_for(self, messages, json_mode):
+        # 응답 형식 예시는 고정 지시문(system 메시지)에 있으므로 앞쪽 메시지부터 찾음
+        example = None
+        for message in messages:
+            example = example_json(message.get("content") or "")
+            if isinstance(example, dict):
+                break
+        if isinstance(example, dict):
+            if json_mode:
+                return json.dumps(example, ensure_ascii=False)
+            return "```json\n" + json.dumps(example, ensure_ascii=False, indent=2) + "\n```"
+        with self._lock:
+            FakeUpstreamHandler._reply_index += 1
+            return CHAT_REPLIES[FakeUpstreamHandler._reply_index % len(CHAT_REPLIES)]
+
+    def _text_to_speech(self, body):
+        text = body.get("text", "")
+        time.sleep(self.profile.tts_delay(text))
+        # 실제 MP3(약 16KB/초, 초당 약 5글자)와 비슷한 크기의 더미 데이터
+        audio = b"ID3" + b"\x00" * (3200 * max(1, len(text)))
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/mpeg")
+        self.send_header("Content-Length", str(len(audio)))
+        self.end_headers()
+        self.wfile.write(audio)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _write_chunk(self, text):
+        data = text.encode("utf-8")
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+def create_server(host, port, profile):
+    handler = type("ConfiguredHandler", (FakeUpstreamHandler,), {"profile": profile})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="부하 테스트용 OpenAI/ElevenLabs 대역 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="realistic", help="지연 프로파일 (기본: realistic)")
+    parser.add_argument("--ttft-ms", type=float, help="첫 토큰까지 평균 지연 (프로파일 값 덮어쓰기)")
+    parser.add_argument("--tokens-per-sec", type=float, help="토큰 생성 속도")
+    parser.add_argument("--tts-ms", type=float, help="TTS 기본 지연")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="503 응답 비율 (0~1)")
+    args = parser.parse_args()
+
+    settings = dict(PROFILES[args.profile])
+    for key in ("ttft_ms", "tokens_per_sec", "tts_ms"):
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    profile = UpstreamProfile(error_rate=args.error_rate, **settings)
+
+    logging.basicConfig(level=logging.INFO)
+    server = create_server(args.host, args.port, profile)
+    logger.info(f"대역 서버 시작: http://{args.host}:{args.port}/v1 (프로파일: {args.profile}, {settings}, 오류율: {args.error_rate})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+"""참여자 흐름 재생 부하 테스트
+
+가상 참여자마다 실제 사용 순서대로 API를 호출한다.
+    save-user-data → (chat → analyze-quest → tts) × 턴 수 → evaluate → analyze-voice → generate-cheatsheet
+동시 실행 수를 지정해 여러 참여자를 병렬로 재생하고, 엔드포인트별 처리량과
+p50/p95/p99 지연 시간을 출력한다. --output으로 결과를 JSON으로 남기면
+--baseline으로 이전 결과와 비교할 수 있다.
+
+실행 예:
+    python bench/fake_upstream.py --profile realistic &
+    OPENAI_API_BASE=http://localhost:8900/v1 ELEVENLABS_API_BASE=http://localhost:8900/v1 python serve.py &
+    python bench/run_benchmark.py --participants 50 --concurrency 20
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm_metrics import percentile  # noqa: E402
+
+REPORT_PERCENTILES = (50, 95, 99)
+
+PATIENT_MESSAGES = (
+    "안녕하세요. 어제부터 머리 뒤쪽이 지끈거리면서 아파요.",
+    "통증은 10점 만점에 7점 정도이고, 오후가 되면 더 심해져요.",
+    "지금은 타이레놀을 하루에 두 번 먹고 있고, 페니실린 알레르기가 있어요.",
+    "혹시 약을 먹으면 부작용이 있나요? 다음에는 언제 와야 하나요?",
+    "증상이 더 심해지면 바로 다시 와야 하나요?",
+)
+
+ACTIVE_QUESTS = [
+    {"id": "symptom_location", "title": "증상 위치 설명", "keywords": ["머리", "배", "목", "허리"]},
+    {"id": "symptom_timing", "title": "증상 시작 시기", "keywords": ["어제부터", "일주일", "아침부터"]},
+    {"id": "current_medication", "title": "복용 약물", "keywords": ["먹고 있", "복용", "타이레놀"]},
+    {"id": "allergy_info", "title": "알레르기 정보", "keywords": ["알레르기"]},
+    {"id": "ask_question", "title": "질문하기", "keywords": ["나요?", "까요?"]},
+]
+
+
+class ResultCollector:
+    """엔드포인트별 지연 시간/상태 코드 수집"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.flows_completed = 0
+        self.flows_failed = 0
+
+    def add(self, endpoint, elapsed_ms, ok):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(elapsed_ms)
+            if not ok:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def finish_flow(self, ok):
+        with self._lock:
+            if ok:
+                self.flows_completed += 1
+            else:
+                self.flows_failed += 1
+
+    def report(self, duration):
+        endpoints = {}
+        total = 0
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            total += len(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors.get(endpoint, 0),
+                "throughput_rps": round(len(values) / duration, 2),
+                **{f"p{pct}_ms": round(percentile(values, pct), 1) for pct in REPORT_PERCENTILES}
+            }
+        return {
+            "duration_sec": round(duration, 2),
+            "requests": total,
+            "throughput_rps": round(total / duration, 2),
+            "flows_completed": self.flows_completed,
+            "flows_failed": self.flows_failed,
+            "endpoints": endpoints
+        }
+
+
+class ParticipantFlow:
+    """가상 참여자 한 명의 진료 연습 흐름"""
+
+    def __init__(self, base_url, collector, turns, chat_mode, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.collector = collector
+        self.turns = turns
+        self.chat_mode = chat_mode
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.participant_id = f"bench_{uuid.uuid4().hex[:10]}"
+
+    def run(self):
+        try:
+            self._post("save-user-data", "/api/save-user-data", {
+                "participantId": self.participant_id,
+                "symptoms": "두통",
+                "consent": True,
+                "loginTime": time.strftime("%Y-%m-%dT%H:%M:%S")
+            })
+            logs = []
+            for turn in range(self.turns):
+                user_message = PATIENT_MESSAGES[turn % len(PATIENT_MESSAGES)]
+                bot_response = self._chat(user_message)
+                logs.append({"user_message": user_message, "bot_response": bot_response})
+                self._post("analyze-quest", "/api/analyze-quest", {
+                    "user_message": user_message,
+                    "bot_response": bot_response,
+                    "active_quests": ACTIVE_QUESTS,
+                    "participant_id": self.participant_id
+                })
+                self._post("tts", "/api/tts", {"text": bot_response, "participant_id": self.participant_id})
+            self._post("evaluate", "/api/evaluate", {"logs": logs, "participant_id": self.participant_id})
+            self._post("analyze-voice", "/api/analyze-voice", {
+                "messages": [log["user_message"] for log in logs],
+                "participant_id": self.participant_id
+            })
+            self._post("generate-cheatsheet", "/api/generate-cheatsheet", {"participant_id": self.participant_id})
+        except (requests.RequestException, FlowError, ValueError):
+            # ValueError: 잘리거나 깨진 SSE 라인/JSON 응답도 실패한 흐름으로 집계
+            self.collector.finish_flow(False)
+            return
+        finally:
+            self.session.close()
+        self.collector.finish_flow(True)
+
+    def _chat(self, message):
+        payload = {"message": message, "participant_id": self.participant_id, "page_type": "chat"}
+        if self.chat_mode == "sync":
+            return self._post("chat", "/api/chat", payload).get("response", "")
+
+        # 스트리밍: 전체 응답 시간과 별도로 첫 토큰까지의 시간도 기록
+        started = time.perf_counter()
+        ok = False
+        response_text = ""
+        try:
+            with self.session.post(f"{self.base_url}/api/chat/stream", json=payload, stream=True,
+                                   timeout=self.timeout) as response:
+                first_token = False
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data: "):
+                        continue
+                    event = json.loads(line[len("data: "):])
+                    if event.get("type") == "token" and not first_token:
+                        first_token = True
+                        self.collector.add("chat-stream (ttft)", (time.perf_counter() - started) * 1000, True)
+                    elif event.get("type") == "done":
+                        response_text = event.get("response", "")
+                        ok = True
+        finally:
+            self.collector.add("chat-stream", (time.perf_counter() - started) * 1000, ok)
+        if not ok:
+            raise FlowError("chat-stream")
+        return response_text
+
+    def _post(self, endpoint, path, payload):
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=self.timeout)
+            ok = response.status_code < 400
+        finally:
+            self.collector.add(endpoint, (time.perf_counter() - started) * 1000, ok)
+        if not ok:
+            raise FlowError(f"{endpoint}: {response.status_code}")
+        return response.json()
+
+
+class FlowError(Exception):
+    """흐름 중간 단계 실패 (이후 단계는 진행하지 않음)"""
+
+
+def print_report(report, baseline=None):
+    print(f"\n총 {report['requests']}건, {report['duration_sec']}초, {report['throughput_rps']} req/s "
+          f"(흐름 완료 {report['flows_completed']}, 실패 {report['flows_failed']})")
+    header = f"{'endpoint':<22}{'reqs':>7}{'errs':>6}{'rps':>9}" + "".join(f"{f'p{pct}(ms)':>11}" for pct in REPORT_PERCENTILES)
+    print(header)
+    print("-" * len(header))
+    for endpoint, stats in report["endpoints"].items():
+        line = f"{endpoint:<22}{stats['requests']:>7}{stats['errors']:>6}{stats['throughput_rps']:>9}"
+        line += "".join(f"{stats[f'p{pct}_ms']:>11}" for pct in REPORT_PERCENTILES)
+        previous = (baseline or {}).get("endpoints", {}).get(endpoint)
+        if previous and previous.get("p95_ms"):
+            line += f"   p95 {(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.1f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="참여자 흐름 재생 부하 테스트")
+    parser.add_argument("--base-url", default="http://localhost:5001", help="앱 서버 주소 (기본: http://localhost:5001)")
+    parser.add_argument("--participants", type=int, default=20, help="재생할 가상 참여자 수")
+    parser.add_argument("--concurrency", type=int, default=10, help="동시에 진행할 참여자 수")
+    parser.add_argument("--turns", type=int, default=3, help="참여자당 대화 턴 수")
+    parser.add_argument("--chat-mode", choices=("sync", "stream"), default="sync", help="/api/chat 또는 /api/chat/stream")
+    parser.add_argument("--timeout", type=float, default=120, help="요청 타임아웃 (초)")
+    parser.add_argument("--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON (p95 변화율 표시)")
+    args = parser.parse_args()
+
+    collector = ResultCollector()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.participants):
+            flow = ParticipantFlow(args.base_url, collector, args.turns, args.chat_mode, args.timeout)
+            executor.submit(flow.run)
+    report = collector.report(time.perf_counter() - started)
+    report["config"] = {key: getattr(args, key) for key in ("participants", "concurrency", "turns", "chat_mode")}
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if report["flows_failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""블로킹 디스크 작업(SQLite 쿼리, fsync)을 gevent 이벤트 루프 밖에서 실행
+
+serve.py는 gevent로 표준 라이브러리를 패치해 모든 요청을 한 OS 스레드의 코루틴으로 처리한다.
+sqlite3와 os.fsync는 패치되지 않아, 실행되는 동안 허브가 멈추고 모든 연결이 함께 기다린다.
+패치된 환경에서는 gevent 허브의 스레드풀(실제 OS 스레드)에서 실행하고 현재 코루틴만 결과를 기다린다.
+스레드 서버(python app.py)에서는 그대로 호출한다.
+
+func 안에서는 threading 잠금을 잡지 않는다 (패치된 잠금은 허브 밖 OS 스레드에서 쓸 수 없음).
+잠금은 호출하는 쪽에서 잡고, run_blocking에는 SQLite/파일 작업만 넘긴다.
+"""
+import sys
+
+
+def _gevent_patched():
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+def _capture(func, args, kwargs):
+    # 예외는 호출한 코루틴에서 다시 발생시킴 (스레드풀에서 발생하면 gevent가 따로 stderr에 출력함)
+    try:
+        return True, func(*args, **kwargs)
+    except BaseException as e:
+        return False, e
+
+
+def run_blocking(func, *args, **kwargs):
+    """func(*args, **kwargs) 결과 반환 (gevent 환경이면 허브 스레드풀에서 실행)"""
+    if not _gevent_patched():
+        return func(*args, **kwargs)
+    import gevent
+    ok, result = gevent.get_hub().threadpool.apply(_capture, (func, args, kwargs))
+    if not ok:
+        raise result
+    return result
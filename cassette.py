@@ -0,0 +1,230 @@
+"""외부 API 응답 녹화/재생 (카세트)
+
+record 모드에서는 LLM/TTS 백엔드 호출마다 요청 해시, 응답, 관측 지연 시간을
+SQLite 파일 하나에 기록하고, replay 모드에서는 실제 API 대신 기록된 응답을 돌려준다.
+재생 지연은 latency_scale로 조절한다 (1.0: 녹화 당시 속도, 0: 지연 없음).
+업스트림 편차를 없애고 서버 자체 오버헤드(JSON 파싱, 파일 I/O, 로깅)만 측정할 때 사용한다.
+
+같은 요청이 여러 번 기록된 경우 재생 시 기록된 순서대로 돌려주고,
+기록보다 많이 호출되면 마지막 응답을 반복한다.
+동시 실행에서는 응답 순서가 달라져 이후 프롬프트(대화 기록 등)도 달라지므로,
+정확히 일치하는 기록이 없으면 같은 종류의 호출(모델/시스템 프롬프트/스트리밍 여부가 같은 호출)
+기록을 돌아가며 재생한다. strict=True면 이 대체 재생 없이 CassetteMissError를 낸다.
+"""
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from openai.util import convert_to_openai_object
+
+from backends import ChatBackend, SpeechBackend
+from blocking import run_blocking
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("off", "record", "replay")
+
+# 요청 해시에서 제외할 값 (실행마다 달라지는 시각 등)
+VOLATILE_PATTERN = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?"  # ISO 시각
+    r"|\d{4}-\d{2}-\d{2}_\d{2}-\d{2}-\d{2}"  # 세션 ID
+    r"|\d{8}_\d{6}(?:_\d+)?(?:_p\d+)?"  # 산출물 파일명
+)
+# 해시에 포함하지 않는 호출 옵션 (응답 내용과 무관)
+IGNORED_PARAMS = ("request_timeout", "api_key", "api_base")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exchanges (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    request_hash TEXT NOT NULL,
+    route_hash TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    request TEXT NOT NULL,
+    response BLOB NOT NULL,
+    elapsed_ms REAL NOT NULL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_exchanges_hash ON exchanges (request_hash, id);
+CREATE INDEX IF NOT EXISTS idx_exchanges_route ON exchanges (route_hash, id);
+"""
+
+
+class CassetteMissError(Exception):
+    """replay 모드에서 기록되지 않은 요청"""
+
+
+def request_hash(kind, params):
+    """요청 파라미터의 정규화 해시 (시각 등 실행마다 달라지는 값은 제외)"""
+    params = {key: value for key, value in params.items() if key not in IGNORED_PARAMS}
+    payload = json.dumps({"kind": kind, "params": params}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(VOLATILE_PATTERN.sub("<ts>", payload).encode("utf-8")).hexdigest()
+
+
+class CassetteStore:
+    """녹화된 요청/응답 저장소 (응답 본문은 zlib 압축)"""
+
+    def __init__(self, db_path, strict=False):
+        self.db_path = db_path
+        self.strict = strict
+        self.exact_hits = 0
+        self.fallback_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._cursors = {}  # request_hash/route_hash -> 다음에 재생할 순번
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def record(self, key, route, kind, request, response, elapsed_ms):
+        summary = json.dumps(request, ensure_ascii=False, sort_keys=True)
+        with self._lock:
+            run_blocking(
+                self._conn.execute,
+                "INSERT INTO exchanges (request_hash, route_hash, kind, request, response, elapsed_ms, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, route, kind, summary, zlib.compress(response), elapsed_ms, time.time()))
+
+    def next_response(self, key, route):
+        """(응답 바이트, 관측 지연 ms). 재생할 기록이 없으면 CassetteMissError"""
+        with self._lock:
+            row = run_blocking(self._next_row, "request_hash", key, cycle=False)
+            if row is not None:
+                self.exact_hits += 1
+            elif not self.strict:
+                row = run_blocking(self._next_row, "route_hash", route, cycle=True)
+                if row is not None:
+                    self.fallback_hits += 1
+            if row is None:
+                self.misses += 1
+        if row is None:
+            raise CassetteMissError(f"녹화되지 않은 요청입니다: {key[:12]}")
+        return zlib.decompress(row[0]), row[1]
+
+    def _next_row(self, column, value, cycle):
+        # cycle=False: 기록 순서대로, 다 쓰면 마지막 기록 반복 / cycle=True: 처음부터 다시
+        index = self._cursors.get(value, 0)
+        sql = f"SELECT response, elapsed_ms FROM exchanges WHERE {column} = ? ORDER BY id LIMIT 1 OFFSET ?"
+        row = self._conn.execute(sql, (value, index)).fetchone()
+        if row is None and index:
+            if cycle:
+                index = 0
+                row = self._conn.execute(sql, (value, 0)).fetchone()
+            else:
+                return self._conn.execute(
+                    f"SELECT response, elapsed_ms FROM exchanges WHERE {column} = ? ORDER BY id DESC LIMIT 1",
+                    (value,)).fetchone()
+        if row is not None:
+            self._cursors[value] = index + 1
+        return row
+
+    def stats(self):
+        with self._lock:
+            rows = run_blocking(lambda: self._conn.execute(
+                "SELECT kind, COUNT(*), COUNT(DISTINCT request_hash), SUM(LENGTH(response)) "
+                "FROM exchanges GROUP BY kind").fetchall())
+            replay = {"exact_hits": self.exact_hits, "fallback_hits": self.fallback_hits, "misses": self.misses}
+        return {
+            "recorded": {kind: {"exchanges": count, "unique_requests": unique, "stored_bytes": size}
+                         for kind, count, unique, size in rows},
+            "replay": replay
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CassetteChatBackend(ChatBackend):
+    """ChatBackend 녹화/재생 래퍼 (스트리밍은 청크별 도착 시각까지 기록)"""
+
+    def __init__(self, inner, store, mode, latency_scale=1.0):
+        self.inner = inner
+        self.store = store
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.name = f"{inner.name}+cassette"
+
+    def create(self, **kwargs):
+        key = request_hash("chat", kwargs)
+        route = self._route(kwargs)
+        if self.mode == "replay":
+            return self._replay(key, route, kwargs.get("stream"))
+        started = time.perf_counter()
+        response = self.inner.create(**kwargs)
+        if kwargs.get("stream"):
+            return self._record_stream(key, route, kwargs, response, started)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self._record(key, route, kwargs, {"response": response}, elapsed_ms)
+        return response
+
+    @staticmethod
+    def _route(kwargs):
+        messages = kwargs.get("messages") or [{}]
+        system = messages[0].get("content") if messages[0].get("role") == "system" else None
+        return request_hash("chat_route", {"model": kwargs.get("model"), "stream": bool(kwargs.get("stream")),
+                                           "system": system})
+
+    def _record_stream(self, key, route, kwargs, response, started):
+        chunks = []
+        offsets = []
+        for chunk in response:
+            offsets.append(round((time.perf_counter() - started) * 1000, 1))
+            chunks.append(chunk)
+            yield chunk
+        # 끝까지 받은 스트림만 기록 (중간에 끊긴 응답은 재생하지 않음)
+        self._record(key, route, kwargs, {"chunks": chunks, "offsets": offsets}, offsets[-1] if offsets else 0.0)
+
+    def _record(self, key, route, kwargs, payload, elapsed_ms):
+        request = {"model": kwargs.get("model"), "stream": bool(kwargs.get("stream")),
+                   "messages": len(kwargs.get("messages", []))}
+        self.store.record(key, route, "chat", request, json.dumps(payload, ensure_ascii=False).encode("utf-8"), elapsed_ms)
+
+    def _replay(self, key, route, stream):
+        body, elapsed_ms = self.store.next_response(key, route)
+        payload = json.loads(body)
+        if not stream:
+            time.sleep(elapsed_ms * self.latency_scale / 1000)
+            return convert_to_openai_object(payload["response"])
+        return self._replay_stream(payload)
+
+    def _replay_stream(self, payload):
+        previous = 0.0
+        for chunk, offset in zip(payload["chunks"], payload["offsets"]):
+            time.sleep(max(0.0, offset - previous) * self.latency_scale / 1000)
+            previous = offset
+            yield convert_to_openai_object(chunk)
+
+
+class CassetteSpeechBackend(SpeechBackend):
+    """SpeechBackend 녹화/재생 래퍼"""
+
+    def __init__(self, inner, store, mode, latency_scale=1.0):
+        self.inner = inner
+        self.store = store
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self.name = f"{inner.name}+cassette"
+
+    def cache_params(self):
+        return self.inner.cache_params()
+
+    def synthesize(self, text):
+        voice = list(self.inner.cache_params())
+        key = request_hash("tts", {"text": text, "voice": voice})
+        route = request_hash("tts_route", {"voice": voice})
+        if self.mode == "replay":
+            audio, elapsed_ms = self.store.next_response(key, route)
+            time.sleep(elapsed_ms * self.latency_scale / 1000)
+            return audio
+
+        started = time.perf_counter()
+        audio = self.inner.synthesize(text)
+        self.store.record(key, route, "tts", {"chars": len(text)}, audio,
+                          (time.perf_counter() - started) * 1000)
+        return audio
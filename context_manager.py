@@ -0,0 +1,117 @@
+"""토큰 예산 기반 대화 문맥 관리 (오래된 대화는 요약으로 압축)"""
+import logging
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except ImportError:
+    _encoding = None
+
+
+def estimate_tokens(text):
+    """토큰 수 추정 (tiktoken이 없으면 UTF-8 바이트 기준 근사치)"""
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    # 한글은 글자당 3바이트, 대략 1토큰 내외
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def message_tokens(message):
+    # 메시지마다 역할/구분자에 드는 토큰 포함
+    return estimate_tokens(message["content"]) + 4
+
+
+class ContextManager:
+    """세션 대화가 토큰 예산을 넘으면 오래된 턴을 떼어 백그라운드에서 요약
+
+    summarize(previous_summary, messages)는 새 요약 문자열을 반환한다.
+    요약이 끝나기 전까지는 떼어 낸 메시지를 원문 그대로 프롬프트에 포함하므로
+    요약 중에도 정보가 빠지지 않는다.
+    요약이 계속 실패해 요약 대기 메시지가 max_pending_tokens를 넘으면
+    가장 오래된 메시지부터 버린다 (기본값: history_token_budget의 2배).
+    """
+
+    def __init__(self, summarize, executor, history_token_budget=1200, min_recent_messages=4,
+                 max_pending_tokens=None):
+        self.summarize = summarize
+        self.executor = executor
+        self.history_token_budget = history_token_budget
+        self.min_recent_messages = min_recent_messages
+        self.max_pending_tokens = max_pending_tokens or history_token_budget * 2
+
+    def append(self, session, role, content):
+        """세션에 메시지 추가 후 예산을 넘거나 버퍼에서 밀려난 메시지를 요약 대상으로 전달"""
+        evicted = session.append(role, content)
+        overflow = [evicted] if evicted else []
+        overflow.extend(self._take_overflow(session))
+        if overflow:
+            self._schedule(session, overflow)
+
+    def build_messages(self, system_prompt, session):
+        """시스템 프롬프트 + 요약 + 최근 대화로 요청 메시지 구성"""
+        # 요약 완료 직후 등 중간 상태가 섞이지 않도록 한 번의 잠금으로 함께 읽음
+        summary, pending, recent = session.context_snapshot()
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary:
+            messages.append({"role": "system", "content": f"이전 진료 대화 요약:\n{summary}"})
+        messages.extend(pending)
+        messages.extend(recent)
+        return messages
+
+    def _take_overflow(self, session):
+        with session.lock:
+            total = sum(message_tokens(message) for message in session.messages)
+            overflow = []
+            while total > self.history_token_budget and len(session.messages) > self.min_recent_messages:
+                message = session.messages.popleft()
+                total -= message_tokens(message)
+                overflow.append(message)
+            return overflow
+
+    def _schedule(self, session, messages):
+        with session.lock:
+            session.pending_compaction.extend(messages)
+            self._trim_pending(session)
+            if session.summarizing:
+                return
+            session.summarizing = True
+        self.executor.submit(self._run_summary, session)
+
+    def _trim_pending(self, session):
+        # 잠금은 호출자가 보유
+        pending = session.pending_compaction
+        total = sum(message_tokens(message) for message in pending)
+        dropped = 0
+        while total > self.max_pending_tokens and pending:
+            total -= message_tokens(pending.pop(0))
+            dropped += 1
+        if dropped:
+            logger.warning(f"요약 대기 메시지가 한도를 넘어 {dropped}개를 버림: {session.key}")
+
+    def _run_summary(self, session):
+        while True:
+            with session.lock:
+                batch = list(session.pending_compaction)
+                previous = session.summary
+                if not batch:
+                    session.summarizing = False
+                    return
+            try:
+                summary = self.summarize(previous, batch)
+            except Exception as e:
+                # 실패하면 원문을 유지하고 다음 압축 때 다시 시도
+                logger.error(f"대화 요약 오류: {str(e)}")
+                with session.lock:
+                    self._trim_pending(session)
+                    session.summarizing = False
+                return
+            with session.lock:
+                session.summary = summary
+                # 요약 중 한도 초과로 앞부분이 잘렸을 수 있으므로 위치가 아닌 객체로 제거
+                summarized = {id(message) for message in batch}
+                session.pending_compaction = [
+                    message for message in session.pending_compaction if id(message) not in summarized
+                ]
+            logger.info(f"대화 요약 갱신: {session.key} ({len(batch)}개 메시지 압축)")
@@ -0,0 +1,164 @@
+"""대화 로그 저장 (append-only JSONL + 백그라운드 배치 기록)"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+
+from blocking import run_blocking
+from metrics import FILE_IO_DURATION
+
+logger = logging.getLogger(__name__)
+
+LEGACY_EXTENSION = ".json"
+JSONL_EXTENSION = ".jsonl"
+
+
+class ConversationLogWriter:
+    """대화 로그 항목을 큐에 모았다가 파일별로 한 번에 추가 기록하는 writer
+
+    요청 스레드는 큐에 넣기만 하고, 백그라운드 스레드가 flush_interval 동안
+    모인 항목을 파일별로 묶어 append + fsync 한다.
+    """
+
+    def __init__(self, flush_interval=0.2, max_batch=200, on_written=None):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        # 파일 기록 후 호출할 콜백 (writer 스레드에서 filepath를 인자로 호출)
+        self.on_written = on_written
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def append(self, filepath, entry):
+        """로그 항목 기록 예약"""
+        self._ensure_started()
+        self._queue.put((filepath, entry))
+
+    def flush(self, timeout=5.0):
+        """지금까지 예약된 항목이 모두 디스크에 기록될 때까지 대기"""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put((None, done))
+        return done.wait(timeout)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="conversation-log-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            # flush 요청이 들어오면 기다리지 않고 바로 기록
+            while len(batch) < self.max_batch and batch[-1][0] is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        grouped = {}
+        waiters = []
+        for filepath, item in batch:
+            if filepath is None:
+                waiters.append(item)
+            else:
+                grouped.setdefault(filepath, []).append(item)
+
+        for filepath, entries in grouped.items():
+            try:
+                lines = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+                with FILE_IO_DURATION.time("conversation_log_append"):
+                    # gevent 서버에서는 fsync가 이벤트 루프를 막지 않도록 스레드풀에서 실행
+                    run_blocking(_append_and_sync, filepath, lines)
+                logger.info(f"대화 로그 저장됨: {filepath} ({len(entries)}건)")
+                if self.on_written is not None:
+                    self.on_written(filepath)
+            except Exception as e:
+                logger.error(f"로그 저장 오류: {filepath}, {str(e)}")
+
+        for waiter in waiters:
+            waiter.set()
+
+
+def _append_and_sync(filepath, lines):
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def log_base_path(log_filepath):
+    """확장자(.json/.jsonl)를 제외한 로그 파일 경로"""
+    for extension in (JSONL_EXTENSION, LEGACY_EXTENSION):
+        if log_filepath.endswith(extension):
+            return log_filepath[:-len(extension)]
+    return log_filepath
+
+
+def is_conversation_log_file(filename):
+    return filename.startswith("medical_conversation_") and (
+        filename.endswith(LEGACY_EXTENSION) or filename.endswith(JSONL_EXTENSION))
+
+
+def parse_jsonl(content, source=""):
+    """JSONL 문자열을 항목 리스트로 변환 (빈 줄과 잘린 줄은 건너뜀)"""
+    entries = []
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            logger.warning(f"손상된 로그 라인 건너뜀: {source}")
+    return entries
+
+
+def iter_conversation_log(log_filepath):
+    """기존 JSON 배열 파일과 JSONL 파일의 항목을 순서대로 생성 (JSONL은 한 줄씩 읽음)"""
+    base_path = log_base_path(log_filepath)
+
+    legacy_path = base_path + LEGACY_EXTENSION
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "r", encoding="utf-8") as f:
+            yield from json.load(f)
+
+    jsonl_path = base_path + JSONL_EXTENSION
+    if os.path.exists(jsonl_path):
+        with open(jsonl_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # 비정상 종료로 잘린 마지막 줄은 건너뜀
+                    logger.warning(f"손상된 로그 라인 건너뜀: {jsonl_path}")
+
+
+def read_conversation_log(log_filepath):
+    """기존 JSON 배열 파일과 JSONL 파일을 합쳐 항목 리스트로 반환"""
+    return list(iter_conversation_log(log_filepath))
+
+
+def conversation_log_exists(log_filepath):
+    base_path = log_base_path(log_filepath)
+    return os.path.exists(base_path + LEGACY_EXTENSION) or os.path.exists(base_path + JSONL_EXTENSION)
+
+
+conversation_log_writer = ConversationLogWriter()
+atexit.register(conversation_log_writer.flush)
@@ -0,0 +1,132 @@
+"""대화 평가 결과 캐시 (대화 로그 지문 기반)"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from artifacts import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_logs(logs):
+    """평가에 쓰이는 내용(환자/의사 발화)만 남기고 공백을 정리"""
+    return [
+        [" ".join(str(log.get("user_message", "")).split()),
+         " ".join(str(log.get("bot_response", "")).split())]
+        for log in logs
+    ]
+
+
+def make_evaluation_key(logs, evaluation_type, prompt_version):
+    """(정규화된 대화 로그, 평가 타입, 프롬프트 버전) 해시
+
+    대화가 한 턴이라도 추가되면 키가 달라지므로 별도의 무효화가 필요 없다.
+    """
+    payload = json.dumps([normalize_logs(logs), evaluation_type, prompt_version], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class EvaluationCache:
+    """메모리 LRU + 디스크 JSON 파일로 평가 결과를 보관하는 캐시
+
+    디스크 파일도 최근 사용 순으로 max_disk_entries개만 남기고 오래된 것부터 지운다.
+    """
+
+    def __init__(self, cache_dir, max_entries=1000, max_disk_entries=10000):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_disk_entries = max(max_entries, max_disk_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._disk_keys = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_disk_keys()
+
+    def _load_disk_keys(self):
+        # 기존 파일을 수정 시각 순으로 등록하고 한도를 넘는 오래된 파일 정리
+        entries = []
+        with os.scandir(self.cache_dir) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    entries.append((entry.stat().st_mtime, entry.name[:-len(".json")]))
+        for _, key in sorted(entries):
+            self._disk_keys[key] = None
+        self._prune_disk()
+
+    def get(self, key):
+        """캐시된 평가 결과 반환 (없으면 None)"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+        # 재시작 후에는 디스크에서 복원
+        filepath = self._entry_path(key)
+        if os.path.exists(filepath):
+            try:
+                with open(filepath, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"평가 캐시 읽기 오류: {str(e)}")
+            else:
+                with self._lock:
+                    self._store(key, value)
+                    self._disk_keys[key] = None
+                    self._disk_keys.move_to_end(key)
+                    self.hits += 1
+                return value
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+        try:
+            atomic_write_json(self._entry_path(key), value, indent=None)
+        except OSError as e:
+            logger.error(f"평가 캐시 저장 오류: {str(e)}")
+            return
+        with self._lock:
+            self._disk_keys[key] = None
+            self._disk_keys.move_to_end(key)
+            self._prune_disk()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "disk_entries": len(self._disk_keys),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _store(self, key, value):
+        # 잠금을 잡은 상태에서 호출. 메모리에는 최근 max_entries개만 유지
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _prune_disk(self):
+        # 잠금을 잡은 상태에서 호출
+        while len(self._disk_keys) > self.max_disk_entries:
+            key, _ = self._disk_keys.popitem(last=False)
+            try:
+                os.remove(self._entry_path(key))
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"평가 캐시 정리 오류: {str(e)}")
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
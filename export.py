@@ -0,0 +1,123 @@
+"""참여자 데이터 일괄 내보내기 (NDJSON 스트리밍 / Parquet)
+
+Storage.iter_records를 제너레이터로 순회하면서 바로 직렬화하므로
+데이터 양과 관계없이 메모리 사용량이 일정하다.
+- ndjson: 레코드 하나당 한 줄, 일정 크기씩 묶어 청크 단위로 전송
+- parquet: pyarrow가 설치된 경우에만 사용, row group 단위로 임시 파일에 기록 후 전송
+"""
+import json
+import logging
+import os
+import re
+import tempfile
+
+try:
+    import pyarrow
+    import pyarrow.parquet as pyarrow_parquet
+except ImportError:
+    pyarrow = None
+
+from storage import RECORD_KINDS, RecordFilter
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("ndjson", "parquet")
+DATE_FORMAT = re.compile(r"^\d{8}$")
+NDJSON_CHUNK_BYTES = 64 * 1024
+PARQUET_ROW_GROUP_SIZE = 1000
+FILE_CHUNK_BYTES = 256 * 1024
+# Parquet 컬럼 (data는 종류마다 구조가 달라 JSON 문자열로 저장)
+COLUMNS = ("participant_id", "kind", "name", "page_type", "date", "data")
+
+
+class ExportError(ValueError):
+    """잘못된 내보내기 요청"""
+
+
+def parquet_available():
+    return pyarrow is not None
+
+
+def parse_filter(args):
+    """쿼리 파라미터로 RecordFilter 생성 (잘못된 값이면 ExportError)
+
+    kind는 쉼표로 여러 개 지정할 수 있고, 날짜는 YYYYMMDD 형식이다.
+    """
+    kinds = [kind.strip() for kind in (args.get("kind") or "").split(",") if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in RECORD_KINDS]
+    if unknown:
+        raise ExportError(f"알 수 없는 데이터 종류: {', '.join(unknown)} (가능한 값: {', '.join(RECORD_KINDS)})")
+
+    dates = {}
+    for key in ("start_date", "end_date"):
+        value = args.get(key) or None
+        if value is not None and not DATE_FORMAT.match(value):
+            raise ExportError(f"{key}는 YYYYMMDD 형식이어야 합니다: {value}")
+        dates[key] = value
+    if dates["start_date"] and dates["end_date"] and dates["start_date"] > dates["end_date"]:
+        raise ExportError("start_date가 end_date보다 늦습니다.")
+
+    return RecordFilter(kinds=kinds or None,
+                        participant_id=args.get("participant_id") or None,
+                        page_type=args.get("page_type") or None,
+                        **dates)
+
+
+def iter_ndjson(records, chunk_bytes=NDJSON_CHUNK_BYTES):
+    """레코드를 NDJSON 줄로 직렬화해 chunk_bytes 이상 모일 때마다 내보냄"""
+    buffer = []
+    size = 0
+    count = 0
+    for record in records:
+        line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+        buffer.append(line)
+        size += len(line)
+        count += 1
+        if size >= chunk_bytes:
+            yield b"".join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b"".join(buffer)
+    logger.info(f"NDJSON 내보내기 완료: {count}건")
+
+
+def write_parquet(records, filepath, row_group_size=PARQUET_ROW_GROUP_SIZE):
+    """레코드를 row group 단위로 Parquet 파일에 기록하고 건수 반환"""
+    if pyarrow is None:
+        raise RuntimeError("pyarrow가 설치되어 있지 않습니다.")
+    schema = pyarrow.schema([(column, pyarrow.string()) for column in COLUMNS])
+    count = 0
+    with pyarrow_parquet.ParquetWriter(filepath, schema, compression="zstd") as writer:
+        columns = {column: [] for column in COLUMNS}
+        for record in records:
+            for column in COLUMNS[:-1]:
+                columns[column].append(record[column])
+            columns["data"].append(json.dumps(record["data"], ensure_ascii=False))
+            count += 1
+            if len(columns["data"]) >= row_group_size:
+                writer.write_table(pyarrow.table(columns, schema=schema))
+                columns = {column: [] for column in COLUMNS}
+        if columns["data"]:
+            writer.write_table(pyarrow.table(columns, schema=schema))
+    return count
+
+
+def iter_parquet(records, tmp_dir=None):
+    """Parquet 파일을 임시 파일로 만든 뒤 청크 단위로 읽어 내보내고 삭제
+
+    Parquet 푸터는 모든 row group을 쓴 뒤에 기록되므로 파일을 다 쓴 후 전송한다.
+    """
+    fd, filepath = tempfile.mkstemp(prefix=".export_", suffix=".parquet", dir=tmp_dir)
+    os.close(fd)
+    try:
+        count = write_parquet(records, filepath)
+        logger.info(f"Parquet 내보내기 완료: {count}건, {os.path.getsize(filepath)} bytes")
+        with open(filepath, "rb") as f:
+            while True:
+                chunk = f.read(FILE_CHUNK_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(filepath)
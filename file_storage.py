@@ -0,0 +1,198 @@
+"""기존 파일 구조 저장소 (logs/<participant_id>/*.json, *.jsonl)"""
+import json
+import logging
+import os
+import re
+from datetime import datetime
+
+from werkzeug.utils import safe_join
+
+from artifacts import atomic_write_json, new_artifact_filename
+from conversation_log import conversation_log_exists, iter_conversation_log, log_base_path, read_conversation_log
+from metrics import FILE_IO_DURATION
+from storage import DOCUMENT_KINDS, RecordFilter, Storage, conversation_log_name, quest_log_name, today
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_NAME_PATTERN = re.compile(r"medical_conversation_(.+?)(?:_unknown)?_(\d{8})$")
+USER_INFO_FILENAME = "user_info.json"
+# 카탈로그 산출물 종류 -> 레코드 종류 (오디오 등은 제외)
+CATALOG_RECORD_KINDS = {
+    "user_info": "user_info",
+    "conversation_log": "conversation",
+    "quest_log": "quest_analysis",
+    **{kind: kind for kind in DOCUMENT_KINDS}
+}
+
+
+class FileStorage(Storage):
+    """참여자별 디렉토리에 JSON 파일로 저장하는 기존 방식
+
+    파일 목록 조회는 ArtifactCatalog를 사용하고,
+    대화 로그는 ConversationLogWriter가 백그라운드에서 JSONL로 추가 기록한다.
+    """
+
+    name = "file"
+
+    def __init__(self, root_dir, catalog, log_writer):
+        self.root_dir = root_dir
+        self.catalog = catalog
+        self.log_writer = log_writer
+
+    def save_user_info(self, participant_id, data):
+        filepath = os.path.join(self._user_dir(participant_id), USER_INFO_FILENAME)
+        atomic_write_json(filepath, data)
+        self.catalog.register(filepath)
+        return filepath
+
+    def get_user_info(self, participant_id):
+        filepath = os.path.join(self._user_dir(participant_id), USER_INFO_FILENAME)
+        if not os.path.exists(filepath):
+            return {}
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def append_conversation(self, participant_id, page_type, entry):
+        filepath = self._conversation_path(participant_id, page_type, today()) + ".jsonl"
+        self.log_writer.append(filepath, entry)
+
+    def get_conversation(self, participant_id, page_type, date):
+        # 아직 기록 대기 중인 항목까지 반영
+        self.log_writer.flush()
+        base_path = self._conversation_path(participant_id, page_type, date)
+        if not conversation_log_exists(base_path):
+            return None
+        return read_conversation_log(base_path)
+
+    def latest_conversation(self, participant_id):
+        self.log_writer.flush()
+        filepath = self.catalog.latest(participant_id, "conversation_log")
+        return read_conversation_log(filepath) if filepath else []
+
+    def save_document(self, participant_id, kind, data):
+        filename = new_artifact_filename(kind, "json")
+        filepath = os.path.join(self._user_dir(participant_id), filename)
+        atomic_write_json(filepath, data)
+        self.catalog.register(filepath)
+        return filename[:-len(".json")]
+
+    def list_documents(self, participant_id, kind, date=None):
+        documents = []
+        for artifact in self.catalog.list(participant_id, kind, date):
+            try:
+                documents.append(self._load_json(artifact["path"]))
+            except FileNotFoundError:
+                self.catalog.forget(artifact["path"])
+            except (OSError, json.JSONDecodeError) as e:
+                logger.error(f"문서 읽기 오류: {artifact['path']}, {str(e)}")
+        return documents
+
+    def latest_document(self, participant_id, kind):
+        filepath = self.catalog.latest(participant_id, kind)
+        return self._load_json(filepath) if filepath else None
+
+    def append_quest_analysis(self, participant_id, entry):
+        filepath = os.path.join(self._user_dir(participant_id), quest_log_name(today()) + ".json")
+        with FILE_IO_DURATION.time("quest_log_append"):
+            with open(filepath, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.catalog.register(filepath)
+
+    def list_artifacts(self, participant_id):
+        return [{
+            "filename": artifact["filename"],
+            "size": artifact["size"],
+            "modified": datetime.fromtimestamp(artifact["modified"]).isoformat(),
+            "type": "json" if artifact["filename"].endswith(".json") else "other",
+            "kind": artifact["kind"]
+        } for artifact in self.catalog.list(participant_id)]
+
+    def read_artifact(self, participant_id, filename):
+        filepath = safe_join(self._user_dir(participant_id, create=False), filename)
+        if filepath is None or not os.path.isfile(filepath):
+            return None
+        with open(filepath, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def participants(self):
+        return self.catalog.participants()
+
+    def iter_records(self, record_filter=None):
+        record_filter = record_filter or RecordFilter()
+        self.flush()
+        if record_filter.participant_id is not None:
+            participant_ids = [record_filter.participant_id]
+        else:
+            participant_ids = [None] + self.participants()
+        for participant_id in participant_ids:
+            seen_logs = set()
+            for artifact in self.catalog.list(participant_id):
+                kind = CATALOG_RECORD_KINDS.get(artifact["kind"])
+                if kind is None or not record_filter.matches_kind(kind):
+                    continue
+                if not record_filter.matches_date(artifact["artifact_date"]):
+                    continue
+                if kind == "user_info" and not participant_id:
+                    continue
+                filepath = artifact["path"]
+                try:
+                    if kind == "conversation":
+                        yield from self._conversation_records(participant_id, filepath, seen_logs, record_filter)
+                    elif kind == "quest_analysis":
+                        yield from self._quest_records(participant_id, artifact)
+                    elif kind == "user_info":
+                        yield self._record(participant_id, "user_info", None, None, None, self._load_json(filepath))
+                    else:
+                        name = artifact["filename"][:-len(".json")]
+                        yield self._record(participant_id, kind, name, None, artifact["artifact_date"],
+                                           self._load_json(filepath))
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.error(f"레코드 읽기 오류: {filepath}, {str(e)}")
+
+    def flush(self):
+        self.log_writer.flush()
+
+    def _conversation_records(self, participant_id, filepath, seen_logs, record_filter):
+        # .json(기존)과 .jsonl을 하나의 로그로 합쳐 한 번만 읽음
+        base_path = log_base_path(filepath)
+        if base_path in seen_logs:
+            return
+        seen_logs.add(base_path)
+        name = os.path.basename(base_path)
+        match = CONVERSATION_NAME_PATTERN.match(name)
+        page_type, date = (match.group(1), match.group(2)) if match else ("chat", None)
+        if not record_filter.matches_page_type("conversation", page_type):
+            return
+        for entry in iter_conversation_log(base_path):
+            yield self._record(participant_id, "conversation", name, page_type, date, entry)
+
+    def _quest_records(self, participant_id, artifact):
+        name = artifact["filename"][:-len(".json")]
+        with open(artifact["path"], "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield self._record(participant_id, "quest_analysis", name, None, artifact["artifact_date"],
+                                       json.loads(line))
+
+    @staticmethod
+    def _record(participant_id, kind, name, page_type, date, data):
+        return {"participant_id": participant_id, "kind": kind, "name": name,
+                "page_type": page_type, "date": date, "data": data}
+
+    @staticmethod
+    def _load_json(filepath):
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _conversation_path(self, participant_id, page_type, date):
+        directory = self._user_dir(participant_id) if participant_id else self.root_dir
+        return os.path.join(directory, conversation_log_name(participant_id, page_type, date))
+
+    def _user_dir(self, participant_id, create=True):
+        if not participant_id:
+            return self.root_dir
+        user_dir = os.path.join(self.root_dir, participant_id)
+        if create:
+            os.makedirs(user_dir, exist_ok=True)
+        return user_dir
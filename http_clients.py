@@ -0,0 +1,199 @@
+"""외부 API(OpenAI, ElevenLabs) 호출용 공용 HTTP 클라이언트
+
+- 연결 재사용(keep-alive) 세션 풀
+- 연결/읽기 타임아웃
+- 429/5xx 응답에 대한 지터 백오프 재시도
+- 연속 실패 시 빠르게 실패하는 서킷 브레이커
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import UPSTREAM_DURATION, UPSTREAM_ERRORS, UPSTREAM_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않음"""
+
+
+class UpstreamHTTPError(Exception):
+    """재시도 후에도 실패한 외부 API 응답"""
+
+    def __init__(self, response):
+        super().__init__(f"{response.status_code} - {response.text[:200]}")
+        self.response = response
+
+
+class NonRetryableError(Exception):
+    """재시도하지 않고 그대로 전달할 오류 (요청 자체의 문제)"""
+
+    def __init__(self, error):
+        super().__init__(str(error))
+        self.error = error
+
+
+class CircuitBreaker:
+    """연속 실패 횟수가 임계값을 넘으면 일정 시간 동안 요청을 차단
+
+    reset_timeout이 지나면 요청 하나만 통과시켜(half-open) 복구 여부를 확인한다.
+    """
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def before_call(self):
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._probe_in_flight:
+                raise CircuitOpenError(f"{self.name} 서킷 브레이커가 열려 있습니다.")
+            self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probe_in_flight or self._failures >= self.failure_threshold:
+                if self._opened_at is None or self._probe_in_flight:
+                    logger.warning(f"{self.name} 서킷 브레이커 열림 (연속 실패 {self._failures}회)")
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+def error_label(error):
+    """메트릭 레이블용 오류 구분 (HTTP 오류는 상태 코드)"""
+    if isinstance(error, UpstreamHTTPError):
+        return f"http_{error.response.status_code}"
+    return type(error).__name__
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """지수 백오프 + full jitter"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class SharedSession(requests.Session):
+    """여러 스레드가 함께 쓰는 세션 (close()는 무시하고 shutdown()에서만 연결 풀을 닫음)
+
+    openai 0.28은 스레드별 세션을 180초마다 close() 후 새로 만드는데,
+    openai.requestssession으로 이 세션을 넘기면 한 스레드의 close()가
+    다른 스레드가 쓰는 keep-alive 연결까지 모두 끊는다.
+    """
+
+    def close(self):
+        pass
+
+    def shutdown(self):
+        super().close()
+
+
+def create_session(pool_size=20):
+    """연결 풀을 재사용하는 requests 세션 생성 (재시도는 UpstreamClient에서 처리)"""
+    session = SharedSession()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class UpstreamClient:
+    """재시도/타임아웃/서킷 브레이커를 적용하여 외부 API를 호출하는 클라이언트"""
+
+    def __init__(self, name, session=None, connect_timeout=5.0, read_timeout=60.0,
+                 max_retries=2, breaker=None):
+        self.name = name
+        self.session = session or create_session()
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.breaker = breaker or CircuitBreaker(name)
+
+    def close(self):
+        """연결 풀 정리 (프로세스 종료 시)"""
+        if isinstance(self.session, SharedSession):
+            self.session.shutdown()
+        else:
+            self.session.close()
+
+    def post(self, url, **kwargs):
+        """POST 요청 (429/5xx, 연결 오류 시 재시도). 성공 응답만 반환"""
+        kwargs.setdefault("timeout", self.timeout)
+
+        def send():
+            response = self.session.post(url, **kwargs)
+            if response.status_code in RETRYABLE_STATUS_CODES:
+                raise UpstreamHTTPError(response)
+            if response.status_code >= 400:
+                # 4xx 오류는 재시도해도 같은 결과이므로 바로 반환
+                raise NonRetryableError(UpstreamHTTPError(response))
+            return response
+
+        return self.call(send, retryable=(UpstreamHTTPError, requests.ConnectionError, requests.Timeout))
+
+    def call(self, func, retryable=(Exception,)):
+        """func를 재시도 정책과 서킷 브레이커를 적용하여 실행"""
+        try:
+            self.breaker.before_call()
+        except CircuitOpenError:
+            UPSTREAM_REQUESTS.inc(self.name, "circuit_open")
+            raise
+        with UPSTREAM_DURATION.time(self.name):
+            return self._call_with_retries(func, retryable)
+
+    def _call_with_retries(self, func, retryable):
+        attempt = 0
+        while True:
+            try:
+                result = func()
+            except NonRetryableError as e:
+                # 요청 자체의 문제이므로 업스트림 장애로 집계하지 않음
+                self.breaker.record_success()
+                UPSTREAM_ERRORS.inc(self.name, error_label(e.error))
+                UPSTREAM_REQUESTS.inc(self.name, "rejected")
+                raise e.error
+            except retryable as e:
+                UPSTREAM_ERRORS.inc(self.name, error_label(e))
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    UPSTREAM_REQUESTS.inc(self.name, "failure")
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"{self.name} 호출 실패, {delay:.2f}초 후 재시도 ({attempt + 1}/{self.max_retries}): {str(e)}")
+                time.sleep(delay)
+                attempt += 1
+            except Exception as e:
+                self.breaker.record_failure()
+                UPSTREAM_ERRORS.inc(self.name, error_label(e))
+                UPSTREAM_REQUESTS.inc(self.name, "failure")
+                raise
+            else:
+                self.breaker.record_success()
+                UPSTREAM_REQUESTS.inc(self.name, "success")
+                return result
@@ -59,7 +59,7 @@ echo ""
 echo "📋 4단계: 패키지 설치"
 echo "💡 conda 환경의 pip을 사용하여 패키지를 설치합니다..."
 
-$CONDA_PIP install flask flask-cors openai python-dotenv requests
+$CONDA_PIP install flask flask-cors openai python-dotenv requests gevent
 
 if [ $? -eq 0 ]; then
     echo "✅ 패키지 설치 완료"
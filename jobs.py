@@ -0,0 +1,257 @@
+"""오래 걸리는 LLM 작업(평가, 치트시트 생성)을 위한 백그라운드 작업 큐"""
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from artifacts import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+ACTIVE_STATES = (JOB_QUEUED, JOB_RUNNING)
+JOB_ID_PATTERN = re.compile(r"[0-9a-f]{32}")
+
+
+class JobQueueFull(Exception):
+    """대기 중인 작업이 최대치를 넘어 더 받을 수 없음"""
+
+
+class JobQueue:
+    """작업을 파일로 기록하고 제한된 워커 풀에서 실행하는 작업 큐
+
+    - 같은 참여자의 동일한 작업이 진행 중이면 기존 작업 ID를 돌려준다.
+    - 작업 상태는 jobs_dir/<job_id>.json에 저장되어, 재시작 시 미완료 작업을 다시 실행한다.
+    - 실행할 작업은 jobs_dir/<job_id>.lock에 배타적 잠금(flock)을 걸어 점유한다.
+      여러 프로세스가 같은 jobs_dir을 쓰더라도 한 프로세스만 실행하며,
+      점유한 프로세스가 죽으면 잠금이 풀려 다른 프로세스가 복구할 수 있다.
+    - 완료된 작업 파일은 최근 keep_finished개만 남기고 삭제한다.
+    """
+
+    def __init__(self, jobs_dir, max_workers=2, max_pending=100, keep_finished=500):
+        self.jobs_dir = jobs_dir
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self._handlers = {}
+        self._jobs = OrderedDict()
+        self._active_keys = {}
+        self._claims = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job-worker")
+        os.makedirs(jobs_dir, exist_ok=True)
+
+    def register(self, kind, handler):
+        """작업 종류별 실행 함수 등록. handler(**payload)는 (결과, 상태 코드)를 반환"""
+        self._handlers[kind] = handler
+
+    def submit(self, kind, participant_id, payload):
+        """작업 등록 후 작업 정보 반환 (동일 작업이 진행 중이면 해당 작업 반환)"""
+        if kind not in self._handlers:
+            raise ValueError(f"등록되지 않은 작업 종류: {kind}")
+        dedup_key = self._dedup_key(kind, participant_id, payload)
+
+        with self._lock:
+            existing_id = self._active_keys.get(dedup_key)
+            if existing_id is not None:
+                return dict(self._jobs[existing_id])
+            pending = sum(1 for job in self._jobs.values() if job["status"] in ACTIVE_STATES)
+            if pending >= self.max_pending:
+                raise JobQueueFull()
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "kind": kind,
+                "participant_id": participant_id,
+                "payload": payload,
+                "dedup_key": dedup_key,
+                "status": JOB_QUEUED,
+                "created_at": datetime.now().isoformat(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "status_code": None
+            }
+            self._jobs[job["job_id"]] = job
+            self._active_keys[dedup_key] = job["job_id"]
+            # 새 작업 ID라 경쟁이 없음. 큐에서 기다리는 동안 다른 프로세스의 복구 대상이 되지 않도록 점유
+            self._claims[job["job_id"]] = self._claim(job["job_id"])
+
+        self._persist(job)
+        self._executor.submit(self._run, job["job_id"])
+        return dict(job)
+
+    def get(self, job_id):
+        """작업 정보 조회 (메모리에 없으면 파일에서 읽음)"""
+        if not JOB_ID_PATTERN.fullmatch(job_id or ""):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        filepath = self._job_path(job_id)
+        if not os.path.exists(filepath):
+            return None
+        with open(filepath, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def is_finished(self, job):
+        return job["status"] not in ACTIVE_STATES
+
+    def recover(self):
+        """재시작 전에 끝나지 않은 작업 중 다른 프로세스가 점유하지 않은 작업을 다시 큐에 넣음"""
+        recovered = 0
+        finished = []
+        for filename in sorted(os.listdir(self.jobs_dir)):
+            job_id = filename[:-len(".json")]
+            if not filename.endswith(".json") or not JOB_ID_PATTERN.fullmatch(job_id):
+                continue
+            with self._lock:
+                if job_id in self._jobs:
+                    continue
+            job = self._read_job_file(job_id)
+            if job is None:
+                continue
+            if job.get("status") not in ACTIVE_STATES:
+                finished.append((job.get("finished_at") or "", job_id))
+                continue
+            if job.get("kind") not in self._handlers:
+                continue
+            claim = self._claim(job_id)
+            if claim is None:
+                continue
+            # 잠금을 얻기 전에 다른 프로세스가 끝냈을 수 있으므로 다시 읽어 확인
+            job = self._read_job_file(job_id)
+            if job is None or job.get("status") not in ACTIVE_STATES:
+                self._release_claim(job_id, claim)
+                continue
+            job["status"] = JOB_QUEUED
+            with self._lock:
+                self._jobs[job_id] = job
+                self._active_keys[job["dedup_key"]] = job_id
+                self._claims[job_id] = claim
+            self._persist(job)
+            self._executor.submit(self._run, job_id)
+            recovered += 1
+
+        finished.sort()
+        for _, job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            self._remove_job_files(job_id)
+        if recovered:
+            logger.info(f"미완료 작업 {recovered}개를 다시 실행합니다.")
+        return recovered
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._jobs[job_id]
+            job["status"] = JOB_RUNNING
+            job["started_at"] = datetime.now().isoformat()
+        self._persist(job)
+
+        started = time.monotonic()
+        try:
+            result, status_code = self._handlers[job["kind"]](**job["payload"])
+            status = JOB_SUCCEEDED if status_code < 400 else JOB_FAILED
+        except Exception as e:
+            logger.error(f"작업 실행 오류: {job_id}, {str(e)}")
+            result, status_code, status = {"error": "작업 처리 중 오류가 발생했습니다."}, 500, JOB_FAILED
+
+        with self._lock:
+            job["status"] = status
+            job["result"] = result
+            job["status_code"] = status_code
+            job["finished_at"] = datetime.now().isoformat()
+            self._active_keys.pop(job["dedup_key"], None)
+            trimmed = self._trim_finished()
+            claim = self._claims.pop(job_id, None)
+        self._persist(job)
+        # 완료 상태를 저장한 뒤에 점유를 풀어야 다른 프로세스가 다시 실행하지 않음
+        self._release_claim(job_id, claim)
+        for trimmed_id in trimmed:
+            self._remove_job_files(trimmed_id)
+        logger.info(f"작업 완료: {job['kind']} {job_id} ({status}, {time.monotonic() - started:.1f}초)")
+
+    def _trim_finished(self):
+        # 완료된 작업은 최근 keep_finished개만 유지하고, 밀려난 작업 ID를 반환 (파일은 호출자가 삭제)
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] not in ACTIVE_STATES]
+        trimmed = finished[:max(0, len(finished) - self.keep_finished)]
+        for job_id in trimmed:
+            del self._jobs[job_id]
+        return trimmed
+
+    def _claim(self, job_id):
+        """작업 잠금 파일에 배타적 잠금을 걸어 파일 디스크립터 반환 (다른 프로세스가 점유 중이면 None)"""
+        claim_path = self._claim_path(job_id)
+        try:
+            fd = os.open(claim_path, os.O_CREAT | os.O_RDWR, 0o644)
+        except OSError as e:
+            logger.error(f"작업 잠금 파일 열기 오류: {job_id}, {str(e)}")
+            return None
+        try:
+            # LOCK_NB라 다른 프로세스가 점유 중이어도 기다리지 않고 바로 실패 (gevent 서버에서도 허브를 막지 않음)
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # 잠그는 사이 이전 점유자가 잠금 파일을 지웠다면 (작업 완료) 점유 실패로 봄
+            if os.fstat(fd).st_ino != os.stat(claim_path).st_ino:
+                raise BlockingIOError()
+        except OSError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _release_claim(self, job_id, fd):
+        if fd is None:
+            return
+        try:
+            os.remove(self._claim_path(job_id))
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"작업 잠금 파일 삭제 오류: {job_id}, {str(e)}")
+        os.close(fd)
+
+    def _read_job_file(self, job_id):
+        try:
+            with open(self._job_path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"작업 파일 읽기 오류: {job_id}, {str(e)}")
+            return None
+
+    def _remove_job_files(self, job_id):
+        for filepath in (self._job_path(job_id), self._claim_path(job_id)):
+            try:
+                os.remove(filepath)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.error(f"완료된 작업 파일 삭제 오류: {filepath}, {str(e)}")
+
+    def _persist(self, job):
+        with self._lock:
+            snapshot = dict(job)
+        try:
+            atomic_write_json(self._job_path(snapshot["job_id"]), snapshot, indent=None)
+        except OSError as e:
+            logger.error(f"작업 상태 저장 오류: {snapshot['job_id']}, {str(e)}")
+
+    def _job_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _claim_path(self, job_id):
+        return os.path.join(self.jobs_dir, f"{job_id}.lock")
+
+    @staticmethod
+    def _dedup_key(kind, participant_id, payload):
+        serialized = json.dumps([kind, participant_id, payload], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
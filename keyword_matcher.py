@@ -0,0 +1,139 @@
+"""Aho-Corasick 기반 다중 키워드 매처 (한국어 조사 처리 포함)
+
+여러 키워드를 하나의 오토마톤으로 컴파일해 텍스트를 한 번만 훑으며
+어떤 키워드가 어디에서 나왔는지 찾는다.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict, deque
+
+# 키워드 끝에 붙은 조사 (긴 것부터 검사)
+JOSA_SUFFIXES = sorted([
+    '에서', '에게', '한테', '께서', '으로', '부터', '까지', '처럼', '보다', '이랑',
+    '은', '는', '이', '가', '을', '를', '에', '로', '와', '과', '도', '만', '의', '랑', '요'
+], key=len, reverse=True)
+
+
+def strip_josa(keyword):
+    """키워드 끝의 조사를 제거 ("머리가" -> "머리")
+
+    한 글자 조사는 남는 어간이 두 글자 이상일 때만 제거해 "나이" 같은 단어를 보호한다.
+    """
+    for josa in JOSA_SUFFIXES:
+        if keyword.endswith(josa):
+            stem = keyword[:-len(josa)]
+            min_stem = 2 if len(josa) == 1 else 1
+            if len(stem) >= min_stem:
+                return stem
+            break
+    return keyword
+
+
+def normalize_text(text):
+    return " ".join(text.lower().split())
+
+
+def normalize_keyword(keyword):
+    return strip_josa(normalize_text(keyword))
+
+
+class KeywordMatcher:
+    """Aho-Corasick 오토마톤
+
+    keyword_labels: {키워드: 라벨 집합}. 매칭 결과는 원래 키워드가 아닌
+    정규화된(조사 제거) 키워드 기준으로 보고한다.
+    """
+
+    def __init__(self, keyword_labels):
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]  # 상태별로 끝나는 (키워드, 라벨 집합)
+        labels_by_keyword = {}
+        for keyword, labels in keyword_labels.items():
+            normalized = normalize_keyword(keyword)
+            if normalized:
+                labels_by_keyword.setdefault(normalized, set()).update(labels)
+        for keyword, labels in labels_by_keyword.items():
+            self._add(keyword, frozenset(labels))
+        self._build_fail_links()
+        self.keyword_count = len(labels_by_keyword)
+
+    def _add(self, keyword, labels):
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((keyword, labels))
+
+    def _build_fail_links(self):
+        # 루트의 자식은 실패 시 루트로 돌아가므로 그 아래 단계부터 BFS로 계산
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(char, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def scan(self, text):
+        """(시작 위치, 키워드, 라벨 집합)을 텍스트 순서대로 생성. 위치는 정규화된 텍스트 기준"""
+        text = normalize_text(text)
+        state = 0
+        for position, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for keyword, labels in self._output[state]:
+                yield position - len(keyword) + 1, keyword, labels
+
+    def match_labels(self, text):
+        """{라벨: [(위치, 키워드), ...]} 형태로 매칭 결과 반환"""
+        hits = {}
+        for start, keyword, labels in self.scan(text):
+            for label in labels:
+                hits.setdefault(label, []).append((start, keyword))
+        return hits
+
+
+def quest_set_key(quests):
+    serialized = json.dumps(
+        sorted([quest['id'], sorted(quest.get('keywords', []))] for quest in quests),
+        ensure_ascii=False)
+    return hashlib.sha256(serialized.encode('utf-8')).hexdigest()
+
+
+_matcher_cache = OrderedDict()
+_matcher_cache_lock = threading.Lock()
+MATCHER_CACHE_SIZE = 256
+
+
+def get_quest_matcher(quests):
+    """퀘스트 목록의 키워드로 컴파일한 매처 (퀘스트 구성 해시로 캐시)"""
+    key = quest_set_key(quests)
+    with _matcher_cache_lock:
+        matcher = _matcher_cache.get(key)
+        if matcher is not None:
+            _matcher_cache.move_to_end(key)
+            return matcher
+
+    keyword_labels = {}
+    for quest in quests:
+        for keyword in quest.get('keywords', []):
+            keyword_labels.setdefault(keyword, set()).add(quest['id'])
+    matcher = KeywordMatcher(keyword_labels)
+
+    with _matcher_cache_lock:
+        _matcher_cache[key] = matcher
+        while len(_matcher_cache) > MATCHER_CACHE_SIZE:
+            _matcher_cache.popitem(last=False)
+    return matcher
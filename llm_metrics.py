@@ -0,0 +1,204 @@
+"""LLM 호출별 토큰 사용량/지연 시간 기록 및 집계
+
+엔드포인트별, 참여자별, 프롬프트(prompts.py의 tag)별로 집계한다.
+cached_token_ratio는 프롬프트 토큰 중 업스트림 프롬프트 캐시에서 처리된 비율이다.
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+from context_manager import estimate_tokens
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values, pct):
+    """정렬된 값에서 nearest-rank 방식 백분위수"""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * pct // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def estimate_prompt_tokens(messages):
+    # 스트리밍 응답에는 usage가 없으므로 요청 메시지로 추정
+    return sum(estimate_tokens(message.get("content") or "") + 4 for message in messages) + 2
+
+
+def cached_prompt_tokens(usage):
+    """usage의 캐시된 프롬프트 토큰 수 (보고하지 않는 서버는 0)"""
+    details = usage.get("prompt_tokens_details") or {}
+    return details.get("cached_tokens") or 0
+
+
+class UsageSeries:
+    """최근 window개 호출의 지표 보관"""
+
+    def __init__(self, window):
+        self.calls = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.measured_prompt_tokens = 0
+        self.models = {}
+        self.latency_ms = deque(maxlen=window)
+        self.ttft_ms = deque(maxlen=window)
+        self.prompt_sizes = deque(maxlen=window)
+
+    def add(self, record):
+        self.calls += 1
+        if not record["success"]:
+            self.errors += 1
+        self.prompt_tokens += record["prompt_tokens"]
+        self.completion_tokens += record["completion_tokens"]
+        self.cached_tokens += record["cached_tokens"]
+        if not record["estimated"]:
+            # 캐시 비율은 업스트림이 usage를 보고한 호출만으로 계산
+            self.measured_prompt_tokens += record["prompt_tokens"]
+        self.models[record["model"]] = self.models.get(record["model"], 0) + 1
+        self.latency_ms.append(record["latency_ms"])
+        self.prompt_sizes.append(record["prompt_tokens"])
+        if record["ttft_ms"] is not None:
+            self.ttft_ms.append(record["ttft_ms"])
+
+    def summary(self):
+        result = {
+            "calls": self.calls,
+            "errors": self.errors,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cached_token_ratio": (round(self.cached_tokens / self.measured_prompt_tokens, 3)
+                                   if self.measured_prompt_tokens else None),
+            "models": dict(self.models)
+        }
+        for name, values in (("latency_ms", self.latency_ms), ("ttft_ms", self.ttft_ms),
+                             ("prompt_size_tokens", self.prompt_sizes)):
+            ordered = sorted(values)
+            result[name] = {f"p{pct}": percentile(ordered, pct) for pct in PERCENTILES}
+        return result
+
+
+class LLMUsageRecorder:
+    """엔드포인트별/참여자별/프롬프트별 LLM 사용량 집계 (참여자는 최근 max_participants명만 유지)"""
+
+    def __init__(self, window=1000, max_participants=1000, recent_size=100):
+        self.window = window
+        self.max_participants = max_participants
+        self._endpoints = {}
+        self._prompts = {}
+        self._participants = OrderedDict()
+        self._recent = deque(maxlen=recent_size)
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, model, participant_id, prompt_tokens, completion_tokens,
+               latency_ms, ttft_ms=None, success=True, estimated=False, cached_tokens=0, prompt=None):
+        record = {
+            "endpoint": endpoint,
+            "prompt": prompt,
+            "model": model,
+            "participant_id": participant_id,
+            "prompt_tokens": prompt_tokens or 0,
+            "completion_tokens": completion_tokens or 0,
+            "cached_tokens": cached_tokens or 0,
+            "latency_ms": round(latency_ms, 1),
+            "ttft_ms": round(ttft_ms, 1) if ttft_ms is not None else None,
+            "success": success,
+            "estimated": estimated,
+            "timestamp": time.time()
+        }
+        with self._lock:
+            self._series(self._endpoints, endpoint).add(record)
+            if prompt:
+                self._series(self._prompts, prompt).add(record)
+            if participant_id:
+                self._series(self._participants, participant_id).add(record)
+                self._participants.move_to_end(participant_id)
+                while len(self._participants) > self.max_participants:
+                    self._participants.popitem(last=False)
+            self._recent.append(record)
+        return record
+
+    def track(self, endpoint, model, participant_id, messages, call, prompt=None):
+        """일반 호출을 실행하며 응답의 usage와 지연 시간을 기록"""
+        started = time.perf_counter()
+        try:
+            response = call()
+        except Exception:
+            self.record(endpoint, model, participant_id, estimate_prompt_tokens(messages), 0,
+                        (time.perf_counter() - started) * 1000, success=False, estimated=True, prompt=prompt)
+            raise
+        latency_ms = (time.perf_counter() - started) * 1000
+        usage = response.get("usage")
+        if usage:
+            self.record(endpoint, model, participant_id, usage.get("prompt_tokens"),
+                        usage.get("completion_tokens"), latency_ms,
+                        cached_tokens=cached_prompt_tokens(usage), prompt=prompt)
+        else:
+            content = response.choices[0].message.content or ""
+            self.record(endpoint, model, participant_id, estimate_prompt_tokens(messages),
+                        estimate_tokens(content), latency_ms, estimated=True, prompt=prompt)
+        return response
+
+    def track_stream(self, endpoint, model, participant_id, messages, call, prompt=None):
+        """스트리밍 호출을 감싸 첫 토큰까지의 시간(TTFT)과 전체 시간을 기록
+
+        마지막 청크에 usage가 오면(stream_options.include_usage) 그 값을,
+        없으면 요청 메시지와 생성된 텍스트로 추정한 토큰 수를 기록한다.
+        """
+        started = time.perf_counter()
+        try:
+            chunks = call()
+        except Exception:
+            self.record(endpoint, model, participant_id, estimate_prompt_tokens(messages), 0,
+                        (time.perf_counter() - started) * 1000, success=False, estimated=True, prompt=prompt)
+            raise
+
+        def generate():
+            ttft_ms = None
+            parts = []
+            usage = None
+            success = False
+            try:
+                for chunk in chunks:
+                    usage = chunk.get("usage") or usage
+                    if chunk.choices:
+                        token = chunk.choices[0].delta.get("content")
+                        if token:
+                            if ttft_ms is None:
+                                ttft_ms = (time.perf_counter() - started) * 1000
+                            parts.append(token)
+                    yield chunk
+                success = True
+            finally:
+                latency_ms = (time.perf_counter() - started) * 1000
+                if usage:
+                    self.record(endpoint, model, participant_id, usage.get("prompt_tokens"),
+                                usage.get("completion_tokens"), latency_ms, ttft_ms=ttft_ms, success=success,
+                                cached_tokens=cached_prompt_tokens(usage), prompt=prompt)
+                else:
+                    self.record(endpoint, model, participant_id, estimate_prompt_tokens(messages),
+                                estimate_tokens("".join(parts)) if parts else 0, latency_ms, ttft_ms=ttft_ms,
+                                success=success, estimated=True, prompt=prompt)
+
+        return generate()
+
+    def summary(self, participant_id=None):
+        with self._lock:
+            if participant_id is not None:
+                series = self._participants.get(participant_id)
+                return {"participant_id": participant_id, **(series.summary() if series else UsageSeries(1).summary())}
+            return {
+                "endpoints": {name: series.summary() for name, series in self._endpoints.items()},
+                "prompts": {name: series.summary() for name, series in self._prompts.items()},
+                "participants": {name: series.summary() for name, series in self._participants.items()},
+                "recent": list(self._recent)
+            }
+
+    def _series(self, table, key):
+        series = table.get(key)
+        if series is None:
+            series = UsageSeries(self.window)
+            table[key] = series
+        return series
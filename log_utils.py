@@ -0,0 +1,156 @@
+"""비동기 구조화 로깅 (지연 포맷팅, 샘플링, 크기 제한)
+
+- 요청 스레드는 QueueHandler로 레코드를 큐에 넣기만 하고,
+  포맷팅과 출력(파일/콘솔)은 QueueListener 스레드가 처리한다.
+- 큰 페이로드는 LazyJSON/Truncated로 감싸 %-스타일 인자로 넘기면
+  해당 레벨이 꺼져 있을 때 직렬화 비용이 전혀 들지 않는다.
+- extra={'sample_rate': 0.1}을 붙인 레코드는 해당 비율만 기록한다.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+
+DEFAULT_MAX_MESSAGE_CHARS = 4000
+
+
+def truncate(text, max_chars):
+    if max_chars and len(text) > max_chars:
+        return f"{text[:max_chars]}... (총 {len(text)}자)"
+    return text
+
+
+class Truncated:
+    """문자열 변환 시 max_chars로 자르는 지연 인자"""
+
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value, max_chars=200):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self):
+        return truncate(str(self.value), self.max_chars)
+
+
+class LazyJSON:
+    """로그가 실제로 출력될 때만 JSON으로 직렬화하는 지연 인자
+
+    포맷팅은 리스너 스레드에서 일어나므로 로깅 후 변경되지 않는 객체만 넘긴다.
+    """
+
+    __slots__ = ("value", "indent", "max_chars")
+
+    def __init__(self, value, indent=None, max_chars=2000):
+        self.value = value
+        self.indent = indent
+        self.max_chars = max_chars
+
+    def __str__(self):
+        try:
+            text = json.dumps(self.value, ensure_ascii=False, indent=self.indent, default=str)
+        except (TypeError, ValueError):
+            text = repr(self.value)
+        return truncate(text, self.max_chars)
+
+
+class SamplingFilter(logging.Filter):
+    """extra의 sample_rate 비율만큼만 레코드를 통과시킴 (오류 레벨은 항상 통과)"""
+
+    def filter(self, record):
+        rate = getattr(record, "sample_rate", None)
+        if rate is None or record.levelno >= logging.ERROR:
+            return True
+        return random.random() < rate
+
+
+class CappedFormatter(logging.Formatter):
+    """메시지 길이를 제한하는 텍스트 포맷터"""
+
+    def __init__(self, fmt=None, max_chars=DEFAULT_MAX_MESSAGE_CHARS):
+        super().__init__(fmt)
+        self.max_chars = max_chars
+
+    def formatMessage(self, record):
+        record.message = truncate(record.message, self.max_chars)
+        return super().formatMessage(record)
+
+
+class JSONFormatter(logging.Formatter):
+    """한 줄에 하나씩 JSON으로 출력하는 포맷터 (extra의 fields를 함께 기록)"""
+
+    def __init__(self, max_chars=DEFAULT_MAX_MESSAGE_CHARS):
+        super().__init__()
+        self.max_chars = max_chars
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": truncate(record.getMessage(), self.max_chars)
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """포맷팅을 리스너 스레드로 미루는 QueueHandler
+
+    기본 QueueHandler.prepare()는 호출 스레드에서 메시지를 포맷하므로,
+    레코드를 그대로 큐에 넣고 예외 트레이스백만 문자열로 고정한다.
+    """
+
+    def prepare(self, record):
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+    def handleError(self, record):
+        # 큐가 가득 차면 요청 스레드를 막지 않고 레코드를 버림
+        pass
+
+
+_listener = None
+
+
+def setup_logging(level="INFO", log_format="text", log_file=None, max_message_chars=DEFAULT_MAX_MESSAGE_CHARS,
+                  queue_size=10000):
+    """루트 로거를 비동기 큐 기반으로 설정 (여러 번 호출해도 한 번만 적용)"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    if log_format == "json":
+        formatter = JSONFormatter(max_chars=max_message_chars)
+    else:
+        formatter = CappedFormatter("%(asctime)s %(levelname)s [%(name)s] %(message)s", max_chars=max_message_chars)
+
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.handlers.WatchedFileHandler(log_file, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = DeferredQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.addFilter(SamplingFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
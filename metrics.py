@@ -0,0 +1,162 @@
+"""Prometheus 텍스트 형식으로 노출하는 경량 메트릭 (카운터/게이지/히스토그램)
+
+외부 라이브러리 없이 레이블 조합별 값을 메모리에 보관하며,
+관측 한 번에 잠금 한 번과 버킷 탐색 정도의 비용만 든다.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    metric_type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} 레이블 개수가 맞지 않습니다: {labels}")
+        return tuple(str(label) for label in labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [버킷별 개수..., +Inf 개수, 합계]
+                state = [0] * (len(self.buckets) + 1) + [0.0]
+                self._values[key] = state
+            state[index] += 1
+            state[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), state[:-1]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(Counter(
+    "http_requests_total", "처리한 HTTP 요청 수", ("method", "route", "status")))
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간 (스트리밍 응답은 전송 완료까지)", ("method", "route")))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight", "처리 중인 HTTP 요청 수", ("route",)))
+UPSTREAM_REQUESTS = registry.register(Counter(
+    "upstream_requests_total", "외부 API 호출 결과 (재시도 포함 최종 결과 기준)", ("upstream", "outcome")))
+UPSTREAM_ERRORS = registry.register(Counter(
+    "upstream_errors_total", "외부 API 시도별 오류 수 (재시도된 실패 포함)", ("upstream", "error")))
+UPSTREAM_DURATION = registry.register(Histogram(
+    "upstream_request_duration_seconds", "외부 API 호출 시간 (재시도 포함)", ("upstream",)))
+SCHEDULER_QUEUED = registry.register(Gauge(
+    "upstream_scheduler_queued", "실행 슬롯을 기다리는 외부 API 호출 수", ("priority_class",)))
+SCHEDULER_RUNNING = registry.register(Gauge(
+    "upstream_scheduler_running", "실행 중인 외부 API 호출 수", ("priority_class",)))
+SCHEDULER_SHED = registry.register(Counter(
+    "upstream_scheduler_shed_total", "부하 차단(503)된 외부 API 호출 수", ("priority_class",)))
+SCHEDULER_WAIT = registry.register(Histogram(
+    "upstream_scheduler_wait_seconds", "실행 슬롯을 받기까지 대기 시간", ("priority_class",)))
+FILE_IO_DURATION = registry.register(Histogram(
+    "file_io_duration_seconds", "파일 쓰기 시간", ("operation",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
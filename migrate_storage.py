@@ -0,0 +1,64 @@
+"""기존 logs/ 파일 데이터를 SQLite 저장소로 옮기는 일회성 마이그레이션
+
+실행: python migrate_storage.py [--log-dir logs] [--db logs/storage.db] [--force]
+
+마이그레이션 후 STORAGE_BACKEND=sqlite로 서버를 실행한다.
+원본 파일은 삭제하지 않으며, 오디오(mp3) 파일은 그대로 파일로 사용한다.
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+from artifact_catalog import ArtifactCatalog
+from conversation_log import ConversationLogWriter
+from file_storage import FileStorage
+from sqlite_storage import SQLiteStorage
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("migrate_storage")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파일 저장소 -> SQLite 저장소 마이그레이션")
+    parser.add_argument("--log-dir", default="logs", help="기존 로그 디렉토리 (기본: logs)")
+    parser.add_argument("--db", default=None, help="SQLite 파일 경로 (기본: <log-dir>/storage.db)")
+    parser.add_argument("--force", action="store_true", help="대상 데이터베이스에 데이터가 있어도 진행")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.log_dir):
+        logger.error(f"로그 디렉토리가 없습니다: {args.log_dir}")
+        return 1
+    db_path = args.db or os.path.join(args.log_dir, "storage.db")
+
+    target = SQLiteStorage(db_path)
+    if target.participants() and not args.force:
+        # 대화 로그는 항목 단위로 추가되므로 다시 실행하면 중복된다
+        logger.error(f"이미 데이터가 있는 데이터베이스입니다: {db_path} (다시 실행하려면 --force)")
+        return 1
+
+    # 카탈로그를 최신 파일 상태로 갱신한 뒤 전체 레코드를 순회
+    catalog = ArtifactCatalog(args.log_dir, os.path.join(args.log_dir, "artifacts.db"))
+    catalog.rebuild()
+    source = FileStorage(args.log_dir, catalog, ConversationLogWriter())
+
+    started = time.monotonic()
+    counts = {}
+
+    def counted(records):
+        for record in records:
+            counts[record["kind"]] = counts.get(record["kind"], 0) + 1
+            yield record
+
+    imported = target.import_records(counted(source.iter_records()))
+    target.close()
+
+    for kind, count in sorted(counts.items()):
+        logger.info(f"  {kind}: {count}건")
+    logger.info(f"마이그레이션 완료: {imported}건 ({time.monotonic() - started:.1f}초) -> {db_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
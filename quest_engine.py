@@ -0,0 +1,119 @@
+"""증분 퀘스트 분석 엔진
+
+매 턴마다 전체 퀘스트를 LLM에 보내는 대신,
+1. 클라이언트가 보낸 active_quests(아직 완료 표시되지 않은 퀘스트)만 판정 대상으로 삼고
+2. 퀘스트 키워드를 미리 컴파일한 Aho-Corasick 매처로 환자 발화를 로컬에서 먼저 판정한 뒤
+3. 판정되지 않은 퀘스트만 여러 턴을 모아 한 번에 LLM에 확인한다.
+
+'약', '도'처럼 한 글자 키워드는 다른 단어 안에서도 쉽게 걸리므로 적중해도 완료로 보지 않고 LLM 판정에 맡긴다.
+LLM 확인은 참여자 상태 잠금 밖에서 실행하며, 실패하면 모아둔 턴을 되돌려 다음 턴에 다시 확인한다.
+키워드로 판정되지 않는 퀘스트는 batch_turns 턴이 모일 때까지 완료 판정이 늦어질 수 있다
+(QUEST_LLM_BATCH_TURNS=1이면 매 턴 확인).
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from keyword_matcher import get_quest_matcher
+
+logger = logging.getLogger(__name__)
+
+# 이 글자 수 이상인 키워드 적중만 LLM 확인 없이 완료로 판정
+MIN_DECISIVE_KEYWORD_CHARS = 2
+
+
+class QuestState:
+    """참여자 한 명의 퀘스트 진행 상태"""
+
+    def __init__(self):
+        self.pending_turns = []
+        self.escalating = False
+        self.lock = threading.Lock()
+
+
+class QuestEngine:
+    """참여자별로 LLM 확인 대기 턴을 모으며 로컬 판정 후 필요한 경우에만 LLM으로 확인
+
+    escalate(turns, quests)는 판정되지 않은 퀘스트 중 완료된 ID 리스트를 반환한다.
+    """
+
+    def __init__(self, escalate, batch_turns=3, max_participants=1000, max_pending_turns=12):
+        self.escalate = escalate
+        self.batch_turns = batch_turns
+        self.max_pending_turns = max(batch_turns, max_pending_turns)
+        self.max_participants = max_participants
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def analyze(self, participant_id, user_message, bot_response, active_quests):
+        """이번 턴으로 완료된 퀘스트 분석 결과 반환"""
+        started = time.perf_counter()
+        state = self._state(participant_id)
+
+        # 참여자 ID가 없으면 상태가 이어지지 않으므로 모으지 않고 바로 확인
+        batch_turns = self.batch_turns if participant_id is not None else 1
+
+        with state.lock:
+            # 완료 여부는 클라이언트 기준: 새로고침이나 체크 해제로 다시 활성이 된 퀘스트도 다시 판정
+            quests = list(active_quests)
+            # 의사 응답의 키워드로 환자 퀘스트가 완료되지 않도록 환자 발화만 검사
+            keyword_hits = get_quest_matcher(quests).match_labels(user_message)
+            completed = {
+                quest_id for quest_id, hits in keyword_hits.items()
+                if any(len(keyword) >= MIN_DECISIVE_KEYWORD_CHARS for _, keyword in hits)
+            }
+
+            undecided = [quest for quest in quests if quest['id'] not in completed]
+            state.pending_turns.append({'user_message': user_message, 'bot_response': bot_response})
+            del state.pending_turns[:-self.max_pending_turns]
+
+            turns = None
+            if undecided and len(state.pending_turns) >= batch_turns and not state.escalating:
+                turns = state.pending_turns
+                state.pending_turns = []
+                state.escalating = True
+            elif not undecided:
+                state.pending_turns = []
+
+        escalated = False
+        if turns is not None:
+            escalated_ids = None
+            try:
+                undecided_ids = {quest['id'] for quest in undecided}
+                escalated_ids = {quest_id for quest_id in self.escalate(turns, undecided) if quest_id in undecided_ids}
+            except Exception as e:
+                # 키워드 판정 결과는 그대로 돌려주고, 모아둔 턴은 다음 확인 때 다시 보냄
+                logger.warning("퀘스트 LLM 확인 실패, 다음 턴에 다시 시도: %s", e)
+            with state.lock:
+                state.escalating = False
+                if escalated_ids is None:
+                    state.pending_turns = (turns + state.pending_turns)[-self.max_pending_turns:]
+                else:
+                    escalated = True
+                    completed |= escalated_ids
+
+        return {
+            'completed_quests': [quest['id'] for quest in quests if quest['id'] in completed],
+            'keyword_hits': keyword_hits,
+            'escalated': escalated,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def reset(self, participant_id):
+        with self._lock:
+            self._states.pop(participant_id, None)
+
+    def _state(self, participant_id):
+        if participant_id is None:
+            # 참여자 ID가 없으면 상태를 공유하지 않음
+            return QuestState()
+        with self._lock:
+            state = self._states.get(participant_id)
+            if state is None:
+                state = QuestState()
+                self._states[participant_id] = state
+            self._states.move_to_end(participant_id)
+            while len(self._states) > self.max_participants:
+                self._states.popitem(last=False)
+            return state
@@ -399,11 +399,18 @@ class RetryChatInterface {
         }
         
         try {
+            const userData = JSON.parse(localStorage.getItem('userData') || '{}');
+            const participantId = userData.participantId || null;
+
             await fetch(`${this.apiBaseUrl}/api/clear`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                }
+                },
+                body: JSON.stringify({
+                    participant_id: participantId,
+                    page_type: 'retry'
+                })
             });
 
             const messages = this.chatMessages.querySelectorAll('.message');
@@ -52,8 +52,12 @@ else
     echo "✅ 포트 5001 사용"
 fi
 
-# 백엔드 서버를 백그라운드에서 실행
-python app.py &
+# 백엔드 서버를 백그라운드에서 실행 (gevent가 설치되어 있으면 비동기 서버 사용)
+if python -c "import gevent" 2>/dev/null; then
+    python serve.py &
+else
+    python app.py &
+fi
 BACKEND_PID=$!
 
 # 서버 시작 대기
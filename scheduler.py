@@ -0,0 +1,316 @@
+"""외부 API(OpenAI, ElevenLabs) 호출 우선순위 스케줄러
+
+모든 업스트림 호출은 시작 전에 acquire()로 실행 슬롯을 받는다.
+- 우선순위 클래스: interactive(채팅, TTS) > analysis(퀘스트 분석, 대화 요약) > batch(평가, 치트시트, 음성 분석)
+- 클래스별 동시 실행 수 제한
+- 업스트림별 전체 동시 실행 수 제한 (max_in_flight)
+- API 키별 토큰 버킷 (분당 요청 수, 분당 토큰 수)
+  낮은 클래스는 업스트림 동시 실행 수와 버킷에 reserve 비율만큼 여유를 남겨야 시작할 수 있고,
+  같은 업스트림을 기다리는 더 높은 우선순위 요청이 있으면 (속도 제한 설정과 관계없이) 양보한다.
+- 부하 차단: shed=True 클래스는 대기열이 가득 차거나 max_wait 안에 시작하지 못하면
+  SchedulerSaturated를 내고, 앱은 이를 503 + Retry-After로 응답한다.
+  이미 접수된 백그라운드 작업은 patient()로 감싸 차단 없이 기다리게 한다.
+"""
+import hashlib
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+from metrics import SCHEDULER_QUEUED, SCHEDULER_RUNNING, SCHEDULER_SHED, SCHEDULER_WAIT
+
+
+class SchedulerSaturated(Exception):
+    """실행 슬롯을 받지 못함 (부하 차단 또는 대기 시간 초과)"""
+
+    def __init__(self, class_name, retry_after):
+        super().__init__(f"{class_name} 작업이 몰려 처리할 수 없습니다. {retry_after}초 후 다시 시도해주세요.")
+        self.class_name = class_name
+        self.retry_after = retry_after
+
+
+class PriorityClass:
+    """우선순위 클래스 설정 (priority가 작을수록 먼저)"""
+
+    def __init__(self, name, priority, max_concurrency, max_queue=None, max_wait=None, reserve=0.0, shed=False):
+        self.name = name
+        self.priority = priority
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.reserve = reserve
+        self.shed = shed
+
+
+class TokenBucket:
+    """초당 rate만큼 채워지고 capacity까지 쌓이는 토큰 버킷 (잠금은 호출자가 관리)"""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _needed(self, amount, reserve):
+        # 버킷보다 큰 요청도 가득 찬 버킷이면 시작할 수 있게 함 (영원히 기다리지 않도록)
+        return min(self.capacity, amount + self.capacity * reserve)
+
+    def can_take(self, amount, reserve):
+        return self.tokens >= self._needed(amount, reserve)
+
+    def wait_time(self, amount, reserve):
+        return max(0.0, (self._needed(amount, reserve) - self.tokens) / self.rate)
+
+    def take(self, amount):
+        self.tokens -= min(float(amount), self.capacity)
+
+
+class RateLimit:
+    """API 키 하나의 분당 요청/토큰 한도 (0이면 해당 한도 없음)"""
+
+    def __init__(self, label, requests_per_minute=0, tokens_per_minute=0):
+        self.label = label
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+
+    def _buckets(self, cost):
+        if self.requests:
+            yield self.requests, 1
+        if self.tokens:
+            yield self.tokens, cost
+
+    def refill(self, now):
+        for bucket, _ in self._buckets(0):
+            bucket.refill(now)
+
+    def can_take(self, cost, reserve):
+        return all(bucket.can_take(amount, reserve) for bucket, amount in self._buckets(cost))
+
+    def wait_time(self, cost, reserve):
+        return max((bucket.wait_time(amount, reserve) for bucket, amount in self._buckets(cost)), default=0.0)
+
+    def take(self, cost):
+        for bucket, amount in self._buckets(cost):
+            bucket.take(amount)
+
+    def stats(self):
+        return {
+            "label": self.label,
+            "requests_available": round(self.requests.tokens, 1) if self.requests else None,
+            "requests_per_minute": self.requests.capacity if self.requests else None,
+            "tokens_available": round(self.tokens.tokens) if self.tokens else None,
+            "tokens_per_minute": self.tokens.capacity if self.tokens else None
+        }
+
+
+def key_label(upstream, api_key):
+    """통계에 표시할 API 키 구분자 (키 원문은 남기지 않음)"""
+    if not api_key:
+        return upstream
+    return f"{upstream}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:8]}"
+
+
+class Ticket:
+    """받은 실행 슬롯. release()는 여러 번 불러도 한 번만 반납"""
+
+    def __init__(self, scheduler, priority_class, upstream):
+        self._scheduler = scheduler
+        self.priority_class = priority_class
+        self.upstream = upstream
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._scheduler._release(self.priority_class, self.upstream)
+
+    def wrap_stream(self, chunks):
+        """스트리밍 응답이 끝날 때(또는 중간에 닫힐 때) 슬롯 반납"""
+        try:
+            yield from chunks
+        finally:
+            self.release()
+
+
+class _Waiter:
+    __slots__ = ("order", "priority_class", "upstream", "cost")
+
+    def __init__(self, order, priority_class, upstream, cost):
+        self.order = order
+        self.priority_class = priority_class
+        self.upstream = upstream
+        self.cost = cost
+
+
+class UpstreamScheduler:
+    """우선순위 클래스별 동시 실행 수와 API 키별 속도 제한을 함께 적용"""
+
+    def __init__(self, classes, endpoint_classes, default_class):
+        self.classes = {priority_class.name: priority_class for priority_class in classes}
+        self.endpoint_classes = dict(endpoint_classes)
+        self.default_class = default_class
+        self._limits = {}
+        self._max_in_flight = {}
+        self._in_flight = {}
+        self._running = {name: 0 for name in self.classes}
+        self._waiters = []
+        self._order = itertools.count()
+        self._shed = {name: 0 for name in self.classes}
+        self._condition = threading.Condition()
+        self._local = threading.local()
+
+    def add_limit(self, upstream, api_key, requests_per_minute=0, tokens_per_minute=0, max_in_flight=0):
+        """업스트림 API 키의 분당 한도와 전체 동시 실행 수 등록 (0이면 해당 한도 없음)"""
+        if requests_per_minute or tokens_per_minute:
+            self._limits[upstream] = RateLimit(key_label(upstream, api_key), requests_per_minute, tokens_per_minute)
+        if max_in_flight:
+            self._max_in_flight[upstream] = max_in_flight
+
+    def class_for(self, endpoint):
+        # 형식 교정 호출(<endpoint>_repair)은 원래 호출과 같은 클래스
+        base = endpoint[:-len("_repair")] if endpoint.endswith("_repair") else endpoint
+        return self.classes[self.endpoint_classes.get(base, self.default_class)]
+
+    @contextmanager
+    def patient(self):
+        """이 블록 안의 호출은 부하 차단 없이 슬롯이 날 때까지 기다림 (이미 접수된 백그라운드 작업용)"""
+        previous = getattr(self._local, "patient", False)
+        self._local.patient = True
+        try:
+            yield
+        finally:
+            self._local.patient = previous
+
+    @contextmanager
+    def slot(self, endpoint, upstream, cost=0):
+        """with 블록 동안 실행 슬롯 보유"""
+        ticket = self.acquire(endpoint, upstream, cost)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def acquire(self, endpoint, upstream, cost=0):
+        """실행 슬롯을 받아 Ticket 반환. 받지 못하면 SchedulerSaturated"""
+        priority_class = self.class_for(endpoint)
+        limit = self._limits.get(upstream)
+        patient = getattr(self._local, "patient", False)
+        shed = priority_class.shed and not patient
+        max_wait = None if patient else priority_class.max_wait
+        started = time.monotonic()
+        deadline = started + max_wait if max_wait is not None else None
+
+        with self._condition:
+            if shed and priority_class.max_queue is not None:
+                queued = sum(1 for waiter in self._waiters if waiter.priority_class is priority_class)
+                if queued >= priority_class.max_queue and not self._can_start(None, priority_class, upstream, cost):
+                    raise self._saturated(priority_class, limit, cost)
+            waiter = _Waiter(next(self._order), priority_class, upstream, cost)
+            self._waiters.append(waiter)
+            SCHEDULER_QUEUED.inc(priority_class.name)
+            try:
+                while True:
+                    now = time.monotonic()
+                    if limit:
+                        limit.refill(now)
+                    if self._can_start(waiter, priority_class, upstream, cost):
+                        break
+                    timeout = None
+                    # 버킷이 부족할 때만 채워질 시각까지 기다리고, 그 외에는 슬롯 반납 알림을 기다림
+                    if (limit and self._running[priority_class.name] < priority_class.max_concurrency
+                            and not limit.can_take(cost, priority_class.reserve)):
+                        timeout = limit.wait_time(cost, priority_class.reserve)
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0 or (shed and timeout is not None and timeout > remaining
+                                               and self._first_in_line(waiter)):
+                            raise self._saturated(priority_class, limit, cost)
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                    self._condition.wait(timeout)
+                if limit:
+                    limit.take(cost)
+                self._running[priority_class.name] += 1
+                self._in_flight[upstream] = self._in_flight.get(upstream, 0) + 1
+            finally:
+                self._waiters.remove(waiter)
+                SCHEDULER_QUEUED.dec(priority_class.name)
+                # 대기열이 바뀌었으므로 양보하던 낮은 우선순위 요청이 다시 확인하도록 깨움
+                self._condition.notify_all()
+
+        SCHEDULER_RUNNING.inc(priority_class.name)
+        SCHEDULER_WAIT.observe(time.monotonic() - started, priority_class.name)
+        return Ticket(self, priority_class, upstream)
+
+    def _can_start(self, waiter, priority_class, upstream, cost):
+        if self._running[priority_class.name] >= priority_class.max_concurrency:
+            return False
+        max_in_flight = self._max_in_flight.get(upstream)
+        if max_in_flight:
+            # 낮은 클래스는 reserve 비율만큼 동시 실행 자리를 높은 클래스용으로 남김
+            share = max(1, int(max_in_flight * (1 - priority_class.reserve)))
+            if self._in_flight.get(upstream, 0) >= share:
+                return False
+        limit = self._limits.get(upstream)
+        if limit is not None and not limit.can_take(cost, priority_class.reserve):
+            return False
+        # 같은 업스트림을 기다리는 더 높은 우선순위 요청에 양보
+        return not any(
+            other.upstream == upstream and other.priority_class.priority < priority_class.priority
+            and self._running[other.priority_class.name] < other.priority_class.max_concurrency
+            for other in self._waiters if other is not waiter
+        )
+
+    def _first_in_line(self, waiter):
+        # 앞선 대기자가 없어 토큰 버킷 대기 시간만으로 시작 시각을 알 수 있는 경우
+        return not any(
+            other.upstream == waiter.upstream and other.order < waiter.order for other in self._waiters
+        )
+
+    def _saturated(self, priority_class, limit, cost):
+        self._shed[priority_class.name] += 1
+        SCHEDULER_SHED.inc(priority_class.name)
+        retry_after = priority_class.max_wait or 1
+        if limit:
+            retry_after = max(retry_after, limit.wait_time(cost, priority_class.reserve))
+        return SchedulerSaturated(priority_class.name, max(1, int(retry_after + 0.999)))
+
+    def _release(self, priority_class, upstream):
+        SCHEDULER_RUNNING.dec(priority_class.name)
+        with self._condition:
+            self._running[priority_class.name] -= 1
+            self._in_flight[upstream] -= 1
+            self._condition.notify_all()
+
+    def stats(self):
+        with self._condition:
+            now = time.monotonic()
+            for limit in self._limits.values():
+                limit.refill(now)
+            queued = {}
+            for waiter in self._waiters:
+                queued[waiter.priority_class.name] = queued.get(waiter.priority_class.name, 0) + 1
+            return {
+                "classes": {
+                    name: {
+                        "priority": priority_class.priority,
+                        "running": self._running[name],
+                        "queued": queued.get(name, 0),
+                        "max_concurrency": priority_class.max_concurrency,
+                        "max_queue": priority_class.max_queue,
+                        "shed": self._shed[name]
+                    }
+                    for name, priority_class in self.classes.items()
+                },
+                "upstreams": {
+                    upstream: {
+                        "in_flight": self._in_flight.get(upstream, 0),
+                        "max_in_flight": self._max_in_flight.get(upstream)
+                    }
+                    for upstream in sorted(set(self._in_flight) | set(self._max_in_flight))
+                },
+                "rate_limits": {upstream: limit.stats() for upstream, limit in self._limits.items()}
+            }
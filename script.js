@@ -667,12 +667,19 @@ class VoiceChatInterface {
         }
         
         try {
+            const userData = JSON.parse(localStorage.getItem('userData') || '{}');
+            const participantId = userData.participantId || null;
+
             // 서버에 대화 초기화 요청
             await fetch(`${this.apiBaseUrl}/api/clear`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
-                }
+                },
+                body: JSON.stringify({
+                    participant_id: participantId,
+                    page_type: 'chat'
+                })
             });
 
             // 채팅 메시지 초기화 (첫 번째 메시지 제외)
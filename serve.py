@@ -0,0 +1,39 @@
+"""운영용 비동기 서버 실행
+
+gevent로 표준 라이브러리의 소켓/스레드/sleep을 협력형(코루틴)으로 바꾼 뒤 app을 불러온다.
+OpenAI/ElevenLabs 호출(requests 기반)이 응답을 기다리는 동안 다른 요청을 처리하므로,
+하나의 프로세스가 수백 개의 요청을 동시에 붙잡고 있을 수 있다.
+라우트와 JSON 형식은 app.py 그대로 사용한다.
+패치되지 않는 블로킹 디스크 작업(SQLite 카탈로그/저장소/카세트 쿼리, 대화 로그 fsync)은
+blocking.run_blocking으로 gevent 허브의 스레드풀에서 실행되어 다른 연결을 멈추지 않는다.
+
+실행: python serve.py
+"""
+from gevent import monkey
+
+# 다른 모듈을 import하기 전에 패치해야 한다
+monkey.patch_all()
+
+import os  # noqa: E402
+
+from gevent.pool import Pool  # noqa: E402
+from gevent.pywsgi import WSGIServer  # noqa: E402
+
+from app import app, logger  # noqa: E402
+
+
+def main():
+    port = int(os.getenv('FLASK_PORT', 5001))
+    # 동시에 처리할 최대 요청 수 (초과 연결은 대기)
+    max_connections = int(os.getenv('SERVER_MAX_CONNECTIONS', 1000))
+
+    server = WSGIServer(('0.0.0.0', port), app, spawn=Pool(max_connections), log=None)
+    logger.info(f"비동기 서버가 포트 {port}에서 시작됩니다. (최대 동시 요청: {max_connections})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop(timeout=5)
+
+
+if __name__ == '__main__':
+    main()
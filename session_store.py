@@ -0,0 +1,109 @@
+"""참여자별 대화 세션 저장소"""
+import threading
+import time
+from collections import OrderedDict, deque
+
+
+class ConversationSession:
+    """참여자 한 명의 페이지별 대화 기록 (고정 크기 링 버퍼)"""
+
+    def __init__(self, key, max_messages):
+        self.key = key
+        self.messages = deque(maxlen=max_messages)
+        self.lock = threading.Lock()
+        self.last_access = time.monotonic()
+        # 오래된 대화 요약 (ContextManager가 관리)
+        self.summary = ""
+        self.pending_compaction = []
+        self.summarizing = False
+
+    def append(self, role, content):
+        """메시지 추가. 버퍼가 가득 차서 밀려난 메시지가 있으면 반환"""
+        with self.lock:
+            evicted = None
+            if len(self.messages) == self.messages.maxlen:
+                evicted = self.messages[0]
+            self.messages.append({"role": role, "content": content})
+            self.last_access = time.monotonic()
+            return evicted
+
+    def snapshot(self):
+        """현재 대화 기록 복사본 반환"""
+        with self.lock:
+            self.last_access = time.monotonic()
+            return list(self.messages)
+
+    def context_snapshot(self):
+        """요약, 요약 대기 메시지, 현재 대화 기록을 같은 시점 기준으로 함께 반환"""
+        with self.lock:
+            self.last_access = time.monotonic()
+            return self.summary, list(self.pending_compaction), list(self.messages)
+
+    def clear(self):
+        with self.lock:
+            self.messages.clear()
+            self.summary = ""
+            self.pending_compaction = []
+
+
+class SessionStore:
+    """(participant_id, page_type) 키로 세션을 관리하는 LRU/TTL 저장소
+
+    저장소 전체 잠금은 세션 조회/생성 시에만 짧게 잡고,
+    메시지 추가/조회는 세션별 잠금으로 처리한다.
+    """
+
+    def __init__(self, max_sessions=1000, max_messages=10, idle_ttl=3600):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(participant_id, page_type):
+        return (participant_id or "anonymous", page_type or "chat")
+
+    def get(self, participant_id, page_type="chat"):
+        """세션 조회 (없으면 생성)"""
+        key = self.make_key(participant_id, page_type)
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and self._is_expired(session):
+                del self._sessions[key]
+                session = None
+            if session is None:
+                session = ConversationSession(key, self.max_messages)
+                self._sessions[key] = session
+            else:
+                self._sessions.move_to_end(key)
+            self._evict()
+            return session
+
+    def clear(self, participant_id=None, page_type=None):
+        """세션 초기화. page_type이 없으면 해당 참여자의 모든 세션을 삭제"""
+        with self._lock:
+            if page_type is not None:
+                keys = [self.make_key(participant_id, page_type)]
+            else:
+                participant_key = self.make_key(participant_id, None)[0]
+                keys = [key for key in self._sessions if key[0] == participant_key]
+            for key in keys:
+                self._sessions.pop(key, None)
+            return len(keys)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def _is_expired(self, session):
+        return self.idle_ttl and time.monotonic() - session.last_access > self.idle_ttl
+
+    def _evict(self):
+        # 가장 오래 사용되지 않은 세션부터 정리 (잠금을 잡은 상태에서 호출)
+        while self._sessions:
+            oldest_key, oldest = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_sessions or self._is_expired(oldest):
+                del self._sessions[oldest_key]
+            else:
+                break
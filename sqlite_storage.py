@@ -0,0 +1,321 @@
+"""SQLite 저장소 (WAL 모드)
+
+쓰기는 행 하나를 추가하는 INSERT로, 조회는 (참여자, 종류, 날짜) 인덱스 조회로 처리한다.
+WAL 모드와 busy_timeout으로 여러 워커 프로세스가 같은 파일을 동시에 사용할 수 있다.
+"""
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from artifacts import new_artifact_filename
+from blocking import run_blocking
+from storage import DOCUMENT_KINDS, RecordFilter, Storage, conversation_log_name, quest_log_name, today
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_info (
+    participant_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS log_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    participant_id TEXT,
+    stream TEXT NOT NULL,
+    page_type TEXT,
+    entry_date TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_log_entries_lookup
+    ON log_entries (participant_id, stream, page_type, entry_date, id);
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    participant_id TEXT,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    doc_date TEXT,
+    created_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_name ON documents (participant_id, name);
+CREATE INDEX IF NOT EXISTS idx_documents_lookup ON documents (participant_id, kind, doc_date, name);
+"""
+
+STREAM_CONVERSATION = "conversation"
+STREAM_QUEST_ANALYSIS = "quest_analysis"
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+class SQLiteStorage(Storage):
+    """대화/퀘스트 로그는 항목별 행, 문서는 문서별 행으로 저장하는 SQLite 저장소"""
+
+    name = "sqlite"
+
+    def __init__(self, db_path, busy_timeout_ms=5000):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA busy_timeout={int(busy_timeout_ms)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def save_user_info(self, participant_id, data):
+        self._execute(
+            "INSERT OR REPLACE INTO user_info VALUES (?, ?, ?)",
+            (participant_id, _dumps(data), datetime.now().isoformat()))
+
+    def get_user_info(self, participant_id):
+        row = self._fetchone("SELECT data FROM user_info WHERE participant_id = ?", (participant_id,))
+        return json.loads(row[0]) if row else {}
+
+    def append_conversation(self, participant_id, page_type, entry):
+        self._append_entry(participant_id, STREAM_CONVERSATION, page_type, entry)
+
+    def get_conversation(self, participant_id, page_type, date):
+        rows = self._fetchall(
+            "SELECT data FROM log_entries WHERE participant_id IS ? AND stream = ? AND page_type = ? "
+            "AND entry_date = ? ORDER BY id",
+            (participant_id, STREAM_CONVERSATION, page_type, date))
+        return [json.loads(row[0]) for row in rows] if rows else None
+
+    def latest_conversation(self, participant_id):
+        # 파일 백엔드와 같이 로그 이름(페이지, 날짜) 순으로 가장 마지막 로그
+        row = self._fetchone(
+            "SELECT page_type, entry_date FROM log_entries WHERE participant_id IS ? AND stream = ? "
+            "GROUP BY page_type, entry_date ORDER BY page_type DESC, entry_date DESC LIMIT 1",
+            (participant_id, STREAM_CONVERSATION))
+        if row is None:
+            return []
+        return self.get_conversation(participant_id, row[0], row[1])
+
+    def save_document(self, participant_id, kind, data):
+        # 파일 백엔드와 같은 이름 규칙 (여러 프로세스가 동시에 저장해도 겹치지 않음)
+        name = new_artifact_filename(kind, "json")[:-len(".json")]
+        self._insert_document(participant_id, kind, name, name[len(kind) + 1:][:8], data)
+        return name
+
+    def list_documents(self, participant_id, kind, date=None):
+        sql = "SELECT data FROM documents WHERE participant_id IS ? AND kind = ?"
+        params = [participant_id, kind]
+        if date is not None:
+            sql += " AND doc_date = ?"
+            params.append(date)
+        return [json.loads(row[0]) for row in self._fetchall(sql + " ORDER BY name", params)]
+
+    def latest_document(self, participant_id, kind):
+        row = self._fetchone(
+            "SELECT data FROM documents WHERE participant_id IS ? AND kind = ? ORDER BY name DESC LIMIT 1",
+            (participant_id, kind))
+        return json.loads(row[0]) if row else None
+
+    def append_quest_analysis(self, participant_id, entry):
+        self._append_entry(participant_id, STREAM_QUEST_ANALYSIS, None, entry)
+
+    def list_artifacts(self, participant_id):
+        return [artifact for artifact, _ in self._artifact_index(participant_id)]
+
+    def read_artifact(self, participant_id, filename):
+        for artifact, locator in self._artifact_index(participant_id):
+            if artifact["filename"] != filename:
+                continue
+            if locator[0] == "user_info":
+                row = self._fetchone("SELECT data FROM user_info WHERE participant_id = ?", (participant_id,))
+                return row[0] if row else None
+            if locator[0] == "document":
+                row = self._fetchone(
+                    "SELECT data FROM documents WHERE participant_id IS ? AND name = ?", (participant_id, locator[1]))
+                return row[0] if row else None
+            # 로그는 파일 백엔드와 같은 JSONL 형식으로 반환
+            _, stream, page_type, date = locator
+            rows = self._fetchall(
+                "SELECT data FROM log_entries WHERE participant_id IS ? AND stream = ? AND page_type IS ? "
+                "AND entry_date = ? ORDER BY id",
+                (participant_id, stream, page_type, date))
+            return "".join(row[0] + "\n" for row in rows)
+        return None
+
+    def participants(self):
+        rows = self._fetchall(
+            "SELECT participant_id FROM user_info UNION SELECT participant_id FROM log_entries "
+            "WHERE participant_id IS NOT NULL UNION SELECT participant_id FROM documents "
+            "WHERE participant_id IS NOT NULL ORDER BY 1", ())
+        return [row[0] for row in rows]
+
+    def iter_records(self, record_filter=None):
+        record_filter = record_filter or RecordFilter()
+        participant_clause, participant_params = "", []
+        if record_filter.participant_id is not None:
+            participant_clause, participant_params = " AND participant_id = ?", [record_filter.participant_id]
+
+        if record_filter.matches_kind("user_info"):
+            for participant_id, data in self._iter_rows(
+                    "SELECT participant_id, participant_id, data FROM user_info WHERE 1=1" + participant_clause,
+                    participant_params, "participant_id"):
+                yield {"participant_id": participant_id, "kind": "user_info", "name": None,
+                       "page_type": None, "date": None, "data": json.loads(data)}
+
+        streams = [stream for stream in (STREAM_CONVERSATION, STREAM_QUEST_ANALYSIS) if record_filter.matches_kind(stream)]
+        if streams:
+            sql = (f"SELECT id, participant_id, stream, page_type, entry_date, data FROM log_entries "
+                   f"WHERE stream IN ({','.join('?' * len(streams))})" + participant_clause)
+            params = streams + participant_params
+            sql, params = self._date_clause(sql, params, "entry_date", record_filter)
+            if record_filter.page_type is not None:
+                sql += " AND (stream != ? OR page_type = ?)"
+                params += [STREAM_CONVERSATION, record_filter.page_type]
+            for participant_id, stream, page_type, date, data in self._iter_rows(sql, params, "id"):
+                if stream == STREAM_CONVERSATION:
+                    name = conversation_log_name(participant_id, page_type, date)
+                else:
+                    name = quest_log_name(date)
+                yield {"participant_id": participant_id, "kind": stream, "name": name,
+                       "page_type": page_type, "date": date, "data": json.loads(data)}
+
+        kinds = [kind for kind in DOCUMENT_KINDS if record_filter.matches_kind(kind)]
+        if kinds:
+            sql = (f"SELECT id, participant_id, kind, name, doc_date, data FROM documents "
+                   f"WHERE kind IN ({','.join('?' * len(kinds))})" + participant_clause)
+            params = kinds + participant_params
+            sql, params = self._date_clause(sql, params, "doc_date", record_filter)
+            for participant_id, kind, name, date, data in self._iter_rows(sql, params, "id"):
+                yield {"participant_id": participant_id, "kind": kind, "name": name,
+                       "page_type": None, "date": date, "data": json.loads(data)}
+
+    @staticmethod
+    def _date_clause(sql, params, column, record_filter):
+        if record_filter.start_date is not None:
+            sql += f" AND ({column} IS NULL OR {column} >= ?)"
+            params = params + [record_filter.start_date]
+        if record_filter.end_date is not None:
+            sql += f" AND ({column} IS NULL OR {column} <= ?)"
+            params = params + [record_filter.end_date]
+        return sql, params
+
+    def import_records(self, records, batch_size=500):
+        """iter_records 형식의 레코드를 트랜잭션 단위로 일괄 저장. 저장한 개수 반환"""
+        imported = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                imported += self._import_batch(batch)
+                batch = []
+        if batch:
+            imported += self._import_batch(batch)
+        return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _import_batch(self, records):
+        with self._lock:
+            run_blocking(self._import_transaction, records)
+        return len(records)
+
+    def _import_transaction(self, records):
+        # 잠금을 잡은 상태에서 호출
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for record in records:
+                self._import_record(record)
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def _import_record(self, record):
+        # 잠금을 잡은 상태에서 호출
+        kind = record["kind"]
+        data = record["data"]
+        participant_id = record["participant_id"]
+        if kind == "user_info":
+            self._conn.execute(
+                "INSERT OR REPLACE INTO user_info VALUES (?, ?, ?)",
+                (participant_id, _dumps(data), data.get("created_at") or datetime.now().isoformat()))
+        elif kind in (STREAM_CONVERSATION, STREAM_QUEST_ANALYSIS):
+            self._conn.execute(
+                "INSERT INTO log_entries (participant_id, stream, page_type, entry_date, created_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (participant_id, kind, record["page_type"], record["date"] or today(),
+                 data.get("timestamp") or datetime.now().isoformat(), _dumps(data)))
+        else:
+            # 같은 문서를 다시 가져오면 덮어씀 (마이그레이션 재실행 대비)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO documents (participant_id, kind, name, doc_date, created_at, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (participant_id, kind, record["name"], record["date"], datetime.now().isoformat(), _dumps(data)))
+
+    def _append_entry(self, participant_id, stream, page_type, entry):
+        self._execute(
+            "INSERT INTO log_entries (participant_id, stream, page_type, entry_date, created_at, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (participant_id, stream, page_type, today(), datetime.now().isoformat(), _dumps(entry)))
+
+    def _insert_document(self, participant_id, kind, name, date, data):
+        self._execute(
+            "INSERT INTO documents (participant_id, kind, name, doc_date, created_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+            (participant_id, kind, name, date, datetime.now().isoformat(), _dumps(data)))
+
+    def _artifact_index(self, participant_id):
+        """파일 백엔드와 같은 이름의 가상 산출물 목록과 각 산출물의 조회 위치"""
+        index = []
+        row = self._fetchone(
+            "SELECT length(data), updated_at FROM user_info WHERE participant_id IS ?", (participant_id,))
+        if row:
+            index.append((self._artifact("user_info.json", "user_info", row[0], row[1]), ("user_info",)))
+        for stream, page_type, date, size, modified in self._fetchall(
+                "SELECT stream, page_type, entry_date, sum(length(data)), max(created_at) FROM log_entries "
+                "WHERE participant_id IS ? GROUP BY stream, page_type, entry_date", (participant_id,)):
+            if stream == STREAM_CONVERSATION:
+                filename, kind = conversation_log_name(participant_id, page_type, date) + ".jsonl", "conversation_log"
+            else:
+                filename, kind = quest_log_name(date) + ".json", "quest_log"
+            index.append((self._artifact(filename, kind, size, modified), ("log", stream, page_type, date)))
+        for name, kind, size, modified in self._fetchall(
+                "SELECT name, kind, length(data), created_at FROM documents WHERE participant_id IS ?",
+                (participant_id,)):
+            index.append((self._artifact(name + ".json", kind, size, modified), ("document", name)))
+        return sorted(index, key=lambda item: item[0]["filename"])
+
+    @staticmethod
+    def _artifact(filename, kind, size, modified):
+        return {"filename": filename, "size": size or 0, "modified": modified,
+                "type": "json" if filename.endswith(".json") else "other", "kind": kind}
+
+    # gevent 서버(serve.py)에서는 쿼리가 이벤트 루프를 막지 않도록 스레드풀에서 실행
+    def _execute(self, sql, params):
+        with self._lock:
+            run_blocking(self._conn.execute, sql, params)
+
+    def _fetchone(self, sql, params):
+        with self._lock:
+            return run_blocking(lambda: self._conn.execute(sql, params).fetchone())
+
+    def _fetchall(self, sql, params):
+        with self._lock:
+            return run_blocking(lambda: self._conn.execute(sql, params).fetchall())
+
+    def _iter_rows(self, sql, params, key, batch_size=500):
+        """key 순서로 batch_size개씩 나눠 조회 (sql의 첫 번째 열은 key, 생성하는 행에서는 제외)
+
+        스트리밍 내보내기 동안 공유 연결에 커서를 열어 두면 읽기 트랜잭션이 다운로드 내내 유지되어
+        WAL 체크포인트를 막으므로, 페이지마다 key > 마지막 값 조건으로 쿼리를 새로 실행한다.
+        """
+        last = None
+        while True:
+            page_sql, page_params = sql, list(params)
+            if last is not None:
+                page_sql += f" AND {key} > ?"
+                page_params.append(last)
+            rows = self._fetchall(page_sql + f" ORDER BY {key} LIMIT {int(batch_size)}", page_params)
+            for row in rows:
+                yield row[1:]
+            if len(rows) < batch_size:
+                return
+            last = rows[-1][0]
@@ -0,0 +1,135 @@
+"""참여자 데이터 저장소 인터페이스
+
+사용자 정보, 대화 로그, 피드백/치트시트/음성 분석 문서, 퀘스트 분석 로그를 저장한다.
+- file: 기존 logs/<participant_id>/ 파일 구조 (file_storage.FileStorage)
+- sqlite: WAL 모드 SQLite 데이터베이스 (sqlite_storage.SQLiteStorage)
+
+오디오(mp3) 파일은 두 백엔드 모두 파일로 저장하며 이 인터페이스에 포함하지 않는다.
+"""
+import os
+from datetime import datetime
+
+# save_document로 저장하는 문서 종류
+DOCUMENT_KINDS = ("feedback", "cheatsheet", "voice_analysis")
+# iter_records가 생성하는 레코드 종류
+RECORD_KINDS = ("user_info", "conversation", "quest_analysis") + DOCUMENT_KINDS
+
+
+def today():
+    return datetime.now().strftime("%Y%m%d")
+
+
+def conversation_log_name(participant_id, page_type, date):
+    """대화 로그 이름 (파일 백엔드의 파일명에서 확장자를 뺀 것)"""
+    if participant_id:
+        return f"medical_conversation_{page_type}_{date}"
+    return f"medical_conversation_{page_type}_unknown_{date}"
+
+
+def quest_log_name(date):
+    return f"quest_analysis_{date}"
+
+
+class RecordFilter:
+    """iter_records 조회 조건 (None인 조건은 적용하지 않음)
+
+    날짜가 없는 레코드(user_info)는 날짜 조건과 관계없이 포함하고,
+    page_type 조건은 대화 로그에만 적용한다.
+    """
+
+    def __init__(self, kinds=None, participant_id=None, start_date=None, end_date=None, page_type=None):
+        self.kinds = set(kinds) if kinds else None
+        self.participant_id = participant_id
+        self.start_date = start_date
+        self.end_date = end_date
+        self.page_type = page_type
+
+    def matches_kind(self, kind):
+        return self.kinds is None or kind in self.kinds
+
+    def matches_date(self, date):
+        if date is None:
+            return True
+        if self.start_date is not None and date < self.start_date:
+            return False
+        return self.end_date is None or date <= self.end_date
+
+    def matches_page_type(self, kind, page_type):
+        return self.page_type is None or kind != "conversation" or page_type == self.page_type
+
+
+class Storage:
+    """저장소 백엔드 공통 인터페이스"""
+
+    name = None
+
+    def save_user_info(self, participant_id, data):
+        raise NotImplementedError
+
+    def get_user_info(self, participant_id):
+        """사용자 정보 (없으면 빈 딕셔너리)"""
+        raise NotImplementedError
+
+    def append_conversation(self, participant_id, page_type, entry):
+        raise NotImplementedError
+
+    def get_conversation(self, participant_id, page_type, date):
+        """해당 날짜/페이지의 대화 로그 항목 리스트 (없으면 None)"""
+        raise NotImplementedError
+
+    def latest_conversation(self, participant_id):
+        """가장 최근 대화 로그 항목 리스트 (없으면 빈 리스트)"""
+        raise NotImplementedError
+
+    def save_document(self, participant_id, kind, data):
+        """문서 저장 후 문서 이름 반환"""
+        raise NotImplementedError
+
+    def list_documents(self, participant_id, kind, date=None):
+        """문서 데이터 리스트 (이름 순)"""
+        raise NotImplementedError
+
+    def latest_document(self, participant_id, kind):
+        """가장 최근 문서 데이터 (없으면 None)"""
+        raise NotImplementedError
+
+    def append_quest_analysis(self, participant_id, entry):
+        raise NotImplementedError
+
+    def list_artifacts(self, participant_id):
+        """디버그용 산출물 목록 [{'filename', 'size', 'modified', 'type', 'kind'}]"""
+        raise NotImplementedError
+
+    def read_artifact(self, participant_id, filename):
+        """디버그용 산출물 원문 (없으면 None)"""
+        raise NotImplementedError
+
+    def participants(self):
+        raise NotImplementedError
+
+    def iter_records(self, record_filter=None):
+        """저장된 데이터를 레코드 단위로 생성 (마이그레이션/내보내기용)
+
+        레코드: {'participant_id', 'kind', 'name', 'page_type', 'date', 'data'}
+        kind는 user_info, conversation, quest_analysis 또는 DOCUMENT_KINDS 중 하나이며,
+        conversation/quest_analysis는 로그 항목 하나가 레코드 하나다.
+        전체를 메모리에 올리지 않고 순차적으로 읽는다.
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """대기 중인 쓰기를 모두 반영"""
+
+    def close(self):
+        pass
+
+
+def create_storage(backend, root_dir, **options):
+    """설정 이름으로 저장소 백엔드 생성"""
+    if backend == "sqlite":
+        from sqlite_storage import SQLiteStorage
+        return SQLiteStorage(options.get("db_path") or os.path.join(root_dir, "storage.db"))
+    if backend == "file":
+        from file_storage import FileStorage
+        return FileStorage(root_dir, options["catalog"], options["log_writer"])
+    raise ValueError(f"알 수 없는 저장소 백엔드: {backend}")
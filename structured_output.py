@@ -0,0 +1,266 @@
+"""LLM JSON 응답 추출/복구/스키마 검증
+
+- extract_json_candidates: 문자열 안의 괄호는 무시하며 최상위 {...} 구간을 한 번의 선형 스캔으로 찾음
+- repair_json: 흔한 LLM JSON 오류(후행 쉼표, 작은따옴표 문자열, 문자열 안 줄바꿈,
+  True/False/None, 잘린 응답의 닫는 괄호 누락)를 한 번의 스캔으로 보정
+- validate: 엔드포인트별 스키마(필수 키/타입/허용 값) 검증
+"""
+import json
+
+GRADES = ("상", "중", "하")
+EVALUATION_CRITERIA = (
+    "symptom_location", "symptom_timing", "symptom_severity", "current_medication", "allergy_info",
+    "diagnosis_info", "prescription_info", "side_effects", "followup_plan", "emergency_plan"
+)
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+_CHEATSHEET_ITEMS = {"type": "array", "items": {"type": "object", "required": {"title": _STRING, "content": _STRING}}}
+
+# 스키마: type / required(키 -> 스키마) / optional / items(배열 원소) / values(객체 값) / enum
+SCHEMAS = {
+    "evaluation": {
+        "type": "object",
+        "required": {
+            "grades": {"type": "object",
+                       "required": {key: {"type": "string", "enum": GRADES} for key in EVALUATION_CRITERIA}},
+            "score_reasons": {"type": "object", "values": _STRING},
+            "improvement_tips": _STRING_LIST
+        }
+    },
+    "cheatsheet": {
+        "type": "object",
+        "required": {
+            "cheatsheet": {
+                "type": "object",
+                "required": {
+                    "title": _STRING,
+                    "script": _CHEATSHEET_ITEMS,
+                    "listening": _CHEATSHEET_ITEMS,
+                    "precautions": _CHEATSHEET_ITEMS
+                },
+                "optional": {"patient_info": {"type": "object"}}
+            }
+        }
+    },
+    "quest_result": {
+        "type": "object",
+        "required": {"completed_quests": _STRING_LIST}
+    },
+    "voice_analysis": {
+        "type": "object",
+        "required": {
+            "summary": _STRING,
+            "details": _STRING,
+            "confidence_score": {"type": "number"},
+            "positive_aspects": _STRING_LIST,
+            "suggestions": _STRING_LIST
+        }
+    },
+}
+
+_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "number": (int, float),
+    "boolean": bool,
+}
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+
+
+class StructuredOutputError(ValueError):
+    """JSON을 찾지 못했거나 스키마와 맞지 않는 응답"""
+
+
+def extract_json_candidates(text):
+    """최상위 JSON 객체 후보 문자열 생성 (닫히지 않은 마지막 객체도 포함)"""
+    depth = 0
+    start = None
+    in_string = False
+    escaped = False
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            # 객체 밖 문장의 따옴표는 무시
+            in_string = depth > 0
+        elif char == "{" or (char == "[" and depth):
+            if depth == 0:
+                start = index
+            depth += 1
+        elif char in "}]" and depth:
+            depth -= 1
+            if depth == 0:
+                yield text[start:index + 1]
+                start = None
+    if start is not None:
+        yield text[start:]
+
+
+def _strip_trailing_comma(out):
+    index = len(out) - 1
+    while index >= 0 and out[index].isspace():
+        index -= 1
+    if index >= 0 and out[index] == ",":
+        del out[index]
+
+
+def repair_json(text):
+    """흔한 JSON 형식 오류를 보정한 문자열 반환 (보정 후에도 올바르지 않을 수 있음)"""
+    out = []
+    closers = []
+    quote = None
+    escaped = False
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if quote:
+            if escaped:
+                # JSON에 없는 \' 이스케이프는 따옴표만 남김
+                if char == "'":
+                    out[-1] = "'"
+                else:
+                    out.append(char)
+                escaped = False
+            elif char == "\\":
+                out.append(char)
+                escaped = True
+            elif char == quote:
+                out.append('"')
+                quote = None
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            elif char == "\r":
+                out.append("\\r")
+            elif char == "\t":
+                out.append("\\t")
+            else:
+                out.append(char)
+        elif char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+            out.append(char)
+        elif char in "}]":
+            _strip_trailing_comma(out)
+            if closers:
+                closers.pop()
+            out.append(char)
+        elif char.isalpha():
+            end = index
+            while end < length and text[end].isalnum():
+                end += 1
+            word = text[index:end]
+            out.append(_LITERALS.get(word, word))
+            index = end
+            continue
+        else:
+            out.append(char)
+        index += 1
+
+    # 잘린 응답: 열린 문자열과 괄호를 닫음
+    if quote:
+        out.append('"')
+    _strip_trailing_comma(out)
+    out.extend(reversed(closers))
+    return "".join(out)
+
+
+def loads_json(text):
+    """LLM 응답에서 JSON 객체를 파싱 (그대로 → 후보 추출 → 보정 순서로 시도)"""
+    text = (text or "").strip()
+    try:
+        data = json.loads(text)
+        if isinstance(data, dict):
+            return data
+    except json.JSONDecodeError:
+        pass
+    for candidate in extract_json_candidates(text):
+        for attempt in (candidate, repair_json(candidate)):
+            try:
+                data = json.loads(attempt)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(data, dict):
+                return data
+    raise StructuredOutputError("응답에서 JSON 객체를 찾지 못했습니다.")
+
+
+def validate(data, schema, path="$"):
+    """스키마 위반 목록 반환 (없으면 빈 리스트)"""
+    expected = schema.get("type")
+    if expected:
+        valid = isinstance(data, _TYPES[expected]) and not (expected == "number" and isinstance(data, bool))
+        if not valid:
+            return [f"{path}: {expected} 타입이어야 합니다"]
+    if "enum" in schema and data not in schema["enum"]:
+        return [f"{path}: {'/'.join(schema['enum'])} 중 하나여야 합니다"]
+
+    errors = []
+    for key, sub_schema in schema.get("required", {}).items():
+        if key not in data:
+            errors.append(f"{path}.{key}: 필수 항목이 없습니다")
+        else:
+            errors.extend(validate(data[key], sub_schema, f"{path}.{key}"))
+    for key, sub_schema in schema.get("optional", {}).items():
+        if key in data:
+            errors.extend(validate(data[key], sub_schema, f"{path}.{key}"))
+    if "items" in schema:
+        for index, item in enumerate(data):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+    if "values" in schema:
+        for key, value in data.items():
+            errors.extend(validate(value, schema["values"], f"{path}.{key}"))
+    return errors
+
+
+def parse_structured(text, schema_name):
+    """응답을 파싱하고 스키마를 검증한 데이터 반환 (실패 시 StructuredOutputError)"""
+    data = loads_json(text)
+    errors = validate(data, SCHEMAS[schema_name])
+    if errors:
+        raise StructuredOutputError("; ".join(errors[:10]))
+    return data
+
+
+def schema_outline(schema):
+    """수정 요청 프롬프트에 넣을 스키마 형태 예시"""
+    if "enum" in schema:
+        return "|".join(schema["enum"])
+    kind = schema.get("type")
+    if kind == "object":
+        fields = {**schema.get("required", {}), **schema.get("optional", {})}
+        if not fields and "values" in schema:
+            return {"<key>": schema_outline(schema["values"])}
+        return {key: schema_outline(sub_schema) for key, sub_schema in fields.items()}
+    if kind == "array":
+        return [schema_outline(schema.get("items", {}))]
+    return {"string": "...", "number": 0, "boolean": False}.get(kind)
+
+
+def repair_messages(text, schema_name, error):
+    """형식만 고치는 저렴한 수정 호출용 메시지 (원래 프롬프트는 다시 보내지 않음)"""
+    outline = json.dumps(schema_outline(SCHEMAS[schema_name]), ensure_ascii=False, indent=2)
+    return [
+        {"role": "system", "content": "당신은 JSON 형식 교정기입니다. 내용은 바꾸지 말고 형식만 고쳐 JSON 객체 하나만 출력하세요."},
+        {"role": "user", "content": f"""다음 응답을 아래 스키마에 맞는 올바른 JSON으로 고쳐주세요.
+빠진 필수 항목은 원문 내용을 바탕으로 채우세요.
+
+오류: {error}
+
+스키마:
+{outline}
+
+원본 응답:
+{text}"""}
+    ]
@@ -0,0 +1,124 @@
+"""TTS 음성 캐시 (내용 해시 키 + 용량 제한 LRU)"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from artifacts import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
+
+BLOB_EXTENSION = ".mp3"
+
+
+def make_cache_key(text, voice_id, model_id, voice_settings):
+    """(텍스트, 음성 ID, 모델 ID, 음성 설정) 해시로 캐시 키 생성"""
+    payload = json.dumps({
+        "text": text,
+        "voice_id": voice_id,
+        "model_id": model_id,
+        "voice_settings": voice_settings
+    }, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSCache:
+    """디스크에 음성 파일을 저장하고 메모리 인덱스로 LRU 순서를 관리하는 캐시"""
+
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index = OrderedDict()  # key -> 파일 크기
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def get(self, key):
+        """캐시된 음성 바이트 반환 (없으면 None)"""
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+        try:
+            with open(self._blob_path(key), "rb") as f:
+                content = f.read()
+        except OSError:
+            # 외부에서 파일이 삭제된 경우 인덱스에서도 제거
+            with self._lock:
+                self._remove(key)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, key, content):
+        """음성 바이트 저장 후 용량 초과분을 오래된 순으로 제거"""
+        if len(content) > self.max_bytes:
+            return
+        try:
+            atomic_write_bytes(self._blob_path(key), content)
+        except OSError as e:
+            logger.error(f"TTS 캐시 저장 오류: {str(e)}")
+            return
+
+        with self._lock:
+            if key in self._index:
+                self._total_bytes -= self._index[key]
+            self._index[key] = len(content)
+            self._index.move_to_end(key)
+            self._total_bytes += len(content)
+            while self._total_bytes > self.max_bytes and len(self._index) > 1:
+                oldest_key = next(iter(self._index))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+    def _blob_path(self, key):
+        return os.path.join(self.cache_dir, key + BLOB_EXTENSION)
+
+    def _remove(self, key):
+        # 잠금을 잡은 상태에서 호출
+        size = self._index.pop(key, None)
+        if size is None:
+            return
+        self._total_bytes -= size
+        try:
+            os.remove(self._blob_path(key))
+        except OSError:
+            pass
+
+    def _load_index(self):
+        """기존 캐시 파일을 수정 시각 순으로 인덱스에 복원"""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            filepath = os.path.join(self.cache_dir, filename)
+            if filename.endswith(".tmp"):
+                os.remove(filepath)
+                continue
+            if not filename.endswith(BLOB_EXTENSION):
+                continue
+            stat = os.stat(filepath)
+            entries.append((stat.st_mtime, filename[:-len(BLOB_EXTENSION)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
@@ -0,0 +1,91 @@
+"""문장 단위 TTS 파이프라인 (LLM 스트리밍과 음성 합성을 병행)"""
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# 문장 종결 부호 뒤에 공백이 오거나, 줄바꿈이 나오면 문장 경계로 본다
+SENTENCE_BOUNDARY = re.compile(r'[.!?。！？…~]+(?=\s)|\n+')
+
+
+class SentenceSplitter:
+    """스트리밍 토큰을 누적하다가 완성된 문장 단위로 잘라내는 분할기"""
+
+    def __init__(self, min_chars=4):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token):
+        """토큰 추가 후 완성된 문장 리스트 반환"""
+        self._buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_BOUNDARY.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            # 너무 짧은 조각("음." 등)은 다음 문장과 합쳐서 합성
+            if len(candidate) < self.min_chars:
+                continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """남은 텍스트를 마지막 문장으로 반환"""
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        return [remainder] if remainder else []
+
+
+class SpeechPipeline:
+    """문장별 음성 합성을 동시에 실행하고, 결과는 문장 순서대로 내보내는 파이프라인
+
+    synthesize(index, sentence)는 워커 스레드에서 호출되며 그 반환값이
+    ('audio', index, sentence, result) 이벤트로 전달된다.
+    """
+
+    def __init__(self, synthesize, executor, min_chars=4):
+        self.synthesize = synthesize
+        self.executor = executor
+        self.min_chars = min_chars
+
+    def run(self, tokens):
+        """('token', token) / ('audio', index, sentence, result) 이벤트 생성"""
+        splitter = SentenceSplitter(self.min_chars)
+        pending = []
+        count = 0
+
+        for token in tokens:
+            yield ('token', token)
+            for sentence in splitter.feed(token):
+                pending.append(self._submit(count, sentence))
+                count += 1
+            # 순서가 앞선 문장부터 준비된 만큼만 바로 내보냄
+            while pending and pending[0][2].done():
+                yield self._result(pending.pop(0))
+
+        for sentence in splitter.flush():
+            pending.append(self._submit(count, sentence))
+            count += 1
+
+        # LLM 생성이 끝나면 남은 문장은 순서대로 완료를 기다림
+        for item in pending:
+            yield self._result(item)
+
+    def _submit(self, index, sentence):
+        return index, sentence, self.executor.submit(self.synthesize, index, sentence)
+
+    @staticmethod
+    def _result(item):
+        index, sentence, future = item
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"문장 음성 합성 오류: {index}, {str(e)}")
+            result = None
+        return ('audio', index, sentence, result)
+
+
+def create_tts_executor(max_workers):
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-pipeline")